@@ -1,6 +1,7 @@
 """
 Configuration settings for the Job Scam Detection API
 """
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -14,13 +15,76 @@ class Settings(BaseSettings):
     API_RELOAD: bool = True
     
     # Model Configuration
-    MODEL_PATH: str = "models/saved_models/scam_detector.pkl"
+    MODEL_PATH: str = "models/saved_models/scam_detector.pkl"  # Pickle, used if no artifact
+    MODEL_ARTIFACT_PATH: str = "models/saved_models/scam_detector"  # Memory-mapped artifact directory
+    MODEL_MMAP: bool = True  # Map artifact arrays (shared between workers) instead of reading them
     MODEL_TYPE: str = "ensemble"
+    ML_ENGINE: str = "sklearn"  # "compiled": array-based scoring for logistic and forest models
     
     # Thresholds
     SCAM_THRESHOLD_HIGH: float = 0.7
     SCAM_THRESHOLD_MEDIUM: float = 0.4
     
+    # Rule Matching
+    RULE_REGEX_ENGINE: str = "re"  # "re" or "re2" (linear time, needs google-re2)
+    RULE_MATCH_WINDOW: int = 0  # Max chars spanned by ".*" in rules (0 = unbounded)
+    RULE_TIME_BUDGET_MS: float = 0  # Regex time per evaluation before skipping rules (0 = off)
+    RULE_STATS_ENABLED: bool = False  # Count evaluations, hits and time per rule/feature
+    
+    # Rule Packs
+    RULE_PACK_PATH: Optional[str] = None  # JSON/YAML rule pack (None = built-in rules)
+    RULE_PACK_WATCH_INTERVAL: float = 0  # Seconds between file checks (0 = no watching)
+    
+    # Confidence Cascade (rules decide alone outside the uncertainty band)
+    CASCADE_ENABLED: bool = False  # Skip the ML model when the rule score is decisive
+    CASCADE_LOW: float = 0.0  # Rule score at or below this is legitimate without ML
+    CASCADE_HIGH: float = 1.0  # Rule score at or above this is a scam without ML
+    
+    # Analysis Workers (CPU-bound analysis runs off the event loop)
+    WORKER_POOL: str = "thread"  # "thread", "process" (forked from the loaded detector) or "none"
+    WORKER_COUNT: int = 4  # Analyses running at once
+    WORKER_QUEUE_SIZE: int = 64  # Analyses waiting for a worker; more get 429 with Retry-After
+    
+    # Micro-Batching (concurrent /analyze calls share one detector batch)
+    MICRO_BATCH_SIZE: int = 32  # Max requests per batch (1 = analyze each request alone)
+    MICRO_BATCH_WAIT_MS: float = 2.0  # Max time a request waits for others to join its batch
+    
+    # Streaming Batches (/v2/batch-analyze)
+    STREAM_CHUNK_SIZE: int = 64  # Records analyzed per detector batch; memory is bounded by two chunks
+    STREAM_MAX_LINE_BYTES: int = 2_000_000  # Longer NDJSON lines are skipped and reported as errors
+    
+    # Bulk Jobs (/jobs uploads, processed in the background)
+    BULK_JOB_DB_PATH: str = "data/bulk_jobs.sqlite"  # Job state, inputs and results
+    BULK_JOB_CHUNK_SIZE: int = 256  # Postings analyzed per checkpoint
+    BULK_JOB_WORKERS: int = 1  # Jobs processed at once (0 = this process only accepts uploads)
+    BULK_RESULT_PAGE_SIZE: int = 1000  # Max results per page
+    
+    # Scam Reports (/report submissions kept for retraining)
+    REPORT_DB_PATH: str = "data/reports.sqlite"  # Reports, one row per distinct posting
+    REPORT_QUEUE_SIZE: int = 10000  # Reports waiting to be written; more get 503
+    
+    # Long Postings (scored in chunks, so work grows linearly up to a ceiling)
+    MAX_TEXT_LENGTH: int = 200000  # Longest text the API accepts, larger requests get 413 (0 = no limit)
+    LONG_TEXT_THRESHOLD: int = 10000  # Cleaned texts longer than this are scored in chunks (0 = never)
+    LONG_TEXT_CHUNK_SIZE: int = 4000  # Max chars per chunk, split at sentence breaks
+    LONG_TEXT_MAX_CHARS: int = 40000  # Chars of a long text that are scored; the rest is skipped
+    
+    # Shadow Model (a candidate model scored in the background on live traffic)
+    SHADOW_MODEL_PATH: Optional[str] = None  # Artifact directory or pickle (None = no shadow)
+    SHADOW_QUEUE_SIZE: int = 1000  # Postings waiting for the shadow model; more are dropped
+    SHADOW_LOG_PATH: str = "logs/shadow.sqlite"  # SQLite file of per-request comparisons
+    
+    # Result Cache (keyed by cleaned text, URL, model/rule pack versions and thresholds)
+    RESULT_CACHE_SIZE: int = 10000  # Max cached results (0 = no cache)
+    RESULT_CACHE_TTL: float = 3600  # Seconds before a cached result expires (0 = never)
+    
+    # Near-Duplicate Index (reposts with small edits reuse the stored ML score)
+    NEAR_DUPLICATE_SIZE: int = 0  # Postings kept, oldest evicted first (0 = off, e.g. 100000)
+    NEAR_DUPLICATE_THRESHOLD: float = 0.95  # Min SimHash similarity (1 - differing bits / 64)
+    NEAR_DUPLICATE_MODE: str = "reuse"  # "reuse" skips the model, "blend" averages with it
+    NEAR_DUPLICATE_BLEND_WEIGHT: float = 0.5  # Weight of the stored score in blend mode
+    NEAR_DUPLICATE_INDEX_PATH: Optional[str] = None  # .npz file loaded at start, saved at shutdown
+    
     # Security
     API_KEY_ENABLED: bool = False
     API_KEY: Optional[str] = None
@@ -31,6 +95,14 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     
+    @field_validator('NEAR_DUPLICATE_THRESHOLD')
+    @classmethod
+    def check_near_duplicate_threshold(cls, value: float) -> float:
+        # The index supports at most 15 differing bits (similarity > 0.75)
+        if not 0.75 < value <= 1.0:
+            raise ValueError("NEAR_DUPLICATE_THRESHOLD must be above 0.75 and at most 1.0")
+        return value
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
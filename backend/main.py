@@ -2,25 +2,67 @@
 Job Scam Detection API - Main Application
 FastAPI backend for analyzing job posts for scam indicators
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, Header, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from starlette.requests import ClientDisconnect
+from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple, Union
+from contextlib import asynccontextmanager
+import asyncio
+import csv
 import logging
 
 from backend.models.detector import JobScamDetector
-from backend.utils.text_processor import TextProcessor
+from backend.models.rule_pack import RulePackError
+from backend.utils.match_stats import get_match_stats, reset_match_stats, set_match_stats_enabled
+from backend.utils.metrics import CallbackMetric, MetricsMiddleware, StageClock, predictions, registry
+from backend.utils.bulk_jobs import UPLOAD_FORMATS, BulkJobRunner, read_csv, read_jsonl, store_upload, upload_format
+from backend.utils.job_store import COMPLETED, UNFINISHED, UPLOADING, JobItem, JobStore
+from backend.utils.json_codec import FastJSONResponse
+from backend.utils.micro_batcher import MicroBatcher
+from backend.utils.report_store import ReportStore
+from backend.utils.ndjson import (
+    NDJSONLineError, NDJSONStreamingResponse, batched, encode_line, read_ndjson
+)
+from backend.utils.result_cache import content_key
+from backend.utils.text_processor import OffsetMap, TextProcessor
+from backend.utils.worker_pool import PoolSaturated, PoolUnavailable, WorkerPool
 from backend.config import settings
 
 # Configure logging
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services"""
+    # Hot-reload the rule pack file if RULE_PACK_WATCH_INTERVAL is set; process
+    # workers hold a copy of the detector, so fork new ones after each reload
+    detector.watch_rule_pack(on_reload=pool.recycle)
+    # Process workers fork from the loaded detector before serving starts
+    pool.start()
+    # Resume bulk jobs left unfinished by the last run
+    bulk_runner.start()
+    yield
+    await bulk_runner.stop()
+    # Write reports still waiting in the buffer
+    report_store.close()
+    # Stop reloads first so none recycles the pool after it is shut down
+    detector.stop_watching_rule_pack()
+    pool.shutdown()
+    detector.save_near_duplicates()
+    detector.stop_shadow()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Job Scam Detection API",
     description="AI-powered system to detect fake and scam job posts",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS Middleware
@@ -32,11 +74,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route, for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Initialize detector
 detector = JobScamDetector()
 text_processor = TextProcessor()
 
 
+def init_analysis_worker():
+    """
+    Set up a worker process of the analysis pool
+    
+    The shadow model's background thread does not survive a fork, so shadow
+    scoring only sees requests analyzed in the API process (thread workers).
+    """
+    detector.shadow = None
+
+
+# CPU-bound analysis runs here, not on the event loop
+pool = WorkerPool(
+    settings.WORKER_POOL, settings.WORKER_COUNT, settings.WORKER_QUEUE_SIZE,
+    initializer=init_analysis_worker
+)
+
+# Reports are written to SQLite in the background, off the request path
+report_store = ReportStore(settings.REPORT_DB_PATH, settings.REPORT_QUEUE_SIZE)
+
+
 # Pydantic Models
 class JobAnalysisRequest(BaseModel):
     text: str = Field(..., description="Job posting text to analyze")
@@ -47,6 +112,8 @@ class HighlightedText(BaseModel):
     text: str
     risk_level: str  # "high", "medium", "low"
     reason: str
+    start: Optional[int] = Field(None, description="Start offset in the submitted text")
+    end: Optional[int] = Field(None, description="End offset (exclusive) in the submitted text")
 
 
 class JobAnalysisResponse(BaseModel):
@@ -57,6 +124,46 @@ class JobAnalysisResponse(BaseModel):
     explanation: str
     advice: List[str]
     confidence: float = Field(..., ge=0.0, le=1.0)
+    near_duplicate: Optional[float] = Field(
+        None, description="Similarity of an earlier posting whose ML score was reused (null if none)"
+    )
+
+
+class SelectedAnalysisResponse(BaseModel):
+    """JobAnalysisResponse as returned with mode or fields: only the selected fields are present"""
+    prediction: Optional[str] = None
+    score: Optional[int] = Field(None, ge=0, le=100, description="Trust score 0-100")
+    flags: Optional[List[str]] = Field(None, description="List of scam indicators found")
+    highlighted_phrases: Optional[List[HighlightedText]] = None
+    explanation: Optional[str] = None
+    advice: Optional[List[str]] = None
+    confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
+    near_duplicate: Optional[float] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[SelectedAnalysisResponse]
+
+
+# Fields of an analysis result; requests selecting only SCORE_FIELDS are scored
+# without keyword features, highlights, explanation or advice
+RESPONSE_FIELDS = tuple(JobAnalysisResponse.model_fields)
+SCORE_FIELDS = ('prediction', 'score', 'confidence')
+
+AnalysisMode = Literal["full", "score"]
+MODE_DESCRIPTION = "score: only prediction, score and confidence (faster)"
+FIELDS_DESCRIPTION = "Comma-separated result fields to return, e.g. score,prediction"
+
+
+class StreamAnalysisRecord(BaseModel):
+    id: Optional[Union[str, int]] = Field(None, description="Echoed in the result line (default: line number)")
+    text: str = Field(..., description="Job posting text to analyze")
+    url: Optional[str] = Field(None, description="Job posting URL (optional)")
+
+
+class RuleStatsUpdate(BaseModel):
+    enabled: Optional[bool] = Field(None, description="Turn rule/feature counters on or off")
+    reset: bool = Field(False, description="Clear collected counters")
 
 
 class ReportScamRequest(BaseModel):
@@ -65,6 +172,12 @@ class ReportScamRequest(BaseModel):
     user_feedback: Optional[str] = None
 
 
+def verify_api_key(api_key: Optional[str]):
+    """Reject the request if API keys are enabled and the key doesn't match"""
+    if settings.API_KEY_ENABLED and api_key != settings.API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -81,15 +194,269 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": detector.is_loaded(),
+        "rule_pack_version": detector.rule_pack.version,
         "version": "1.0.0"
     }
 
 
-@app.post("/analyze", response_model=JobAnalysisResponse)
-async def analyze_job_post(request: JobAnalysisRequest):
+def _model_info() -> Dict[Tuple[str, ...], float]:
+    pack = detector.rule_pack
+    return {(detector.model_version, pack.version, settings.ML_ENGINE, str(detector.is_loaded()).lower()): 1}
+
+
+def _cache_lookups() -> Dict[Tuple[str, ...], float]:
+    if detector.cache is None:
+        return {}
+    stats = detector.cache.stats()
+    return {('hit',): stats['hits'], ('miss',): stats['misses']}
+
+
+def _cache_hit_ratio() -> Dict[Tuple[str, ...], float]:
+    if detector.cache is None:
+        return {}
+    return {(): detector.cache.stats()['hit_rate']}
+
+
+def _pool_state() -> Dict[Tuple[str, ...], float]:
+    stats = pool.stats()
+    return {('running',): stats['running'], ('queued',): stats['queued']}
+
+
+# Read from the detector and pool when /metrics is scraped
+registry.register(CallbackMetric(
+    'model_info', 'Serving model version, rule pack version and ML engine',
+    ('model_version', 'rule_pack_version', 'ml_engine', 'model_loaded'), _model_info
+))
+registry.register(CallbackMetric(
+    'result_cache_lookups_total', 'Result cache lookups by outcome', ('result',), _cache_lookups, kind='counter'
+))
+registry.register(CallbackMetric('result_cache_hit_ratio', 'Result cache hits / lookups', (), _cache_hit_ratio))
+registry.register(CallbackMetric(
+    'analysis_pool_calls', 'Analyses on the worker pool by state', ('state',), _pool_state
+))
+registry.register(CallbackMetric(
+    'analysis_pool_rejected_total', 'Analyses refused with 429', (),
+    lambda: {(): pool.rejected}, kind='counter'
+))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics: request counts and latency per route, per-stage
+    analysis time, prediction labels, cache hit ratio and model version
+    """
+    return Response(registry.render(), media_type=registry.CONTENT_TYPE)
+
+
+def check_text_length(text: str):
+    """Reject texts over MAX_TEXT_LENGTH before any work is done on them"""
+    if settings.MAX_TEXT_LENGTH and len(text) > settings.MAX_TEXT_LENGTH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Text is {len(text)} characters; the limit is {settings.MAX_TEXT_LENGTH}"
+        )
+
+
+def response_fields(mode: str, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Result fields selected by the mode and fields parameters (None = all)
+    
+    Raises:
+        HTTPException: 422 for unknown fields, or when both are given
+    """
+    if fields is None:
+        return SCORE_FIELDS if mode == "score" else None
+    if mode != "full":
+        raise HTTPException(status_code=422, detail="Use either mode or fields, not both")
+    selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in RESPONSE_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown fields {', '.join(unknown) or '(none given)'}; "
+                   f"choose from {', '.join(RESPONSE_FIELDS)}"
+        )
+    return selected
+
+
+def is_score_only(fields: Optional[Tuple[str, ...]]) -> bool:
+    """Whether the selected fields can come from a score-only analysis"""
+    return fields is not None and set(fields) <= set(SCORE_FIELDS)
+
+
+def select_fields(result: Dict, fields: Optional[Tuple[str, ...]]) -> Dict:
+    """The selected fields of an analysis result"""
+    if fields is None:
+        return result
+    return {name: result[name] for name in fields}
+
+
+def clean_posting(text: str) -> Tuple[str, OffsetMap]:
+    """Clean a submitted text, keeping offsets into it (timed as the clean_text stage)"""
+    clock = StageClock()
+    cleaned = text_processor.clean_text_with_offsets(text)
+    clock.lap('clean_text')
+    return cleaned
+
+
+def result_etag(cleaned_text: str, url: Optional[str], raw_text: str,
+                fields: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    ETag for an /analyze response
+    
+    The result depends on the cache key; highlight offsets also depend on the
+    raw text they point into, and the body on the selected fields.
+    """
+    return '"' + content_key(detector.cache_key(cleaned_text, url), raw_text, *(fields or ()))[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+AnalyzeRequest = Tuple[str, Optional[str], Optional[str], Optional[Tuple[str, ...]]]
+
+
+def analyze_requests(requests: List[AnalyzeRequest]) -> List:
+    """
+    Clean, revalidate and analyze concurrent /analyze requests in one
+    detector batch per mode (runs on an analysis worker)
+    
+    If a batch fails, its postings are analyzed one by one, so a posting
+    that can't be analyzed only fails its own request.
+    
+    Args:
+        requests: (text, url, If-None-Match header, selected fields) per request
+    
+    Returns:
+        (ETag, analyze() result or None if If-None-Match matched the ETag) per
+        request, score-only results for requests that only need the score,
+        or the exception that request failed with
+    """
+    outcomes = [None] * len(requests)
+    to_analyze = {False: [], True: []}  # By score_only
+    for index, (text, url, if_none_match, fields) in enumerate(requests):
+        try:
+            # Clean and preprocess text, keeping offsets into the submitted text
+            cleaned_text, offset_map = clean_posting(text)
+            etag = result_etag(cleaned_text, url, text, fields)
+        except Exception as e:
+            logger.error(f"Analysis error: {str(e)}")
+            outcomes[index] = e
+            continue
+        
+        if etag_matches(if_none_match, etag):
+            outcomes[index] = (etag, None)
+        else:
+            to_analyze[is_score_only(fields)].append((index, etag, cleaned_text, url, offset_map))
+    
+    for score_only, group in to_analyze.items():
+        if not group:
+            continue
+        _, _, texts, urls, offset_maps = zip(*group)
+        try:
+            results = detector.analyze_batch(texts, urls, offset_maps, score_only)
+            for (index, etag, *_), result in zip(group, results):
+                outcomes[index] = (etag, result)
+            continue
+        except Exception as e:
+            logger.warning(f"Micro-batch failed ({e}); analyzing its postings one by one")
+        
+        for index, etag, cleaned_text, url, offset_map in group:
+            try:
+                outcomes[index] = (etag, detector.analyze(cleaned_text, url, offset_map, score_only))
+            except Exception as e:
+                logger.error(f"Analysis error: {str(e)}")
+                outcomes[index] = e
+    return outcomes
+
+
+def analyze_batch_request(texts: List[str], score_only: bool = False) -> List[Dict]:
+    """Clean and analyze a batch of postings (runs on an analysis worker)"""
+    cleaned = [clean_posting(text) for text in texts]
+    return detector.analyze_batch(
+        [cleaned_text for cleaned_text, _ in cleaned],
+        offset_maps=[offset_map for _, offset_map in cleaned],
+        score_only=score_only
+    )
+
+
+def analyze_stream_chunk(records: List[Tuple[str, Optional[str]]],
+                         score_only: bool = False) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Clean and analyze one chunk of a streamed batch (runs on an analysis worker)
+    
+    If the batch call fails, the chunk is analyzed posting by posting so
+    only the posting that caused it fails.
+    
+    Args:
+        records: (text, url) per posting
+        score_only: Score-only analysis (see JobScamDetector.analyze)
+    
+    Returns:
+        (analyze() result, None) or (None, error message) per posting
+    """
+    try:
+        cleaned = [clean_posting(text) for text, _ in records]
+        results = detector.analyze_batch(
+            [cleaned_text for cleaned_text, _ in cleaned],
+            [url for _, url in records],
+            [offset_map for _, offset_map in cleaned],
+            score_only
+        )
+        return [(result, None) for result in results]
+    except Exception as e:
+        logger.warning(f"Stream chunk failed ({e}); analyzing its postings one by one")
+    
+    outcomes = []
+    for text, url in records:
+        try:
+            cleaned_text, offset_map = clean_posting(text)
+            outcomes.append((detector.analyze(cleaned_text, url, offset_map, score_only), None))
+        except Exception as e:
+            logger.error(f"Stream analysis error: {str(e)}")
+            outcomes.append((None, f"Analysis failed: {str(e)}"))
+    return outcomes
+
+
+async def run_analysis(func, *args):
+    """Run an analysis on the worker pool, turning overload into 429/503 with Retry-After"""
+    try:
+        return await pool.run(func, *args)
+    except PoolSaturated as e:
+        raise HTTPException(
+            status_code=429, detail="Too many analyses in progress, please retry",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolUnavailable as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(pool.retry_after())}
+        )
+
+
+async def analyze_coalesced(requests: List[AnalyzeRequest]) -> List:
+    return await run_analysis(analyze_requests, requests)
+
+
+# Concurrent /analyze calls share one cleaning/feature/rule/model pass
+batcher = MicroBatcher(analyze_coalesced, settings.MICRO_BATCH_SIZE, settings.MICRO_BATCH_WAIT_MS)
+
+
+@app.post("/analyze", response_model=SelectedAnalysisResponse)
+async def analyze_job_post(request: JobAnalysisRequest, if_none_match: Optional[str] = Header(None),
+                           mode: AnalysisMode = Query("full", description=MODE_DESCRIPTION),
+                           fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """
     Analyze a job posting for scam indicators
     
+    Responses carry an ETag; send it back in If-None-Match to get an empty
+    304 when the result for this text, URL, model and rule pack is unchanged.
+    
     Returns:
     - prediction: Classification result
     - score: Trust score (0-100, higher is safer)
@@ -97,16 +464,38 @@ async def analyze_job_post(request: JobAnalysisRequest):
     - highlighted_phrases: Risky phrases with context
     - explanation: Natural language explanation
     - advice: Actionable safety recommendations
+    - near_duplicate: Similarity of the earlier posting whose ML score was
+      reused when the near-duplicate index is on, else null
+    
+    Texts over MAX_TEXT_LENGTH characters are rejected with 413; long texts
+    below it are scored in chunks (see LONG_TEXT_* settings). When every
+    analysis worker is busy and the queue is full, the API answers 429 with
+    a Retry-After header.
+    
+    Requests arriving within MICRO_BATCH_WAIT_MS of each other are analyzed
+    together (up to MICRO_BATCH_SIZE), with one vectorizer and model call.
+    
+    mode=score, or fields= naming only prediction/score/confidence, skips
+    keyword features, highlights, explanation and advice, and stops rule
+    matching once the score saturates; the score itself is unchanged.
+    Without mode or fields every field is present.
+    
+    The response is encoded directly and not validated against the
+    response model, which only documents it.
     """
+    check_text_length(request.text)
+    selected = response_fields(mode, fields)
+    
     try:
-        # Clean and preprocess text
-        cleaned_text = text_processor.clean_text(request.text)
-        
-        # Run detection
-        result = detector.analyze(cleaned_text, request.url)
+        etag, result = await batcher.submit((request.text, request.url, if_none_match, selected))
+        if result is None:
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return JobAnalysisResponse(**result)
+        predictions.inc((result['prediction'],))
+        return FastJSONResponse(select_fields(result, selected), headers={"ETag": etag})
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -116,9 +505,21 @@ async def analyze_job_post(request: JobAnalysisRequest):
 async def report_scam(request: ReportScamRequest):
     """
     Report a scam job posting (for future model improvement)
+    
+    The report is queued and written to REPORT_DB_PATH in the background;
+    repeat reports of the same posting are counted, not stored twice. When
+    the write queue is full the API answers 503 with a Retry-After header.
     """
+    check_text_length(request.text)
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Report text is empty")
+    
     try:
-        # Log the report (in production, save to database)
+        if not report_store.submit(request.text, request.url, request.user_feedback):
+            raise HTTPException(
+                status_code=503, detail="Too many reports are waiting to be saved",
+                headers={"Retry-After": "1"}
+            )
         logger.info(f"Scam reported: {request.url or 'no URL'}")
         
         return {
@@ -126,30 +527,417 @@ async def report_scam(request: ReportScamRequest):
             "message": "Thank you for reporting. This helps improve our detection system."
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Report error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to submit report")
 
 
-@app.post("/batch-analyze")
-async def batch_analyze(texts: List[str]):
+@app.post("/admin/reload-rules")
+async def reload_rules(x_api_key: Optional[str] = Header(None)):
+    """
+    Recompile the configured rule pack and swap it in without a restart
+    """
+    verify_api_key(x_api_key)
+    
+    try:
+        # Compile off the event loop; requests keep using the old pack until the swap
+        pack = await run_in_threadpool(detector.reload_rule_pack)
+    except RulePackError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Process workers hold a copy of the detector; fork new ones with the new pack
+    await run_in_threadpool(pool.recycle)
+    
+    return {
+        "status": "reloaded",
+        "rule_pack_version": pack.version,
+        "rules": len(pack.rule_engine.rules)
+    }
+
+
+@app.get("/admin/cache-stats")
+async def cache_stats(x_api_key: Optional[str] = Header(None)):
+    """
+    Result cache size, hits, misses, evictions and expirations, and
+    near-duplicate index size
+    """
+    verify_api_key(x_api_key)
+    stats = {"enabled": False}
+    if detector.cache is not None:
+        stats = {"enabled": True, **detector.cache.stats()}
+    if detector.near_duplicates is not None:
+        stats["near_duplicates"] = detector.near_duplicates.stats()
+    return stats
+
+
+@app.get("/admin/shadow-stats")
+async def shadow_stats(x_api_key: Optional[str] = Header(None)):
+    """
+    Shadow model queue counters, label disagreement rate, score deltas and
+    latency compared with the serving model
+    """
+    verify_api_key(x_api_key)
+    if detector.shadow is None:
+        return {"enabled": False}
+    stats = await run_in_threadpool(detector.shadow.stats)
+    return {"enabled": True, **stats}
+
+
+@app.get("/admin/report-stats")
+async def report_stats(x_api_key: Optional[str] = Header(None)):
+    """Report queue counters and the number of stored postings and reports"""
+    verify_api_key(x_api_key)
+    return await run_in_threadpool(report_store.stats)
+
+
+@app.get("/admin/worker-stats")
+async def worker_stats(x_api_key: Optional[str] = Header(None)):
+    """
+    Analysis pool queue depth, completed/failed/rejected counts, time spent
+    waiting for a worker and running on one, and /analyze micro-batch sizes
+    """
+    verify_api_key(x_api_key)
+    return {**pool.stats(), "micro_batch": batcher.stats()}
+
+
+@app.post("/admin/cache-clear")
+async def cache_clear(x_api_key: Optional[str] = Header(None)):
+    """
+    Drop all cached results
+    """
+    verify_api_key(x_api_key)
+    if detector.cache is not None:
+        detector.cache.clear()
+    return {"status": "cleared"}
+
+
+@app.get("/admin/rule-stats")
+async def rule_stats(x_api_key: Optional[str] = Header(None)):
+    """
+    Per-rule and per-feature-group evaluations, hits and time spent
+    """
+    verify_api_key(x_api_key)
+    return get_match_stats()
+
+
+@app.post("/admin/rule-stats")
+async def update_rule_stats(update: RuleStatsUpdate, x_api_key: Optional[str] = Header(None)):
+    """
+    Toggle or reset rule/feature counters
+    """
+    verify_api_key(x_api_key)
+    
+    if update.reset:
+        reset_match_stats()
+    if update.enabled is not None:
+        set_match_stats_enabled(update.enabled)
+    
+    return get_match_stats()
+
+
+@app.post("/batch-analyze", response_model=BatchAnalysisResponse)
+async def batch_analyze(texts: List[str],
+                        mode: AnalysisMode = Query("full", description=MODE_DESCRIPTION),
+                        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """
     Analyze multiple job posts in batch
+    
+    mode and fields select result fields as for /analyze. As there, the
+    response is not validated against the response model.
     """
+    for text in texts:
+        check_text_length(text)
+    selected = response_fields(mode, fields)
+    
     try:
-        results = []
-        for text in texts:
-            cleaned_text = text_processor.clean_text(text)
-            result = detector.analyze(cleaned_text)
-            results.append(result)
+        results = await run_analysis(analyze_batch_request, texts, is_score_only(selected))
+        for result in results:
+            predictions.inc((result['prediction'],))
         
-        return {"results": results}
+        return FastJSONResponse({"results": [select_fields(result, selected) for result in results]})
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Batch analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail="Batch analysis failed")
 
 
+# Pause before offering a streamed or bulk chunk to a saturated pool again
+STREAM_RETRY_DELAY = 0.05
+
+
+def parse_record(line_number: int, value: object) -> JobItem:
+    """
+    Validate one record of a streamed batch or bulk upload
+    
+    Args:
+        line_number: Line of the record, its id when it has none
+        value: Parsed JSON value (or NDJSONLineError) or CSV row
+    
+    Returns:
+        (id, text, url, None), or (id, None, None, {"status", "detail"}) for
+        a record that can't be analyzed
+    """
+    if isinstance(value, NDJSONLineError):
+        return line_number, None, None, {'status': 400, 'detail': f"Line {line_number}: {value}"}
+    item_id = value.get('id', line_number) if isinstance(value, dict) else line_number
+    try:
+        record = StreamAnalysisRecord.model_validate(value)
+    except ValidationError as e:
+        detail = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'record'}: {error['msg']}"
+            for error in e.errors()
+        )
+        return item_id, None, None, {'status': 422, 'detail': f"Line {line_number}: {detail}"}
+    item_id = line_number if record.id is None else record.id
+    if settings.MAX_TEXT_LENGTH and len(record.text) > settings.MAX_TEXT_LENGTH:
+        detail = f"Text is {len(record.text)} characters; the limit is {settings.MAX_TEXT_LENGTH}"
+        return item_id, None, None, {'status': 413, 'detail': detail}
+    return item_id, record.text, record.url, None
+
+
+async def analyze_items(items: List[JobItem], fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+    """
+    Analyze a chunk of validated records on the worker pool
+    
+    A saturated pool is waited for rather than reported, since callers
+    (streams and bulk jobs) have no client to send a 429 to.
+    
+    Args:
+        items: Records from parse_record()
+        fields: Result fields to return (None = all)
+    
+    Returns:
+        One output line per record, in order: {"id", "result"} with the
+        /analyze response, or {"id", "error": {"status", "detail"}}
+    
+    Raises:
+        PoolUnavailable: if the pool is shut down or a worker process died
+    """
+    outputs = [None] * len(items)
+    to_analyze = []
+    for index, (item_id, _, _, error) in enumerate(items):
+        if error is not None:
+            outputs[index] = {'id': item_id, 'error': error}
+        else:
+            to_analyze.append(index)
+    if not to_analyze:
+        return outputs
+    
+    records = [(items[index][1], items[index][2]) for index in to_analyze]
+    while True:
+        try:
+            outcomes = await pool.run(analyze_stream_chunk, records, is_score_only(fields))
+            break
+        except PoolSaturated:
+            await asyncio.sleep(STREAM_RETRY_DELAY)
+    
+    for index, (result, error) in zip(to_analyze, outcomes):
+        item_id = items[index][0]
+        if error is not None:
+            outputs[index] = {'id': item_id, 'error': {'status': 500, 'detail': error}}
+        else:
+            predictions.inc((result['prediction'],))
+            outputs[index] = {'id': item_id, 'result': select_fields(result, fields)}
+    return outputs
+
+
+async def analyze_stream_items(lines: List[Tuple[int, object]],
+                               fields: Optional[Tuple[str, ...]] = None) -> List[bytes]:
+    """
+    Validate and analyze one chunk of NDJSON records
+    
+    Args:
+        lines: (line number, parsed line) pairs from read_ndjson()
+        fields: Result fields to return (None = all)
+    
+    Returns:
+        One encoded output line per record, in order
+    """
+    items = [parse_record(line_number, value) for line_number, value in lines]
+    try:
+        outputs = await analyze_items(items, fields)
+    except PoolUnavailable as e:
+        # The response has already started; fail this chunk's records, not the stream
+        outputs = [
+            {'id': item_id, 'error': error or {'status': 503, 'detail': str(e)}}
+            for item_id, _, _, error in items
+        ]
+    return [encode_line(output) for output in outputs]
+
+
+async def stream_analysis(body: AsyncIterator[bytes],
+                          fields: Optional[Tuple[str, ...]] = None) -> AsyncIterator[bytes]:
+    """
+    Result lines for an NDJSON request body, chunk by chunk
+    
+    The next chunk is read from the body while the current one is analyzed,
+    so at most two chunks are held in memory whatever the batch size.
+    """
+    items = read_ndjson(body, settings.STREAM_MAX_LINE_BYTES)
+    pending = None
+    try:
+        async for chunk in batched(items, max(1, settings.STREAM_CHUNK_SIZE)):
+            previous, pending = pending, asyncio.ensure_future(analyze_stream_items(chunk, fields))
+            if previous is not None:
+                for line in await previous:
+                    yield line
+        if pending is not None:
+            for line in await pending:
+                yield line
+    except ClientDisconnect:
+        logger.info("Client disconnected during a streamed batch")
+    finally:
+        # Client went away mid-stream: drop the chunk still being analyzed
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+@app.post("/v2/batch-analyze")
+async def batch_analyze_stream(request: Request,
+                               mode: AnalysisMode = Query("full", description=MODE_DESCRIPTION),
+                               fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """
+    Analyze a stream of job posts
+    
+    The request body is NDJSON, one {"id", "text", "url"} record per line
+    ("id" and "url" optional). Results stream back as NDJSON in input order
+    as each chunk of STREAM_CHUNK_SIZE records is analyzed, one line per
+    record: {"id", "result"} with the /analyze response, or {"id", "error":
+    {"status", "detail"}} for a record that is invalid, too long or failed.
+    A bad record never fails the rest of the stream. mode and fields
+    select result fields as for /analyze.
+    """
+    selected = response_fields(mode, fields)
+    return NDJSONStreamingResponse(stream_analysis(request.stream(), selected))
+
+
+
+# Bulk jobs analyze chunks the same way as streamed batches
+job_store = JobStore(settings.BULK_JOB_DB_PATH)
+bulk_runner = BulkJobRunner(
+    job_store, analyze_items, settings.BULK_JOB_CHUNK_SIZE, settings.BULK_JOB_WORKERS
+)
+
+
+def read_upload(file, file_format: str):
+    """Validated postings of an uploaded JSONL or CSV file"""
+    if file_format == 'csv':
+        # Fields a bit over the text limit still parse, and are rejected with 413
+        records = read_csv(file, max(settings.MAX_TEXT_LENGTH * 2, 1 << 20))
+    else:
+        records = read_jsonl(file)
+    for line_number, value in records:
+        yield parse_record(line_number, value)
+
+
+def job_status(job: Dict) -> Dict:
+    """Public view of a stored job"""
+    total, processed = job['total'], job['processed']
+    return {
+        "job_id": job['id'],
+        "status": job['status'],
+        "source": job['source'],
+        "total": total,
+        "processed": processed,
+        "errors": job['errors'],
+        "progress": processed / total if total else float(job['status'] == COMPLETED),
+        "error": job['error'],
+        "fields": job['fields'],
+        "created": job['created'],
+        "updated": job['updated'],
+    }
+
+
+async def get_job_or_404(job_id: str) -> Dict:
+    job = await run_in_threadpool(job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No bulk job {job_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def create_bulk_job(file: UploadFile = File(...), file_format: Optional[str] = Form(None, alias="format"),
+                          mode: AnalysisMode = Form("full", description=MODE_DESCRIPTION),
+                          fields: Optional[str] = Form(None, description=FIELDS_DESCRIPTION)):
+    """
+    Submit a bulk analysis job
+    
+    Upload a JSONL file of {"id", "text", "url"} records or a CSV file with
+    a "text" column ("id" and "url" optional). The format comes from the
+    "format" form field, else the file name or content type. The postings
+    are stored and the job is queued; poll GET /jobs/{job_id} for progress
+    and page through GET /jobs/{job_id}/results. The "mode" and "fields"
+    form fields select result fields as for /analyze.
+    """
+    selected = response_fields(mode, fields)
+    file_format = (file_format or upload_format(file.filename, file.content_type) or '').lower()
+    if file_format not in UPLOAD_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"Upload format must be one of {', '.join(UPLOAD_FORMATS)}"
+        )
+    
+    job_id = await run_in_threadpool(job_store.create_job, file.filename, selected)
+    try:
+        total = await run_in_threadpool(store_upload, job_store, job_id, read_upload(file.file, file_format))
+    except (ValueError, csv.Error) as e:  # Includes UnicodeDecodeError
+        await run_in_threadpool(job_store.fail_job, job_id, f"Unreadable upload: {e}")
+        raise HTTPException(status_code=400, detail=f"Unreadable {file_format} upload: {e}")
+    
+    bulk_runner.submit(job_id)
+    return {"job_id": job_id, "status": "queued", "total": total}
+
+
+@app.get("/jobs/{job_id}")
+async def get_bulk_job(job_id: str):
+    """
+    Bulk job status and progress
+    """
+    return job_status(await get_job_or_404(job_id))
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_bulk_job_results(job_id: str, offset: int = Query(0, ge=0),
+                               limit: Optional[int] = Query(None, ge=1)):
+    """
+    Page through a bulk job's results in upload order
+    
+    Results are available as soon as their chunk is analyzed, so pages can
+    be fetched while the job runs. Each result is {"id", "result"} or
+    {"id", "error"}, as in /v2/batch-analyze. Request the next page from
+    next_offset; it is null once every result has been returned.
+    """
+    job = await get_job_or_404(job_id)
+    limit = min(limit or settings.BULK_RESULT_PAGE_SIZE, settings.BULK_RESULT_PAGE_SIZE)
+    results = await run_in_threadpool(job_store.results, job_id, offset, limit)
+    
+    # Unfinished jobs will have results up to total; stopped ones only up to their checkpoint
+    end = job['total'] if job['status'] in UNFINISHED else job['processed']
+    next_offset = offset + len(results)
+    return {
+        "job_id": job_id,
+        "status": job['status'],
+        "offset": offset,
+        "next_offset": next_offset if next_offset < end else None,
+        "results": results,
+    }
+
+
+@app.delete("/jobs/{job_id}")
+async def delete_bulk_job(job_id: str):
+    """
+    Delete a finished bulk job and its results
+    """
+    job = await get_job_or_404(job_id)
+    if job['status'] in UNFINISHED or job['status'] == UPLOADING:
+        raise HTTPException(status_code=409, detail=f"Bulk job {job_id} is still {job['status']}")
+    await run_in_threadpool(job_store.delete_job, job_id)
+    return {"status": "deleted", "job_id": job_id}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -3,12 +3,25 @@ Job Scam Detector - Core ML Model
 Hybrid system combining ML models with rule-based detection
 """
 import re
+import hashlib
 import pickle
 import os
-from typing import Dict, List, Tuple
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 from backend.models.feature_extractor import FeatureExtractor
+from backend.models.forest_evaluator import CompiledForestScorer
+from backend.models.linear_scorer import CompiledLinearScorer
 from backend.models.rules import ScamRuleEngine
+from backend.models.shadow import ShadowScorer
+from backend.models.rule_pack import RulePack, RulePackWatcher, load_rule_pack
+from backend.utils.metrics import StageClock
+from backend.utils.model_artifact import is_model_artifact, load_model_artifact
+from backend.utils.near_duplicate import (
+    NEAR_DUPLICATE_MODES, NearDuplicateIndex, max_distance_for, simhash
+)
+from backend.utils.result_cache import ResultCache, content_key
+from backend.utils.text_processor import OffsetMap, TextProcessor
 from backend.config import settings
 
 logger = logging.getLogger(__name__)
@@ -18,55 +31,549 @@ class JobScamDetector:
     """Main detector class combining ML and rule-based approaches"""
     
     def __init__(self):
-        self.feature_extractor = FeatureExtractor()
-        self.rule_engine = ScamRuleEngine()
+        self._reload_lock = threading.Lock()
+        self._rule_pack_watcher = None
+        self.rule_pack = self._load_initial_rule_pack()
         self.model = None
         self.vectorizer = None
+        self.model_version = "none"
+        self.scorer = None
+        self.text_processor = TextProcessor()
+        self.cache = None
+        if settings.RESULT_CACHE_SIZE > 0:
+            self.cache = ResultCache(settings.RESULT_CACHE_SIZE, settings.RESULT_CACHE_TTL)
         self._load_model()
+        self.scorer = self._compile_scorer(self.model, self.vectorizer)
+        self.near_duplicates = self._load_near_duplicates()
+        self.shadow = self._load_shadow()
+    
+    @property
+    def feature_extractor(self) -> FeatureExtractor:
+        """Feature extractor of the active rule pack"""
+        return self.rule_pack.feature_extractor
+    
+    @property
+    def rule_engine(self) -> ScamRuleEngine:
+        """Rule engine of the active rule pack"""
+        return self.rule_pack.rule_engine
+    
+    def _load_initial_rule_pack(self) -> RulePack:
+        """Load the configured rule pack, falling back to the built-in rules"""
+        try:
+            pack = load_rule_pack(settings.RULE_PACK_PATH)
+        except ValueError as e:
+            logger.error(f"{e}. Using built-in rules.")
+            pack = load_rule_pack(None)
+        logger.info(f"Rule pack {pack.version} active")
+        return pack
+    
+    def reload_rule_pack(self, path: str = None) -> RulePack:
+        """
+        Compile a rule pack and swap it in atomically
+        
+        Compilation happens before the swap, so in-flight requests finish on
+        the snapshot they started with and a broken pack never goes live.
+        
+        Raises:
+            RulePackError: if the pack cannot be read or fails validation
+        """
+        path = path or settings.RULE_PACK_PATH
+        with self._reload_lock:
+            pack = load_rule_pack(path)
+            self.rule_pack = pack
+        logger.info(f"Rule pack {pack.version} active (from {path or 'built-in rules'})")
+        return pack
+    
+    def watch_rule_pack(self, interval: float = None, on_reload: Optional[Callable[[], None]] = None):
+        """
+        Reload the configured rule pack whenever its file changes
+        
+        Args:
+            interval: Seconds between file checks (default RULE_PACK_WATCH_INTERVAL)
+            on_reload: Called after each successful reload, e.g. to recycle
+                process workers that still hold the old pack
+        """
+        interval = interval or settings.RULE_PACK_WATCH_INTERVAL
+        if not settings.RULE_PACK_PATH or interval <= 0 or self._rule_pack_watcher:
+            return
+        
+        def reload(path: str):
+            self.reload_rule_pack(path)
+            if on_reload is not None:
+                on_reload()
+        
+        self._rule_pack_watcher = RulePackWatcher(settings.RULE_PACK_PATH, reload, interval)
+        self._rule_pack_watcher.start()
+    
+    def stop_watching_rule_pack(self):
+        """Stop the rule pack file watcher if running"""
+        if self._rule_pack_watcher:
+            self._rule_pack_watcher.stop()
+            self._rule_pack_watcher = None
+    
+    @classmethod
+    def _read_model(cls, path: str) -> Dict:
+        """
+        Load a model artifact directory or pickle file
+        
+        Returns:
+            Dict with 'model', 'vectorizer' and 'version'
+        """
+        if is_model_artifact(path):
+            return load_model_artifact(path, mmap=settings.MODEL_MMAP)
+        with open(path, 'rb') as f:
+            model_data = pickle.load(f)
+        model_data['version'] = model_data.get('version') or cls._file_version(path)
+        return model_data
     
     def _load_model(self):
-        """Load trained ML model if available"""
-        model_path = settings.MODEL_PATH
+        """Load trained ML model if available, preferring the memory-mapped artifact"""
+        artifact_path = settings.MODEL_ARTIFACT_PATH
+        if artifact_path and is_model_artifact(artifact_path):
+            try:
+                model_data = self._read_model(artifact_path)
+                self.model = model_data.get('model')
+                self.vectorizer = model_data.get('vectorizer')
+                self.model_version = model_data['version']
+                logger.info(f"Model {self.model_version} loaded from {artifact_path}")
+                return
+            except Exception as e:
+                logger.warning(f"Could not load model artifact: {e}. Trying pickle.")
         
+        model_path = settings.MODEL_PATH
         if os.path.exists(model_path):
             try:
-                with open(model_path, 'rb') as f:
-                    model_data = pickle.load(f)
-                    self.model = model_data.get('model')
-                    self.vectorizer = model_data.get('vectorizer')
-                logger.info(f"Model loaded from {model_path}")
+                model_data = self._read_model(model_path)
+                self.model = model_data.get('model')
+                self.vectorizer = model_data.get('vectorizer')
+                self.model_version = model_data['version']
+                logger.info(f"Model {self.model_version} loaded from {model_path}")
             except Exception as e:
                 logger.warning(f"Could not load model: {e}. Using rule-based system only.")
         else:
             logger.warning(f"Model not found at {model_path}. Using rule-based system only.")
     
+    def _new_near_duplicate_index(self) -> Optional[NearDuplicateIndex]:
+        """Empty near-duplicate index for the current model, or None if disabled"""
+        if settings.NEAR_DUPLICATE_SIZE <= 0:
+            return None
+        if settings.WORKER_POOL == 'process':
+            # Each forked worker would fill its own copy and the parent's, which
+            # is the one saved at shutdown, would stay empty
+            logger.warning("Near-duplicate index is not supported with WORKER_POOL=process; disabled")
+            return None
+        if settings.NEAR_DUPLICATE_MODE not in NEAR_DUPLICATE_MODES:
+            raise ValueError(
+                f"Unknown NEAR_DUPLICATE_MODE {settings.NEAR_DUPLICATE_MODE!r}, "
+                f"expected one of {NEAR_DUPLICATE_MODES}"
+            )
+        return NearDuplicateIndex(
+            settings.NEAR_DUPLICATE_SIZE,
+            max_distance_for(settings.NEAR_DUPLICATE_THRESHOLD),
+            version=self.model_version
+        )
+    
+    def _load_near_duplicates(self) -> Optional[NearDuplicateIndex]:
+        """Restore the saved near-duplicate index if it matches the model and settings"""
+        index = self._new_near_duplicate_index()
+        path = settings.NEAR_DUPLICATE_INDEX_PATH
+        if index is None or not path or not os.path.exists(path):
+            return index
+        
+        try:
+            saved = NearDuplicateIndex.load(path)
+        except Exception as e:
+            logger.warning(f"Could not load near-duplicate index: {e}. Starting empty.")
+            return index
+        
+        if (saved.version, saved.capacity, saved.max_distance) != (
+            index.version, index.capacity, index.max_distance
+        ):
+            logger.info("Saved near-duplicate index is for another model or size; starting empty")
+            return index
+        logger.info(f"Near-duplicate index loaded from {path} ({len(saved)} postings)")
+        return saved
+    
+    def save_near_duplicates(self):
+        """Write the near-duplicate index to NEAR_DUPLICATE_INDEX_PATH if configured"""
+        path = settings.NEAR_DUPLICATE_INDEX_PATH
+        if self.near_duplicates is None or not path:
+            return
+        self.near_duplicates.save(path)
+        logger.info(f"Near-duplicate index saved to {path} ({len(self.near_duplicates)} postings)")
+    
+    def _load_shadow(self) -> Optional[ShadowScorer]:
+        """Shadow scorer for the candidate model at SHADOW_MODEL_PATH, or None"""
+        path = settings.SHADOW_MODEL_PATH
+        if not path:
+            return None
+        try:
+            model_data = self._read_model(path)
+        except Exception as e:
+            logger.warning(f"Could not load shadow model from {path}: {e}. Shadow scoring is off.")
+            return None
+        
+        model, vectorizer = model_data.get('model'), model_data.get('vectorizer')
+        logger.info(f"Shadow model {model_data['version']} loaded from {path}")
+        return ShadowScorer(
+            model, vectorizer, model_data['version'],
+            log_path=settings.SHADOW_LOG_PATH,
+            queue_size=settings.SHADOW_QUEUE_SIZE,
+            blend=self._blend_scores,
+            label=self._get_prediction_label,
+            scorer=self._compile_scorer(model, vectorizer)
+        )
+    
+    def stop_shadow(self):
+        """Let the shadow worker finish queued postings and stop it"""
+        if self.shadow is not None:
+            self.shadow.close()
+    
+    def _submit_shadow(self, text: str, ml_texts: List[str], rule_score: float,
+                       ml_score: Optional[float]):
+        """Queue a freshly analyzed posting for the shadow model, if one is loaded"""
+        if self.shadow is None:
+            return
+        self.shadow.submit(
+            content_key(text), ml_texts, rule_score, ml_score,
+            self._combine_scores(ml_score, rule_score), self.model_version
+        )
+    
+    def _compile_scorer(self, model, vectorizer):
+        """
+        Compiled scorer for a model if ML_ENGINE is "compiled"
+        
+        Logistic models get CompiledLinearScorer; forests and soft-voting
+        ensembles containing forests get CompiledForestScorer. Anything else
+        keeps sklearn (None).
+        """
+        if settings.ML_ENGINE != "compiled" or not (model and vectorizer):
+            return None
+        errors = []
+        for scorer_class in (CompiledLinearScorer, CompiledForestScorer):
+            try:
+                return scorer_class(model, vectorizer)
+            except ValueError as e:
+                errors.append(str(e))
+        logger.warning(f"{'; '.join(errors)}. Using sklearn for ML scoring.")
+        return None
+    
+    @staticmethod
+    def _file_version(path: str) -> str:
+        """Short content hash identifying a model file"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()[:16]
+    
+    def set_model(self, model, vectorizer, version: str):
+        """Swap in a trained model, dropping cached results and near-duplicate scores"""
+        self.model, self.vectorizer, self.model_version = model, vectorizer, version
+        if self.cache is not None:
+            self.cache.clear()
+        self.scorer = self._compile_scorer(model, vectorizer)
+        self.near_duplicates = self._new_near_duplicate_index()
+    
+    def cache_key(self, text: str, url: str = None, rule_pack: RulePack = None,
+                  score_only: bool = False) -> str:
+        """
+        Result cache key for cleaned text
+        
+        Covers everything the result depends on: the text, URL, model and rule
+        pack versions, the score thresholds and the cascade band. Score-only
+        results are cached under their own keys.
+        """
+        rule_pack = rule_pack or self.rule_pack
+        thresholds = f"{settings.SCAM_THRESHOLD_HIGH}/{settings.SCAM_THRESHOLD_MEDIUM}"
+        cascade = f"{settings.CASCADE_LOW}/{settings.CASCADE_HIGH}" if settings.CASCADE_ENABLED else "off"
+        mode = ("score",) if score_only else ()
+        return content_key(text, url, self.model_version, rule_pack.version, thresholds, cascade, *mode)
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
         return self.model is not None
     
-    def analyze(self, text: str, url: str = None) -> Dict:
+    def analyze(self, text: str, url: str = None, offset_map: OffsetMap = None,
+                score_only: bool = False) -> Dict:
         """
         Analyze job posting text for scam indicators
         
+        Args:
+            text: Job posting text (usually TextProcessor.clean_text output)
+            url: Job posting URL (optional)
+            offset_map: Maps offsets in `text` back to the caller's raw text,
+                from TextProcessor.clean_text_with_offsets (optional)
+            score_only: Return only prediction, score and confidence, skipping
+                keyword features, flags, highlights, explanation and advice
+                (the score is the same as in a full analysis)
+        
         Returns:
             Dict with prediction, score, flags, explanation, etc.
         """
-        # Extract features
-        features = self.feature_extractor.extract(text, url)
+        # Pin the rule pack so a concurrent reload can't mix two snapshots
+        rule_pack = self.rule_pack
         
-        # Apply rule-based detection
-        rule_results = self.rule_engine.evaluate(text, features)
+        # Reposts and repeat lookups of the same text skip analysis entirely
+        key = None
+        if self.cache is not None:
+            key = self.cache_key(text, url, rule_pack, score_only)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._map_offsets(cached, offset_map)
         
-        # Get ML prediction if model is loaded
-        ml_score = 0.5  # Default neutral score
-        if self.model and self.vectorizer:
+        if self._is_long(text):
+            result = self._analyze_long(text, url, rule_pack, score_only)
+        else:
+            clock = StageClock()
+            # Lowercasing, tokens and prefilter hits are computed once for both stages
+            context = rule_pack.context(text, url)
+            clock.lap('context')
+            
+            # Extract features
+            features = self._extract(rule_pack, text, url, context, score_only)
+            clock.lap('extract_features')
+            
+            # Apply rule-based detection
+            rule_results = rule_pack.rule_engine.evaluate(text, features, context, early_stop=score_only)
+            clock.lap('evaluate_rules')
+            
+            # Get ML prediction if model is loaded and the rules were not decisive
+            ml_score = near_duplicate = None
+            if self._needs_ml(rule_results['score']):
+                (ml_score,), (near_duplicate,) = self._ml_scores_with_neighbours([text])
+            
+            result = self._build_result(text, features, rule_results, ml_score, score_only, near_duplicate)
+            self._submit_shadow(text, [text], rule_results['score'], ml_score)
+        
+        if key is not None:
+            self.cache.put(key, result)
+        return self._map_offsets(result, offset_map)
+    
+    def analyze_batch(self, texts: List[str], urls: List[Optional[str]] = None,
+                      offset_maps: List[Optional[OffsetMap]] = None, score_only: bool = False) -> List[Dict]:
+        """
+        Analyze many job postings at once
+        
+        Features and rules run once per pattern over the whole batch, and the
+        vectorizer and model are called once for all texts.
+        
+        Args:
+            texts: Job posting texts
+            urls: Job posting URLs, aligned with texts (optional)
+            offset_maps: Offset maps, aligned with texts (optional)
+            score_only: Score-only results (see analyze())
+        
+        Returns:
+            One analyze() result per text, in order
+        """
+        rule_pack = self.rule_pack
+        texts = list(texts)
+        urls = [None] * len(texts) if urls is None else list(urls)
+        offset_maps = [None] * len(texts) if offset_maps is None else list(offset_maps)
+        if not (len(texts) == len(urls) == len(offset_maps)):
+            raise ValueError("texts, urls and offset_maps must have the same length")
+        
+        results = [None] * len(texts)
+        keys = [None] * len(texts)
+        if self.cache is not None:
+            for index, (text, url) in enumerate(zip(texts, urls)):
+                keys[index] = self.cache_key(text, url, rule_pack, score_only)
+                results[index] = self.cache.get(keys[index])
+        
+        # Long postings are scored chunk by chunk on their own
+        for index, result in enumerate(results):
+            if result is None and self._is_long(texts[index]):
+                results[index] = self._analyze_long(texts[index], urls[index], rule_pack, score_only)
+                if keys[index] is not None:
+                    self.cache.put(keys[index], results[index])
+        
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            miss_texts = [texts[index] for index in missing]
+            miss_urls = [urls[index] for index in missing]
+            
+            extractor = rule_pack.feature_extractor
+            clock = StageClock(len(miss_texts))
+            contexts = [rule_pack.context(text, url) for text, url in zip(miss_texts, miss_urls)]
+            clock.lap('context')
+            if score_only:
+                features = [
+                    extractor.extract_score_features(text, url, context)
+                    for text, url, context in zip(miss_texts, miss_urls, contexts)
+                ]
+            else:
+                matrix = extractor.extract_batch(miss_texts, miss_urls, contexts)
+                features = [extractor.to_dict(row) for row in matrix]
+            clock.lap('extract_features')
+            
+            rule_results = rule_pack.rule_engine.evaluate_batch(
+                miss_texts, features, contexts, early_stop=score_only
+            )
+            clock.lap('evaluate_rules')
+            ml_scores = [None] * len(miss_texts)
+            near_duplicates = [None] * len(miss_texts)
+            uncertain = [i for i, rules in enumerate(rule_results) if self._needs_ml(rules['score'])]
+            if uncertain:
+                scores, similarities = self._ml_scores_with_neighbours([miss_texts[i] for i in uncertain])
+                for i, score, similarity in zip(uncertain, scores, similarities):
+                    ml_scores[i] = score
+                    near_duplicates[i] = similarity
+            
+            for index, item, near_duplicate in zip(
+                missing, zip(miss_texts, features, rule_results, ml_scores), near_duplicates
+            ):
+                results[index] = self._build_result(*item, score_only, near_duplicate)
+                text, _, rules, ml_score = item
+                self._submit_shadow(text, [text], rules['score'], ml_score)
+                if keys[index] is not None:
+                    self.cache.put(keys[index], results[index])
+        
+        return [
+            self._map_offsets(result, offset_map)
+            for result, offset_map in zip(results, offset_maps)
+        ]
+    
+    def _is_long(self, text: str) -> bool:
+        """Whether a text is long enough to be scored in chunks"""
+        return 0 < settings.LONG_TEXT_THRESHOLD < len(text)
+    
+    def _analyze_long(self, text: str, url: Optional[str], rule_pack: RulePack,
+                      score_only: bool = False) -> Dict:
+        """
+        Analyze a text longer than LONG_TEXT_THRESHOLD in chunks
+        
+        Only the first LONG_TEXT_MAX_CHARS characters are scored, in chunks of
+        at most LONG_TEXT_CHUNK_SIZE split at sentence breaks, so regex cost
+        and vectorizer input stay proportional to the text and bounded. Rules
+        flag the text when they match any chunk, features are merged across
+        chunks, and the ML score is that of the most suspicious chunk.
+        """
+        scored = self.text_processor.truncate_text(text, settings.LONG_TEXT_MAX_CHARS)
+        extractor = rule_pack.feature_extractor
+        
+        clock = StageClock()
+        chunks, chunk_features = [], []
+        for offset, chunk in self.text_processor.split_chunks(scored, settings.LONG_TEXT_CHUNK_SIZE):
+            context = rule_pack.context(chunk, url)
+            chunks.append((offset, context))
+            chunk_features.append(self._extract(rule_pack, chunk, url, context, score_only))
+        
+        features = extractor.merge(chunk_features)
+        clock.lap('extract_features')  # Includes chunking and chunk contexts
+        rule_results = rule_pack.rule_engine.evaluate_chunks(chunks, features, early_stop=score_only)
+        clock.lap('evaluate_rules')
+        
+        chunk_texts = [context.text for _, context in chunks]
+        ml_score = near_duplicate = None
+        if self._needs_ml(rule_results['score']):
+            # The posting's score is that of its most suspicious chunk
+            scores, similarities = self._ml_scores_with_neighbours(chunk_texts)
+            ml_score, near_duplicate = max(zip(scores, similarities), key=lambda pair: pair[0])
+        
+        result = self._build_result(text, features, rule_results, ml_score, score_only, near_duplicate)
+        self._submit_shadow(text, chunk_texts, rule_results['score'], ml_score)
+        if len(text) > settings.LONG_TEXT_MAX_CHARS and not score_only:
+            result['explanation'] += (
+                f"Only the first {settings.LONG_TEXT_MAX_CHARS} characters of this long posting were analyzed. "
+            )
+        return result
+    
+    @staticmethod
+    def _extract(rule_pack: RulePack, text: str, url: Optional[str], context, score_only: bool) -> Dict:
+        """Features of one text: all of them, or only those the rule score uses"""
+        if score_only:
+            return rule_pack.feature_extractor.extract_score_features(text, url, context)
+        return rule_pack.feature_extractor.extract(text, url, context)
+    
+    def _needs_ml(self, rule_score: float) -> bool:
+        """
+        Whether the ML model should score a posting with this rule score
+        
+        With CASCADE_ENABLED, rule scores at or below CASCADE_LOW (clean) or at
+        or above CASCADE_HIGH (saturated) are decisive on their own; only the
+        band in between goes to the model.
+        """
+        if not settings.CASCADE_ENABLED:
+            return True
+        return settings.CASCADE_LOW < rule_score < settings.CASCADE_HIGH
+    
+    def _ml_scores(self, texts: List[str]) -> List[float]:
+        """Scam probability per text from one vectorizer/model call (0.5 without a model)"""
+        return self._ml_scores_with_neighbours(texts)[0]
+    
+    def _ml_scores_with_neighbours(self, texts: List[str]) -> Tuple[List[float], List[Optional[float]]]:
+        """
+        ML scores as in _ml_scores, plus the near-duplicate similarity per text
+        
+        Texts with a near-duplicate in the index reuse its stored score
+        (NEAR_DUPLICATE_MODE=reuse) or average it with the model's
+        (NEAR_DUPLICATE_MODE=blend).
+        
+        Returns:
+            (scores, similarity of the stored posting used, or None, per text)
+        """
+        no_neighbours = [None] * len(texts)
+        if not (self.model and self.vectorizer):
+            return [0.5] * len(texts), no_neighbours  # Default neutral score
+        
+        index = self.near_duplicates
+        reuse = settings.NEAR_DUPLICATE_MODE == 'reuse'
+        fingerprints = [simhash(text) for text in texts] if index is not None else [None] * len(texts)
+        neighbours = [
+            index.lookup(fingerprint) if fingerprint is not None else None
+            for fingerprint in fingerprints
+        ]
+        
+        scores = [None] * len(texts)
+        to_score = [i for i, neighbour in enumerate(neighbours) if not (reuse and neighbour)]
+        if to_score:
             try:
-                text_vector = self.vectorizer.transform([text])
-                ml_proba = self.model.predict_proba(text_vector)[0]
-                ml_score = ml_proba[1]  # Probability of scam
+                to_score_texts = [texts[i] for i in to_score]
+                clock = StageClock(len(to_score_texts))
+                if isinstance(self.scorer, CompiledLinearScorer):
+                    # Counts terms and applies weights in one pass, with no separate vectorize step
+                    probabilities = self.scorer.predict_proba(to_score_texts)
+                else:
+                    text_vectors = self.vectorizer.transform(to_score_texts)
+                    clock.lap('vectorize')
+                    if self.scorer is not None:
+                        probabilities = self.scorer.predict_proba_matrix(text_vectors)
+                    else:
+                        probabilities = self.model.predict_proba(text_vectors)[:, 1]  # Probability of scam
+                clock.lap('predict_proba')
             except Exception as e:
                 logger.error(f"ML prediction error: {e}")
+                return [0.5] * len(texts), no_neighbours
+            
+            for i, probability in zip(to_score, probabilities):
+                scores[i] = probability
+                if fingerprints[i] is not None:
+                    index.add(fingerprints[i], probability)
         
+        for i, neighbour in enumerate(neighbours):
+            if neighbour is None:
+                continue
+            _, stored = neighbour
+            if reuse:
+                scores[i] = stored
+            else:
+                weight = settings.NEAR_DUPLICATE_BLEND_WEIGHT
+                scores[i] = (1 - weight) * scores[i] + weight * stored
+        
+        similarities = [neighbour[0] if neighbour else None for neighbour in neighbours]
+        return scores, similarities
+    
+    def _build_result(self, text: str, features: Dict, rule_results: Dict,
+                      ml_score: Optional[float], score_only: bool = False,
+                      near_duplicate: Optional[float] = None) -> Dict:
+        """
+        Assemble the response for one posting, with offsets into `text`
+        
+        near_duplicate is the similarity of the stored posting whose ML score
+        was reused or blended in (None if the model scored the posting itself).
+        """
+        clock = StageClock()
         # Combine ML and rule-based scores
         combined_score = self._combine_scores(ml_score, rule_results['score'])
         
@@ -75,6 +582,10 @@ class JobScamDetector:
         
         # Determine prediction category
         prediction = self._get_prediction_label(combined_score)
+        confidence = float(abs(combined_score - 0.5) * 2)  # 0 to 1
+        
+        if score_only:
+            return {"prediction": prediction, "score": trust_score, "confidence": confidence}
         
         # Generate highlighted phrases
         highlighted = self._highlight_risky_phrases(text, rule_results['matched_patterns'])
@@ -88,6 +599,7 @@ class JobScamDetector:
         
         # Generate advice
         advice = self._generate_advice(combined_score, features)
+        clock.lap('explain')
         
         return {
             "prediction": prediction,
@@ -96,16 +608,22 @@ class JobScamDetector:
             "highlighted_phrases": highlighted,
             "explanation": explanation,
             "advice": advice,
-            "confidence": abs(combined_score - 0.5) * 2  # 0 to 1
+            "confidence": confidence,
+            "near_duplicate": near_duplicate
         }
     
-    def _combine_scores(self, ml_score: float, rule_score: float) -> float:
-        """Combine ML and rule-based scores"""
+    def _combine_scores(self, ml_score: Optional[float], rule_score: float) -> float:
+        """Combine ML and rule-based scores (ml_score is None when the cascade skipped ML)"""
         # Weight: 60% ML, 40% rules if model exists, otherwise 100% rules
-        if self.model:
-            return 0.6 * ml_score + 0.4 * rule_score
+        if self.model and ml_score is not None:
+            return self._blend_scores(ml_score, rule_score)
         return rule_score
     
+    @staticmethod
+    def _blend_scores(ml_score: float, rule_score: float) -> float:
+        """Combined score of a posting the ML model scored"""
+        return 0.6 * ml_score + 0.4 * rule_score
+    
     def _get_prediction_label(self, score: float) -> str:
         """Convert score to prediction label"""
         if score >= settings.SCAM_THRESHOLD_HIGH:
@@ -123,11 +641,31 @@ class JobScamDetector:
             highlighted.append({
                 "text": pattern['match'],
                 "risk_level": pattern['risk_level'],
-                "reason": pattern['reason']
+                "reason": pattern['reason'],
+                "start": pattern['start'],
+                "end": pattern['end']
             })
         
         return highlighted[:10]  # Limit to top 10
     
+    def _map_offsets(self, result: Dict, offset_map: OffsetMap = None) -> Dict:
+        """Copy of a (possibly cached) result with highlight offsets into the raw text"""
+        if 'highlighted_phrases' not in result:
+            return dict(result)  # Score-only
+        highlighted = []
+        for phrase in result['highlighted_phrases']:
+            phrase = dict(phrase)
+            if offset_map is not None:
+                phrase['start'], phrase['end'] = offset_map.to_original(phrase['start'], phrase['end'])
+            highlighted.append(phrase)
+        
+        return dict(
+            result,
+            flags=list(result['flags']),
+            advice=list(result['advice']),
+            highlighted_phrases=highlighted
+        )
+    
     def _generate_explanation(self, score: float, flags: List[str], features: Dict) -> str:
         """Generate natural language explanation"""
         if score >= settings.SCAM_THRESHOLD_HIGH:
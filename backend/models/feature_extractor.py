@@ -3,8 +3,21 @@ Feature Extractor for Job Scam Detection
 Extracts numerical and categorical features from job posting text
 """
 import re
-from typing import Dict
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
 import validators
+from backend.config import settings
+from backend.utils.analysis_context import AnalysisContext, TextBatch
+from backend.utils.literal_index import LiteralIndex
+from backend.utils.match_stats import MatchStats, feature_stats
+from backend.utils.patterns import CompiledPattern, deadline_passed, match_deadline, resolve_engine
+
+logger = logging.getLogger(__name__)
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b')
 
 
 class FeatureExtractor:
@@ -56,7 +69,43 @@ class FeatureExtractor:
         r'itunes.*card', r'prepaid card'
     ]
     
-    def __init__(self):
+    # Feature names backed by a keyword table (rule packs may replace these)
+    KEYWORD_TABLES = (
+        'requires_payment', 'unrealistic_salary', 'urgency', 'no_interview',
+        'poor_grammar', 'whatsapp_only', 'crypto_mention', 'gift_cards'
+    )
+    
+    # Columns of extract_batch(), in the key order of extract()
+    FEATURE_NAMES = KEYWORD_TABLES + (
+        'text_length', 'word_count', 'has_email', 'has_phone', 'generic_email',
+        'missing_company_name', 'excessive_caps', 'url_suspicious'
+    )
+    
+    # Features that are counts rather than booleans
+    NUMERIC_FEATURES = ('text_length', 'word_count')
+    
+    # Features the rule score depends on (see ScamRuleEngine.FEATURE_WEIGHTS)
+    SCORE_FEATURES = ('missing_company_name', 'url_suspicious')
+    
+    def __init__(self, keywords: Dict[str, List[str]] = None, match_window: int = None,
+                 regex_engine: str = None, time_budget_ms: float = None,
+                 stats: MatchStats = None):
+        """
+        Args:
+            keywords: Pattern lists replacing the built-in table of the same
+                feature name, e.g. {'urgency': [...]}
+            match_window: Cap for ".*" spans in characters (default: settings)
+            regex_engine: "re" or "re2" (default: settings)
+            time_budget_ms: Regex time per extraction before the remaining
+                pattern groups are skipped (default: settings, 0 = no budget)
+            stats: Counters for per-group timing and hits (default: shared
+                feature_stats, only collected while stats.enabled)
+        """
+        self.match_window = settings.RULE_MATCH_WINDOW if match_window is None else match_window
+        self.regex_engine = resolve_engine(regex_engine or settings.RULE_REGEX_ENGINE)
+        self.time_budget_ms = settings.RULE_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+        self.stats = feature_stats if stats is None else stats
+        
         self.patterns = {
             'requires_payment': self.PAYMENT_KEYWORDS,
             'unrealistic_salary': self.UNREALISTIC_SALARY,
@@ -67,68 +116,281 @@ class FeatureExtractor:
             'crypto_mention': self.CRYPTO_KEYWORDS,
             'gift_cards': self.GIFT_CARD_KEYWORDS
         }
+        
+        for name, patterns in (keywords or {}).items():
+            if name not in self.patterns:
+                raise ValueError(f"Unknown keyword table {name!r}")
+            self.patterns[name] = list(patterns)
+        
+        # Skip patterns whose required keywords are absent from the text
+        self.prefilter = True
+        
+        # Precompile every group and index the literals each regex requires
+        self._compiled = {
+            name: [
+                CompiledPattern(pattern, self.match_window, self.regex_engine)
+                for pattern in patterns
+            ]
+            for name, patterns in self.patterns.items()
+        }
+        self._literal_index = LiteralIndex(
+            literal
+            for group in self._compiled.values()
+            for compiled in group if compiled.anchors
+            for literal in compiled.anchors
+        )
+        
+        # Column of each literal in the batch presence matrix, and the columns
+        # each pattern needs (None = no anchor, always searched)
+        self._literal_columns = {
+            literal: index for index, literal in enumerate(sorted(self._literal_index.literals))
+        }
+        self._batch_anchors = {
+            name: [
+                (compiled, None if compiled.anchors is None else
+                 [self._literal_columns[literal] for literal in sorted(compiled.anchors)])
+                for compiled in group
+            ]
+            for name, group in self._compiled.items()
+        }
     
-    def extract(self, text: str, url: str = None) -> Dict:
+    def extract(self, text: str, url: str = None, context: AnalysisContext = None) -> Dict:
         """
         Extract all features from job posting text
         
+        Args:
+            text: Job posting text
+            url: Job posting URL (optional)
+            context: Shared per-request context for `text` (optional)
+        
         Returns:
             Dict of boolean and numerical features
         """
-        text_lower = text.lower()
+        if context is None:
+            context = AnalysisContext(text, url)
+        found = context.found_literals(self._literal_index) if self.prefilter else None
+        
+        deadline = match_deadline(self.time_budget_ms)
+        skipped = []
+        samples = [] if self.stats.enabled else None
+        
+        def check(name):
+            if deadline_passed(deadline):
+                skipped.append(name)
+                return False
+            if samples is not None:
+                start = time.perf_counter_ns()
+            # poor_grammar looks for capitals, so it runs on the original text
+            hit = self._check_patterns(context, self._compiled[name], found, name == 'poor_grammar')
+            if samples is not None:
+                samples.append((name, hit, time.perf_counter_ns() - start))
+            return hit
         
         features = {
             # Pattern-based boolean features
-            'requires_payment': self._check_patterns(text_lower, self.PAYMENT_KEYWORDS),
-            'unrealistic_salary': self._check_patterns(text_lower, self.UNREALISTIC_SALARY),
-            'urgency': self._check_patterns(text_lower, self.URGENCY_KEYWORDS),
-            'no_interview': self._check_patterns(text_lower, self.NO_INTERVIEW),
-            'poor_grammar': self._check_patterns(text, self.POOR_GRAMMAR_INDICATORS),
-            'whatsapp_only': self._check_patterns(text_lower, self.WHATSAPP_ONLY),
-            'crypto_mention': self._check_patterns(text_lower, self.CRYPTO_KEYWORDS),
-            'gift_cards': self._check_patterns(text_lower, self.GIFT_CARD_KEYWORDS),
+            'requires_payment': check('requires_payment'),
+            'unrealistic_salary': check('unrealistic_salary'),
+            'urgency': check('urgency'),
+            'no_interview': check('no_interview'),
+            'poor_grammar': check('poor_grammar'),
+            'whatsapp_only': check('whatsapp_only'),
+            'crypto_mention': check('crypto_mention'),
+            'gift_cards': check('gift_cards'),
             
             # Text statistics
             'text_length': len(text),
-            'word_count': len(text.split()),
-            'has_email': bool(re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)),
-            'has_phone': bool(re.search(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', text)),
-            'generic_email': self._has_generic_email(text),
-            'missing_company_name': not self._has_company_name(text),
-            'excessive_caps': self._count_caps_words(text) > 3,
+            'word_count': len(context.tokens),
+            'has_email': bool(EMAIL_PATTERN.search(text)),
+            'has_phone': bool(PHONE_PATTERN.search(text)),
+            'generic_email': self._has_generic_email(context.text_lower),
+            'missing_company_name': not self._has_company_name(context.text_lower),
+            'excessive_caps': self._count_caps_words(context.tokens) > 3,
             
             # URL-based features
             'url_suspicious': self._check_url_suspicious(url) if url else False,
         }
         
+        if samples:
+            self.stats.record(samples)
+        
+        if skipped:
+            logger.warning(
+                f"Feature extraction exceeded {self.time_budget_ms} ms on {len(text)} chars; "
+                f"skipped {', '.join(skipped)}"
+            )
+        
         return features
     
-    def _check_patterns(self, text: str, patterns: list) -> bool:
-        """Check if any pattern matches in text"""
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+    def extract_score_features(self, text: str, url: str = None, context: AnalysisContext = None) -> Dict:
+        """
+        Only the SCORE_FEATURES of extract(), for score-only analysis
+        
+        None of the keyword patterns run, since only explanations and advice
+        use them.
+        """
+        if context is None:
+            context = AnalysisContext(text, url)
+        return {
+            'missing_company_name': not self._has_company_name(context.text_lower),
+            'url_suspicious': self._check_url_suspicious(url) if url else False,
+        }
+    
+    def extract_batch(self, texts: Iterable[str], urls: Iterable[Optional[str]] = None,
+                      contexts: List[AnalysisContext] = None, dtype=np.float32) -> np.ndarray:
+        """
+        Extract features for many texts at once
+        
+        Each pattern runs once over the whole batch (see TextBatch) rather
+        than once per text.
+        
+        Args:
+            texts: Job posting texts
+            urls: Job posting URLs, aligned with texts (optional)
+            contexts: Shared per-request contexts for texts (optional)
+            dtype: Matrix dtype
+        
+        Returns:
+            Matrix of shape (len(texts), len(FEATURE_NAMES)); row i equals
+            extract(texts[i], urls[i]) in FEATURE_NAMES order
+        """
+        texts = list(texts)
+        urls = [None] * len(texts) if urls is None else list(urls)
+        if len(urls) != len(texts):
+            raise ValueError(f"Got {len(urls)} urls for {len(texts)} texts")
+        if contexts is None:
+            contexts = [AnalysisContext(text, url) for text, url in zip(texts, urls)]
+        
+        count = len(texts)
+        matrix = np.zeros((count, len(self.FEATURE_NAMES)), dtype=dtype)
+        if not count:
+            return matrix
+        
+        batch = TextBatch(contexts)
+        present = self._literal_presence(contexts) if self.prefilter else None
+        
+        deadline = match_deadline(self.time_budget_ms * count)
+        skipped = []
+        samples = [] if self.stats.enabled else None
+        
+        for column, name in enumerate(self.KEYWORD_TABLES):
+            if deadline_passed(deadline):
+                skipped.append(name)
+                continue
+            if samples is not None:
+                start = time.perf_counter_ns()
+            hit = np.zeros(count, dtype=bool)
+            for compiled, anchor_columns in self._batch_anchors[name]:
+                possible = ~hit
+                if present is not None and anchor_columns is not None:
+                    possible &= present[:, anchor_columns].any(axis=1)
+                candidates = np.flatnonzero(possible).tolist()
+                if candidates:
+                    hit[batch.search(compiled, candidates, name == 'poor_grammar')] = True
+            matrix[:, column] = hit
+            if samples is not None:
+                # Spread the batch time evenly so per-evaluation means stay comparable
+                elapsed = (time.perf_counter_ns() - start) // count
+                samples.extend((name, value, elapsed) for value in hit.tolist())
+        
+        columns = {name: index for index, name in enumerate(self.FEATURE_NAMES)}
+        matrix[batch.search_regex(EMAIL_PATTERN), columns['has_email']] = 1
+        matrix[batch.search_regex(PHONE_PATTERN), columns['has_phone']] = 1
+        
+        statistics = [
+            (
+                len(text),
+                len(context.tokens),
+                self._has_generic_email(context.text_lower),
+                not self._has_company_name(context.text_lower),
+                self._count_caps_words(context.tokens) > 3,
+                self._check_url_suspicious(url) if url else False,
+            )
+            for text, url, context in zip(texts, urls, contexts)
+        ]
+        matrix[:, [
+            columns['text_length'], columns['word_count'], columns['generic_email'],
+            columns['missing_company_name'], columns['excessive_caps'], columns['url_suspicious']
+        ]] = statistics
+        
+        if samples:
+            self.stats.record(samples)
+        
+        if skipped:
+            logger.warning(
+                f"Batch feature extraction exceeded {self.time_budget_ms} ms per text on "
+                f"{count} texts; skipped {', '.join(skipped)}"
+            )
+        
+        return matrix
+    
+    def _literal_presence(self, contexts: List[AnalysisContext]) -> np.ndarray:
+        """Boolean (texts x indexed literals) matrix; rows needing exact case are all True"""
+        present = np.zeros((len(contexts), len(self._literal_columns)), dtype=bool)
+        for row, context in enumerate(contexts):
+            found = context.found_literals(self._literal_index)
+            if found is None:
+                present[row] = True
+                continue
+            for literal in found:
+                column = self._literal_columns.get(literal)
+                if column is not None:
+                    present[row, column] = True
+        return present
+    
+    def to_dict(self, row: np.ndarray) -> Dict:
+        """Convert an extract_batch() row back to the extract() dict"""
+        return {
+            name: int(value) if name in self.NUMERIC_FEATURES else bool(value)
+            for name, value in zip(self.FEATURE_NAMES, row.tolist())
+        }
+    
+    def merge(self, chunk_features: List[Dict]) -> Dict:
+        """
+        Features of a text from the extract() output of its chunks
+        
+        Counts add up and indicators are set when any chunk has them, except
+        missing_company_name, which needs every chunk to lack a company name.
+        Chunks may also be extract_score_features() output.
+        """
+        merged = {}
+        for name in self.FEATURE_NAMES:
+            if chunk_features and name not in chunk_features[0]:
+                continue
+            values = [features[name] for features in chunk_features]
+            if name in self.NUMERIC_FEATURES:
+                merged[name] = sum(values)
+            elif name == 'missing_company_name':
+                merged[name] = all(values)
+            else:
+                merged[name] = any(values)
+        return merged
+
+    def _check_patterns(self, context: AnalysisContext, patterns: List[CompiledPattern],
+                        found: Optional[Set[str]], original_case: bool = False) -> bool:
+        """Check if any pattern matches (in lowercased text unless original_case)"""
+        for compiled in patterns:
+            if compiled.could_match(found) and context.search(compiled, original_case):
                 return True
         return False
     
-    def _has_generic_email(self, text: str) -> bool:
+    def _has_generic_email(self, text_lower: str) -> bool:
         """Check for generic email domains"""
         generic_domains = ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com']
         for domain in generic_domains:
-            if domain in text.lower():
+            if domain in text_lower:
                 return True
         return False
     
-    def _has_company_name(self, text: str) -> bool:
+    def _has_company_name(self, text_lower: str) -> bool:
         """Simple check for company name presence"""
         company_indicators = ['company', 'inc', 'ltd', 'llc', 'corp', 'pvt']
         for indicator in company_indicators:
-            if indicator in text.lower():
+            if indicator in text_lower:
                 return True
         return False
     
-    def _count_caps_words(self, text: str) -> int:
+    def _count_caps_words(self, words: List[str]) -> int:
         """Count words in all caps"""
-        words = text.split()
         caps_words = [w for w in words if w.isupper() and len(w) > 2]
         return len(caps_words)
     
@@ -0,0 +1,213 @@
+"""
+Flat Forest Evaluator
+Random forest trees flattened into contiguous arrays and evaluated for a
+whole batch of sparse TF-IDF rows with vectorized traversal
+"""
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows densified at once (only the columns the forest splits on)
+CHUNK_ROWS = 256
+
+# Traversal steps between removing cursors that reached a leaf
+COMPACT_EVERY = 6
+
+
+class FlatForest:
+    """
+    Binary RandomForestClassifier as node arrays
+
+    All trees share one set of arrays: split column, threshold, the two
+    children of each node interleaved (global node ids) and class
+    probabilities per node. Every (row, tree) cursor steps down with one
+    gather per array; leaves point to themselves, and cursors that reached
+    one are dropped from the active set every few steps. Probabilities equal predict_proba exactly:
+    features are compared as float32 against float64 thresholds like
+    sklearn, and per-tree probabilities are summed in estimator order.
+    """
+
+    def __init__(self, forest):
+        """
+        Args:
+            forest: Fitted binary RandomForestClassifier
+
+        Raises:
+            ValueError: if the forest is not a fitted binary classifier
+        """
+        estimators = getattr(forest, 'estimators_', None)
+        if type(forest).__name__ != 'RandomForestClassifier' or not estimators:
+            raise ValueError(f"Only fitted RandomForestClassifier can be flattened, got {type(forest).__name__}")
+        if forest.n_outputs_ != 1 or len(forest.classes_) != 2:
+            raise ValueError("Only single-output binary forests can be flattened")
+
+        trees = [estimator.tree_ for estimator in estimators]
+        sizes = [tree.node_count for tree in trees]
+        self.roots = np.cumsum([0] + sizes[:-1]).astype(np.int32)
+        self.max_depth = max(tree.max_depth for tree in trees)
+        self.n_features = forest.n_features_in_
+
+        features, thresholds, children, leaves, values = [], [], [], [], []
+        for root, tree in zip(self.roots, trees):
+            leaf = tree.children_left == -1
+            own = np.arange(root, root + tree.node_count, dtype=np.int32)
+            children.append(np.column_stack([
+                np.where(leaf, own, tree.children_left + root),
+                np.where(leaf, own, tree.children_right + root),
+            ]).astype(np.int32))
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            leaves.append(leaf)
+
+            values.append(self._class_fractions(tree.value[:, 0, :]))
+
+        # Only columns some tree splits on are densified
+        features = np.concatenate(features)
+        self.columns, local = np.unique(features, return_inverse=True)
+        self.feature = local.astype(np.int32)
+        self.threshold = np.concatenate(thresholds)
+        self.children = np.concatenate(children).ravel()  # left of n at 2n, right at 2n + 1
+        self.is_leaf = np.concatenate(leaves)
+        self.value = np.concatenate(values)
+
+        self._column_map = np.full(self.n_features, -1, dtype=np.int32)
+        self._column_map[self.columns] = np.arange(len(self.columns), dtype=np.int32)
+
+    @staticmethod
+    def _class_fractions(value: np.ndarray) -> np.ndarray:
+        """Per-node class probabilities, computed the way tree.predict_proba does"""
+        from sklearn import __version__ as sklearn_version
+        from sklearn.utils.fixes import parse_version
+
+        # sklearn >= 1.4 stores fractions; older versions store weighted counts
+        # and normalize them at prediction time
+        if parse_version(sklearn_version) >= parse_version("1.4"):
+            return value
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        return value / normalizer
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the node and column arrays"""
+        return sum(array.nbytes for array in (
+            self.roots, self.columns, self.feature, self.threshold,
+            self.children, self.is_leaf, self.value, self._column_map
+        ))
+
+    def _dense_columns(self, X) -> np.ndarray:
+        """Rows of CSR matrix X restricted to the split columns, as float32"""
+        dense = np.zeros((X.shape[0], len(self.columns)), dtype=np.float32)
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        columns = self._column_map[X.indices]
+        used = columns >= 0
+        dense[rows[used], columns[used]] = X.data[used]
+        return dense
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for a CSR matrix, like RandomForestClassifier.predict_proba
+
+        Returns:
+            Array of shape (n_rows, 2)
+        """
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, forest expects {self.n_features}")
+        X = X.tocsr()
+        proba = np.empty((X.shape[0], 2))
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            proba[start:start + CHUNK_ROWS] = self._predict_chunk(X[start:start + CHUNK_ROWS])
+        return proba
+
+    def _predict_chunk(self, X) -> np.ndarray:
+        rows, trees = X.shape[0], len(self.roots)
+        dense = self._dense_columns(X).ravel()
+
+        # One cursor per (row, tree); `offsets` is the row's start in `dense`
+        leaves = np.broadcast_to(self.roots, (rows, trees)).ravel().astype(np.intp)
+        active = np.flatnonzero(~self.is_leaf[leaves])
+        nodes = leaves[active]
+        offsets = active // trees * len(self.columns)
+        for step in range(1, self.max_depth + 1):
+            go_right = dense[offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+            # Leaves point to themselves, so finished cursors are only dropped now and then
+            if step % COMPACT_EVERY == 0 or step == self.max_depth:
+                done = self.is_leaf[nodes]
+                leaves[active[done]] = nodes[done]
+                keep = ~done
+                active, nodes, offsets = active[keep], nodes[keep], offsets[keep]
+                if not len(active):
+                    break
+
+        # Sum trees in estimator order like sklearn, then average
+        leaf_values = self.value[leaves.reshape(rows, trees)]
+        total = np.zeros((rows, 2))
+        for tree in range(trees):
+            total += leaf_values[:, tree]
+        return total / trees
+
+
+def _voting_weights(model) -> Optional[List[float]]:
+    """Weights of the fitted members of a VotingClassifier, skipping dropped estimators"""
+    if model.weights is None:
+        return None
+    return [
+        weight for (_, estimator), weight in zip(model.estimators, model.weights)
+        if estimator != 'drop'
+    ]
+
+
+class CompiledForestScorer:
+    """
+    Scam probability from a forest, or a soft-voting ensemble containing
+    forests, with the forests evaluated by FlatForest
+
+    Other ensemble members (e.g. logistic regression) keep their own
+    predict_proba on the same TF-IDF matrix, and member probabilities are
+    averaged like VotingClassifier(voting='soft').
+    """
+
+    def __init__(self, model, vectorizer):
+        """
+        Args:
+            model: Fitted RandomForestClassifier or soft VotingClassifier
+            vectorizer: Fitted vectorizer with transform()
+
+        Raises:
+            ValueError: if the model contains no forest to flatten
+        """
+        name = type(model).__name__
+        if name == 'RandomForestClassifier':
+            self.members = [FlatForest(model)]
+            self.weights = None
+        elif name == 'VotingClassifier' and getattr(model, 'voting', None) == 'soft':
+            self.members = [
+                FlatForest(member) if type(member).__name__ == 'RandomForestClassifier' else member
+                for member in model.estimators_
+            ]
+            self.weights = _voting_weights(model)
+        else:
+            raise ValueError(f"No random forest to flatten in {name}")
+        if not any(isinstance(member, FlatForest) for member in self.members):
+            raise ValueError(f"No random forest to flatten in {name}")
+        self.vectorizer = vectorizer
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the flattened forests"""
+        return sum(member.nbytes for member in self.members if isinstance(member, FlatForest))
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Scam probability per posting, like model.predict_proba(vectorizer.transform(texts))[:, 1]"""
+        return self.predict_proba_matrix(self.vectorizer.transform(texts))
+
+    def predict_proba_matrix(self, X) -> np.ndarray:
+        """Scam probability per row of an already vectorized matrix"""
+        if len(self.members) == 1:
+            return self.members[0].predict_proba(X)[:, 1]
+        probabilities = np.asarray([member.predict_proba(X) for member in self.members])
+        return np.average(probabilities, axis=0, weights=self.weights)[:, 1]
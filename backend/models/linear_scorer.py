@@ -0,0 +1,123 @@
+"""
+Compiled Linear Scorer
+Scores postings with a trained TF-IDF vectorizer and binary linear model
+without sklearn's per-call validation and sparse matrix construction
+"""
+import math
+import logging
+from collections import Counter
+from itertools import chain
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledLinearScorer:
+    """
+    TF-IDF + logistic regression reduced to a vocabulary dict and two arrays
+
+    Per posting: n-grams of the tokens from the vectorizer's own preprocessor
+    and tokenizer are counted by vocabulary index, weighted by IDF,
+    normalized, dotted with the float32 coefficients and passed through a
+    sigmoid. The result matches predict_proba(...)[:, 1] to float32 precision.
+    """
+
+    def __init__(self, model, vectorizer):
+        """
+        Args:
+            model: Fitted binary LogisticRegression
+            vectorizer: Fitted TfidfVectorizer
+
+        Raises:
+            ValueError: if the model or vectorizer cannot be compiled
+        """
+        coef = getattr(model, 'coef_', None)
+        if type(model).__name__ != 'LogisticRegression' or coef is None or coef.shape[0] != 1:
+            raise ValueError(f"Only binary LogisticRegression can be compiled, got {type(model).__name__}")
+        if not hasattr(vectorizer, 'build_analyzer') or not hasattr(vectorizer, 'vocabulary_'):
+            raise ValueError(f"Only fitted TfidfVectorizer can be compiled, got {type(vectorizer).__name__}")
+        if vectorizer.norm not in ('l1', 'l2', None):
+            raise ValueError(f"Unsupported norm {vectorizer.norm!r}")
+
+        self.vocabulary: Dict[str, int] = dict(vectorizer.vocabulary_)
+        self.analyzer = vectorizer.build_analyzer()
+        self.tokenize = None
+        if vectorizer.analyzer == 'word':
+            # Same steps as the word analyzer, with n-grams joined lazily
+            preprocess, tokenize = vectorizer.build_preprocessor(), vectorizer.build_tokenizer()
+            stop_words = vectorizer.get_stop_words()
+            if stop_words:
+                self.tokenize = lambda text: [
+                    token for token in tokenize(preprocess(text)) if token not in stop_words
+                ]
+            else:
+                self.tokenize = lambda text: tokenize(preprocess(text))
+            self.min_n, self.max_n = vectorizer.ngram_range
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.norm = vectorizer.norm
+        self.idf = (
+            np.ascontiguousarray(vectorizer.idf_, dtype=np.float64) if vectorizer.use_idf
+            else np.ones(len(self.vocabulary))
+        )
+        self.coef = np.ascontiguousarray(coef[0], dtype=np.float32)
+        self.intercept = float(model.intercept_[0])
+
+        # Binary multinomial models use softmax([-d, d]), which is sigmoid(2d).
+        # multi_class is deprecated in newer sklearn, where binary models are sigmoid(d)
+        self.scale = 2.0 if getattr(model, 'multi_class', 'auto') == 'multinomial' else 1.0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the IDF and coefficient arrays"""
+        return self.idf.nbytes + self.coef.nbytes
+
+    def _count_terms(self, text: str) -> Dict[int, int]:
+        """Vocabulary index -> occurrences in the text"""
+        if self.tokenize is None:
+            terms = self.analyzer(text)
+        else:
+            tokens = self.tokenize(text)
+            terms = chain.from_iterable(
+                tokens if n == 1 else map(' '.join, zip(*(tokens[i:] for i in range(n))))
+                for n in range(self.min_n, self.max_n + 1)
+            )
+        # Lookups and counting stay in C; out-of-vocabulary terms count under None
+        counts = Counter(map(self.vocabulary.get, terms))
+        counts.pop(None, None)
+        return counts
+
+    def decision_function(self, text: str) -> float:
+        """Linear score of one posting (before the sigmoid)"""
+        counts = self._count_terms(text)
+        if not counts:
+            return self.intercept
+
+        indices = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        if self.binary:
+            weights = np.ones(len(counts))
+        else:
+            weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            if self.sublinear_tf:
+                weights = np.log(weights) + 1
+        weights *= self.idf[indices]
+
+        score = float(weights @ self.coef[indices])
+        if self.norm == 'l2':
+            norm = math.sqrt(float(weights @ weights))
+        elif self.norm == 'l1':
+            norm = float(np.abs(weights).sum())
+        else:
+            norm = 1.0
+        if norm:
+            score /= norm
+        return score + self.intercept
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Scam probability per posting, like model.predict_proba(vectorizer.transform(texts))[:, 1]"""
+        scores = np.fromiter(
+            (self.decision_function(text) for text in texts), dtype=np.float64, count=len(texts)
+        )
+        return 1.0 / (1.0 + np.exp(-self.scale * scores))
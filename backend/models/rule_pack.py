@@ -0,0 +1,216 @@
+"""
+Rule Packs
+Versioned rule and keyword tables loaded from JSON/YAML files and compiled
+into immutable snapshots that can be swapped into a running detector
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from typing import Callable, Dict, NamedTuple, Optional
+
+from backend.models.feature_extractor import FeatureExtractor
+from backend.models.rules import ScamRuleEngine
+from backend.utils.analysis_context import AnalysisContext
+from backend.utils.literal_index import LiteralIndex
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_VERSION = "builtin"
+RISK_LEVELS = ('high', 'medium', 'low')
+
+
+class RulePackError(ValueError):
+    """Raised when a rule pack cannot be read or fails validation"""
+
+
+class RulePack(NamedTuple):
+    """Compiled rule pack snapshot; never modified after construction"""
+    version: str
+    source: Optional[str]
+    feature_extractor: FeatureExtractor
+    rule_engine: ScamRuleEngine
+    # Literals of both engines, so one prefilter scan serves a whole request
+    literal_index: Optional[LiteralIndex] = None
+
+    def context(self, text: str, url: str = None) -> AnalysisContext:
+        """Per-request context shared by this pack's extractor and rule engine"""
+        return AnalysisContext(text, url, self.literal_index)
+
+
+def _make_rule_pack(version: str, source: Optional[str], feature_extractor: FeatureExtractor,
+                    rule_engine: ScamRuleEngine) -> RulePack:
+    literal_index = LiteralIndex(
+        feature_extractor._literal_index.literals | rule_engine._literal_index.literals
+    )
+    return RulePack(version, source, feature_extractor, rule_engine, literal_index)
+
+
+def builtin_rule_pack_data() -> Dict:
+    """Rule pack document for the rules and keyword tables shipped in code"""
+    return {
+        'version': BUILTIN_VERSION,
+        'rules': [dict(rule) for rule in ScamRuleEngine.DEFAULT_RULES],
+        'keywords': {name: list(patterns) for name, patterns in FeatureExtractor().patterns.items()},
+    }
+
+
+def read_rule_pack(path: str) -> Dict:
+    """Read a rule pack document from a .json, .yaml or .yml file"""
+    use_yaml = path.endswith(('.yaml', '.yml'))
+    if use_yaml:
+        try:
+            import yaml
+        except ImportError:
+            raise RulePackError("PyYAML not installed. Run: pip install pyyaml")
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) if use_yaml else json.load(f)
+    except Exception as e:
+        raise RulePackError(f"Could not read rule pack {path}: {e}")
+
+
+def validate_rule_pack(data: Dict):
+    """
+    Validate a rule pack document
+
+    Raises:
+        RulePackError: describing the first problem found
+    """
+    if not isinstance(data, dict):
+        raise RulePackError("Rule pack must be a mapping")
+
+    version = data.get('version')
+    if not isinstance(version, str) or not version.strip():
+        raise RulePackError("Rule pack needs a non-empty 'version' string")
+
+    rules = data.get('rules')
+    if not isinstance(rules, list) or not rules:
+        raise RulePackError("Rule pack needs a non-empty 'rules' list")
+
+    for index, rule in enumerate(rules):
+        where = f"rules[{index}]"
+        if not isinstance(rule, dict):
+            raise RulePackError(f"{where} must be a mapping")
+        missing = {'pattern', 'risk_level', 'reason', 'weight'} - rule.keys()
+        if missing:
+            raise RulePackError(f"{where} is missing {', '.join(sorted(missing))}")
+        if rule['risk_level'] not in RISK_LEVELS:
+            raise RulePackError(f"{where}.risk_level must be one of {', '.join(RISK_LEVELS)}")
+        if not isinstance(rule['reason'], str) or not rule['reason']:
+            raise RulePackError(f"{where}.reason must be a non-empty string")
+        weight = rule['weight']
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not 0 <= weight <= 1:
+            raise RulePackError(f"{where}.weight must be a number between 0 and 1")
+        _validate_pattern(rule['pattern'], f"{where}.pattern")
+
+    keywords = data.get('keywords', {})
+    if not isinstance(keywords, dict):
+        raise RulePackError("'keywords' must be a mapping of feature name to pattern list")
+    known = FeatureExtractor.KEYWORD_TABLES
+    for name, patterns in keywords.items():
+        if name not in known:
+            raise RulePackError(f"Unknown keyword table {name!r}, expected one of {', '.join(known)}")
+        if not isinstance(patterns, list) or not patterns:
+            raise RulePackError(f"keywords.{name} must be a non-empty list")
+        for index, pattern in enumerate(patterns):
+            _validate_pattern(pattern, f"keywords.{name}[{index}]")
+
+
+def _validate_pattern(pattern, where: str):
+    if not isinstance(pattern, str) or not pattern:
+        raise RulePackError(f"{where} must be a non-empty string")
+    try:
+        re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise RulePackError(f"{where} is not a valid regex: {e}")
+
+
+def compile_rule_pack(data: Dict, source: str = None) -> RulePack:
+    """Validate a rule pack document and compile it into a snapshot"""
+    validate_rule_pack(data)
+    return _make_rule_pack(
+        version=data['version'],
+        source=source,
+        feature_extractor=FeatureExtractor(keywords=data.get('keywords')),
+        rule_engine=ScamRuleEngine(rules=data['rules']),
+    )
+
+
+def load_rule_pack(path: str = None) -> RulePack:
+    """Load and compile the rule pack at `path`, or the built-in rules if None"""
+    if not path:
+        return _make_rule_pack(BUILTIN_VERSION, None, FeatureExtractor(), ScamRuleEngine())
+    return compile_rule_pack(read_rule_pack(path), source=path)
+
+
+class RulePackWatcher:
+    """Poll a rule pack file and call `on_change` when its mtime changes"""
+
+    def __init__(self, path: str, on_change: Callable[[str], None], interval: float = 5.0):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._mtime = self._current_mtime()
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name="rule-pack-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            mtime = self._current_mtime()
+            if mtime is None or mtime == self._mtime:
+                continue
+            self._mtime = mtime
+            try:
+                self.on_change(self.path)
+            except Exception as e:
+                # Keep serving the previous pack; a broken edit must not take the API down
+                logger.error(f"Rule pack reload from {self.path} failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or validate rule packs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="Write the built-in rules as a JSON rule pack")
+    export.add_argument("output", help="Output .json file")
+    export.add_argument("--version", default="1.0.0", help="Version string for the new pack")
+
+    validate = subparsers.add_parser("validate", help="Validate and compile a rule pack")
+    validate.add_argument("path", help="Rule pack .json/.yaml file")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        data = builtin_rule_pack_data()
+        data['version'] = args.version
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        print(f"✅ Exported {len(data['rules'])} rules to {args.output}")
+    else:
+        pack = load_rule_pack(args.path)
+        print(f"✅ {args.path}: version {pack.version}, {len(pack.rule_engine.rules)} rules")
+
+
+if __name__ == "__main__":
+    main()
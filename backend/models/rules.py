@@ -2,150 +2,411 @@
 Rule-Based Scam Detection Engine
 Pattern matching and heuristic rules for job scam detection
 """
-import re
-from typing import Dict, List
+import logging
+import time
+from typing import Callable, Container, Dict, Iterable, List, Optional, Tuple
+from backend.config import settings
+from backend.utils.analysis_context import AnalysisContext, TextBatch
+from backend.utils.literal_index import LiteralIndex
+from backend.utils.match_stats import MatchStats, rule_stats
+from backend.utils.patterns import CompiledPattern, deadline_passed, match_deadline, resolve_engine
+
+logger = logging.getLogger(__name__)
 
 
 class ScamRuleEngine:
     """Rule-based detection system"""
     
-    def __init__(self):
-        # Define rule patterns with risk levels and descriptions
-        self.rules = [
-            {
-                'pattern': r'(?:registration|processing|training|administrative)\s+fee',
-                'risk_level': 'high',
-                'reason': 'Requests upfront payment',
-                'weight': 0.3
-            },
-            {
-                'pattern': r'(?:no|without)\s+interview',
-                'risk_level': 'high',
-                'reason': 'No interview required',
-                'weight': 0.25
-            },
-            {
-                'pattern': r'(?:\$|₹)\s*\d{4,}.*(?:per day|daily|/day)',
-                'risk_level': 'high',
-                'reason': 'Unrealistic daily salary',
-                'weight': 0.25
-            },
-            {
-                'pattern': r'guaranteed\s+(?:selection|job|income)',
-                'risk_level': 'high',
-                'reason': 'Guaranteed selection claims',
-                'weight': 0.2
-            },
-            {
-                'pattern': r'(?:whatsapp|telegram)\s+only',
-                'risk_level': 'medium',
-                'reason': 'WhatsApp/Telegram-only communication',
-                'weight': 0.15
-            },
-            {
-                'pattern': r'(?:urgent|immediate|hurry|act now)',
-                'risk_level': 'medium',
-                'reason': 'Urgency pressure tactics',
-                'weight': 0.1
-            },
-            {
-                'pattern': r'work\s+from\s+home.*\$\d{3,}',
-                'risk_level': 'medium',
-                'reason': 'Work-from-home with high pay',
-                'weight': 0.15
-            },
-            {
-                'pattern': r'limited\s+(?:slots?|positions?|time)',
-                'risk_level': 'medium',
-                'reason': 'Artificial scarcity',
-                'weight': 0.1
-            },
-            {
-                'pattern': r'(?:bitcoin|crypto|cryptocurrency|NFT)',
-                'risk_level': 'medium',
-                'reason': 'Cryptocurrency mention in job',
-                'weight': 0.15
-            },
-            {
-                'pattern': r'gift\s+card',
-                'risk_level': 'high',
-                'reason': 'Gift card payment method',
-                'weight': 0.25
-            },
-            {
-                'pattern': r'!!!+',
-                'risk_level': 'low',
-                'reason': 'Excessive punctuation',
-                'weight': 0.05
-            },
-            {
-                'pattern': r'\b[A-Z]{6,}\b',
-                'risk_level': 'low',
-                'reason': 'Excessive capitalization',
-                'weight': 0.05
-            },
-            {
-                'pattern': r'(?:gmail|yahoo|hotmail)\.com',
-                'risk_level': 'low',
-                'reason': 'Generic email domain',
-                'weight': 0.08
-            },
-            {
-                'pattern': r'(?:earn|make)\s+\$\d{3,}.*(?:week|daily)',
-                'risk_level': 'high',
-                'reason': 'Unrealistic earnings promise',
-                'weight': 0.2
-            },
-            {
-                'pattern': r'no\s+(?:experience|skills?)\s+(?:needed|required)',
-                'risk_level': 'medium',
-                'reason': 'No experience needed with high pay',
-                'weight': 0.12
-            },
+    # Define rule patterns with risk levels and descriptions
+    DEFAULT_RULES = [
+        {
+            'pattern': r'(?:registration|processing|training|administrative)\s+fee',
+            'risk_level': 'high',
+            'reason': 'Requests upfront payment',
+            'weight': 0.3
+        },
+        {
+            'pattern': r'(?:no|without)\s+interview',
+            'risk_level': 'high',
+            'reason': 'No interview required',
+            'weight': 0.25
+        },
+        {
+            'pattern': r'(?:\$|₹)\s*\d{4,}.*(?:per day|daily|/day)',
+            'risk_level': 'high',
+            'reason': 'Unrealistic daily salary',
+            'weight': 0.25
+        },
+        {
+            'pattern': r'guaranteed\s+(?:selection|job|income)',
+            'risk_level': 'high',
+            'reason': 'Guaranteed selection claims',
+            'weight': 0.2
+        },
+        {
+            'pattern': r'(?:whatsapp|telegram)\s+only',
+            'risk_level': 'medium',
+            'reason': 'WhatsApp/Telegram-only communication',
+            'weight': 0.15
+        },
+        {
+            'pattern': r'(?:urgent|immediate|hurry|act now)',
+            'risk_level': 'medium',
+            'reason': 'Urgency pressure tactics',
+            'weight': 0.1
+        },
+        {
+            'pattern': r'work\s+from\s+home.*\$\d{3,}',
+            'risk_level': 'medium',
+            'reason': 'Work-from-home with high pay',
+            'weight': 0.15
+        },
+        {
+            'pattern': r'limited\s+(?:slots?|positions?|time)',
+            'risk_level': 'medium',
+            'reason': 'Artificial scarcity',
+            'weight': 0.1
+        },
+        {
+            'pattern': r'(?:bitcoin|crypto|cryptocurrency|NFT)',
+            'risk_level': 'medium',
+            'reason': 'Cryptocurrency mention in job',
+            'weight': 0.15
+        },
+        {
+            'pattern': r'gift\s+card',
+            'risk_level': 'high',
+            'reason': 'Gift card payment method',
+            'weight': 0.25
+        },
+        {
+            'pattern': r'!!!+',
+            'risk_level': 'low',
+            'reason': 'Excessive punctuation',
+            'weight': 0.05
+        },
+        {
+            'pattern': r'\b[A-Z]{6,}\b',
+            'risk_level': 'low',
+            'reason': 'Excessive capitalization',
+            'weight': 0.05
+        },
+        {
+            'pattern': r'(?:gmail|yahoo|hotmail)\.com',
+            'risk_level': 'low',
+            'reason': 'Generic email domain',
+            'weight': 0.08
+        },
+        {
+            'pattern': r'(?:earn|make)\s+\$\d{3,}.*(?:week|daily)',
+            'risk_level': 'high',
+            'reason': 'Unrealistic earnings promise',
+            'weight': 0.2
+        },
+        {
+            'pattern': r'no\s+(?:experience|skills?)\s+(?:needed|required)',
+            'risk_level': 'medium',
+            'reason': 'No experience needed with high pay',
+            'weight': 0.12
+        },
+    ]
+    
+    # Feature flags added after the rule matches: (feature, flag, weight)
+    FEATURE_WEIGHTS = (
+        ('missing_company_name', "Missing company information", 0.1),
+        ('url_suspicious', "Suspicious URL or domain", 0.15),
+    )
+    
+    def __init__(self, rules: List[Dict] = None, match_window: int = None,
+                 regex_engine: str = None, time_budget_ms: float = None,
+                 stats: MatchStats = None):
+        """
+        Args:
+            rules: Rule dicts with pattern, risk_level, reason and weight
+                (default: DEFAULT_RULES)
+            match_window: Cap for ".*" spans in characters (default: settings)
+            regex_engine: "re" or "re2" (default: settings)
+            time_budget_ms: Regex time per evaluation before the remaining
+                rules are skipped (default: settings, 0 = no budget)
+            stats: Counters for per-rule timing and hits (default: shared
+                rule_stats, only collected while stats.enabled)
+        """
+        self.match_window = settings.RULE_MATCH_WINDOW if match_window is None else match_window
+        self.regex_engine = resolve_engine(regex_engine or settings.RULE_REGEX_ENGINE)
+        self.time_budget_ms = settings.RULE_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+        self.rules = [dict(rule) for rule in (self.DEFAULT_RULES if rules is None else rules)]
+        self.stats = rule_stats if stats is None else stats
+        
+        # Skip rules whose required keywords are absent from the text
+        self.prefilter = True
+        
+        # Compile once so evaluate() never goes through the re module cache
+        self.compile()
+    
+    def compile(self):
+        """Precompile rule patterns (call again after editing self.rules)"""
+        self._compiled = [
+            (rule, CompiledPattern(rule['pattern'], self.match_window, self.regex_engine))
+            for rule in self.rules
         ]
+        self._literal_index = LiteralIndex(
+            literal
+            for _, compiled in self._compiled if compiled.anchors
+            for literal in compiled.anchors
+        )
+        # Scores only grow with more matches, so matching can stop at 1.0
+        self._can_stop_early = all(rule['weight'] >= 0 for rule in self.rules)
     
-    def evaluate(self, text: str, features: Dict) -> Dict:
+    def evaluate(self, text: str, features: Dict, context: AnalysisContext = None,
+                 early_stop: bool = False) -> Dict:
         """
         Evaluate text against rule patterns
         
+        Args:
+            text: Job posting text
+            features: FeatureExtractor output for `text`
+            context: Shared per-request context for `text` (optional)
+            early_stop: Stop matching once the score reaches 1.0; the score
+                is unchanged but flags and matched patterns may be incomplete
+        
+        Returns:
+            Dict with score, flags, and matched patterns; each matched pattern
+            has start/end character offsets into `text`
+        """
+        if context is None:
+            context = AnalysisContext(text)
+        stop = None
+        if early_stop and self._can_stop_early:
+            def stop(found):
+                return self._saturated(features, [rule for _, rule, _ in found])
+        matches = [(rule, span) for _, rule, span in self._find_matches(context, stop=stop)]
+        return self._result(context, features, matches)
+    
+    def evaluate_chunks(self, chunks: Iterable[Tuple[int, AnalysisContext]], features: Dict,
+                        early_stop: bool = False) -> Dict:
+        """
+        Evaluate a long text one chunk at a time
+        
+        A rule matches the text when it matches any chunk; its first match is
+        reported, so results equal evaluate() on the whole text except for
+        matches spanning a chunk boundary. Rules that matched are not run on
+        later chunks, and each chunk gets the full time budget, so regex work
+        grows at most linearly with the number of chunks.
+        
+        Args:
+            chunks: (offset of the chunk in the text, context of the chunk),
+                in text order
+            features: FeatureExtractor output for the whole text
+                (see FeatureExtractor.merge)
+            early_stop: Stop once the score reaches 1.0 (see evaluate())
+        
         Returns:
-            Dict with score, flags, and matched patterns
+            Dict like evaluate(), with offsets into the whole text
         """
-        text_lower = text.lower()
+        first_matches = {}
+        stop = None
+        if early_stop and self._can_stop_early:
+            def stop(found):
+                # Weights are summed in rule order, as _score() does
+                rules = {rule_index: rule for rule_index, (rule, _) in first_matches.items()}
+                rules.update((rule_index, rule) for rule_index, rule, _ in found)
+                return self._saturated(features, [rules[rule_index] for rule_index in sorted(rules)])
+        for offset, context in chunks:
+            for rule_index, rule, (start, end, matched) in self._find_matches(context, first_matches, stop):
+                start, end = self._original_span(context, start, end)
+                first_matches[rule_index] = (rule, (start + offset, end + offset, matched))
+            if stop is not None and stop([]):
+                break
+        
+        matches = [first_matches[rule_index] for rule_index in sorted(first_matches)]
+        return self._score(features, matches)
+    
+    def _find_matches(self, context: AnalysisContext, skip: Container[int] = (),
+                      stop: Optional[Callable[[List[tuple]], bool]] = None) -> List[tuple]:
+        """
+        (rule index, rule, span) per matching rule in rule order, with offsets
+        into context.text_lower; rules whose index is in `skip` are not run,
+        and no more rules are run once stop(matches so far) is true
+        """
+        text = context.text
+        samples = [] if self.stats.enabled else None
+        
+        # One literal scan tells which rules can possibly match
+        found_literals = None
+        if self.prefilter:
+            if samples is None:
+                found_literals = context.found_literals(self._literal_index)
+            else:
+                start = time.perf_counter_ns()
+                found_literals = context.found_literals(self._literal_index)
+                samples.append(('(literal prefilter)', bool(found_literals), time.perf_counter_ns() - start))
+        matches = []
+        deadline = match_deadline(self.time_budget_ms)
+        
+        # Check each rule
+        for rule_index, (rule, compiled) in enumerate(self._compiled):
+            if rule_index in skip or not compiled.could_match(found_literals):
+                if samples is not None:
+                    samples.append((rule['reason'], None, 0))
+                continue
+            
+            if deadline_passed(deadline):
+                logger.warning(
+                    f"Rule evaluation exceeded {self.time_budget_ms} ms on {len(text)} chars; "
+                    f"skipped rules from '{rule['reason']}' on"
+                )
+                break
+            
+            if samples is None:
+                match = context.search(compiled)  # First match only per rule
+            else:
+                start = time.perf_counter_ns()
+                match = context.search(compiled)
+                samples.append((rule['reason'], match is not None, time.perf_counter_ns() - start))
+            
+            if match:
+                matches.append((rule_index, rule, (match.start(), match.end(), match.group())))
+                if stop is not None and stop(matches):
+                    break
+        
+        if samples:
+            self.stats.record(samples)
+        
+        return matches
+    
+    def evaluate_batch(self, texts: List[str], features: List[Dict],
+                       contexts: List[AnalysisContext] = None, early_stop: bool = False) -> List[Dict]:
+        """
+        Evaluate many texts, running each rule once over the whole batch
+        
+        Args:
+            texts: Job posting texts
+            features: FeatureExtractor output for each text
+            contexts: Shared per-request contexts for texts (optional)
+            early_stop: Leave texts out of later rules once their score
+                reaches 1.0 (see evaluate())
+        
+        Returns:
+            One evaluate() result per text, in order
+        """
+        if contexts is None:
+            contexts = [AnalysisContext(text) for text in texts]
+        count = len(contexts)
+        if not count:
+            return []
+        
+        batch = TextBatch(contexts)
+        if self.prefilter:
+            found = [context.found_literals(self._literal_index) for context in contexts]
+        else:
+            found = [None] * count
+        
+        matches = [[] for _ in range(count)]
+        saturated = set()
+        early_stop = early_stop and self._can_stop_early
+        deadline = match_deadline(self.time_budget_ms * count)
+        samples = [] if self.stats.enabled else None
+        
+        for rule, compiled in self._compiled:
+            if deadline_passed(deadline):
+                logger.warning(
+                    f"Batch rule evaluation exceeded {self.time_budget_ms} ms per text on "
+                    f"{count} texts; skipped rules from '{rule['reason']}' on"
+                )
+                break
+            
+            candidates = [
+                index for index in range(count)
+                if index not in saturated and compiled.could_match(found[index])
+            ]
+            if not candidates:
+                if samples is not None:
+                    samples.extend((rule['reason'], None, 0) for _ in range(count))
+                continue
+            
+            start = time.perf_counter_ns()
+            spans = batch.find(compiled, candidates)
+            # Rules run in order, so each text's matches stay in rule order
+            for index, span in spans.items():
+                matches[index].append((rule, span))
+                if early_stop and self._saturated(features[index], [rule for rule, _ in matches[index]]):
+                    saturated.add(index)
+            
+            if samples is not None:
+                # Spread the batch time evenly so per-evaluation means stay comparable
+                elapsed = (time.perf_counter_ns() - start) // len(candidates)
+                samples.extend((rule['reason'], index in spans, elapsed) for index in candidates)
+                samples.extend((rule['reason'], None, 0) for _ in range(count - len(candidates)))
+        
+        if samples:
+            self.stats.record(samples)
+        
+        return [
+            self._result(context, text_features, text_matches)
+            for context, text_features, text_matches in zip(contexts, features, matches)
+        ]
+    
+    @staticmethod
+    def _original_span(context: AnalysisContext, start: int, end: int) -> Tuple[int, int]:
+        """Map a span in context.text_lower to context.text"""
+        lower_offsets = context.lower_offsets
+        if lower_offsets is None:
+            return start, end
+        original_start = lower_offsets[start] if start < len(lower_offsets) else len(context.text)
+        end = lower_offsets[end - 1] + 1 if end > start else original_start
+        return original_start, end
+    
+    def _result(self, context: AnalysisContext, features: Dict, matches: List) -> Dict:
+        """Score, flags and matched patterns from (rule, span) pairs in rule order"""
+        return self._score(features, [
+            (rule, self._original_span(context, start, end) + (matched,))
+            for rule, (start, end, matched) in matches
+        ])
+    
+    def _total(self, features: Dict, rules: List[Dict]) -> float:
+        """Unclamped score of matched rules (in rule order) plus feature weights"""
+        total_score = 0.0
+        for rule in rules:
+            total_score += rule['weight']
+        for feature, _, weight in self.FEATURE_WEIGHTS:
+            if features.get(feature):
+                total_score += weight
+        return total_score
+    
+    def _saturated(self, features: Dict, rules: List[Dict]) -> bool:
+        """
+        Whether these matches already give the maximum score
+        
+        Adding non-negative weights never lowers a float sum, so once this
+        holds, any further matches leave the clamped score at exactly 1.0.
+        """
+        return self._total(features, rules) >= 1.0
+    
+    def _score(self, features: Dict, matches: List) -> Dict:
+        """Score, flags and matched patterns from (rule, span in the original text) pairs"""
         matched_patterns = []
         flags = []
-        total_score = 0.0
         
-        # Check each rule
-        for rule in self.rules:
-            matches = list(re.finditer(rule['pattern'], text_lower, re.IGNORECASE))
+        for rule, (start, end, matched) in matches:
+            # Record match
+            matched_patterns.append({
+                'match': matched,
+                'risk_level': rule['risk_level'],
+                'reason': rule['reason'],
+                'start': start,
+                'end': end
+            })
             
-            if matches:
-                # Record match
-                for match in matches[:1]:  # Take first match only per rule
-                    matched_patterns.append({
-                        'match': match.group(),
-                        'risk_level': rule['risk_level'],
-                        'reason': rule['reason']
-                    })
-                
-                # Add flag
-                flags.append(rule['reason'])
-                
-                # Add to score
-                total_score += rule['weight']
+            # Add flag
+            flags.append(rule['reason'])
         
         # Additional feature-based flags
-        if features.get('missing_company_name'):
-            flags.append("Missing company information")
-            total_score += 0.1
-        
-        if features.get('url_suspicious'):
-            flags.append("Suspicious URL or domain")
-            total_score += 0.15
+        for feature, flag, _ in self.FEATURE_WEIGHTS:
+            if features.get(feature):
+                flags.append(flag)
         
         # Normalize score to 0-1 range
-        normalized_score = min(total_score, 1.0)
+        normalized_score = min(self._total(features, [rule for rule, _ in matches]), 1.0)
         
         return {
             'score': normalized_score,
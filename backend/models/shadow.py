@@ -0,0 +1,214 @@
+"""
+Shadow Model
+Scores live postings with a candidate model in a background thread and logs
+how it compares with the serving model, without touching the response path
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Comparisons written per SQLite transaction
+WRITE_BATCH = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shadow_scores (
+    created REAL NOT NULL,
+    text_key TEXT NOT NULL,
+    primary_version TEXT,
+    shadow_version TEXT NOT NULL,
+    rule_score REAL NOT NULL,
+    primary_ml REAL,
+    shadow_ml REAL NOT NULL,
+    primary_score REAL NOT NULL,
+    shadow_score REAL NOT NULL,
+    delta REAL NOT NULL,
+    primary_label TEXT NOT NULL,
+    shadow_label TEXT NOT NULL,
+    disagree INTEGER NOT NULL,
+    shadow_ms REAL NOT NULL
+)
+"""
+
+_INSERT = "INSERT INTO shadow_scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_STOP = object()
+
+
+class ShadowScorer:
+    """
+    Candidate model scored on a bounded queue by one daemon thread
+
+    submit() never blocks: when SHADOW_QUEUE_SIZE postings are already
+    waiting, the new one is dropped and counted. The worker scores each
+    posting like the serving model (same rule score, same blending and
+    labels; rule-only where the cascade skipped the serving model, since it
+    would skip the candidate too) and writes one row per posting to a SQLite table with the
+    primary and shadow scores, their difference, whether the labels
+    disagree and how long the shadow model took.
+    """
+
+    def __init__(self, model, vectorizer, version: str, log_path: str, queue_size: int,
+                 blend: Callable[[float, float], float], label: Callable[[float], str],
+                 scorer=None):
+        """
+        Args:
+            model: Fitted candidate model with predict_proba
+            vectorizer: Fitted vectorizer for the candidate model
+            version: Candidate model version, stored with every row
+            log_path: SQLite file for the comparisons (created if missing)
+            queue_size: Max postings waiting to be scored
+            blend: (ml_score, rule_score) -> combined score
+            label: Combined score -> prediction label
+            scorer: Compiled scorer for the candidate model (optional)
+        """
+        self.model = model
+        self.vectorizer = vectorizer
+        self.version = version
+        self.log_path = log_path
+        self.blend = blend
+        self.label = label
+        self.scorer = scorer
+        self.submitted = 0
+        self.dropped = 0
+        self.scored = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(sqlite3.connect(log_path)) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")  # Readers don't block the worker
+            connection.execute(_SCHEMA)
+
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def submit(self, text_key: str, texts: List[str], rule_score: float,
+               primary_ml: Optional[float], primary_score: float, primary_version: str) -> bool:
+        """
+        Queue one analyzed posting for shadow scoring
+
+        Args:
+            text_key: Hash identifying the posting (texts are not logged)
+            texts: Texts the ML model scores; the posting's ML score is the
+                highest (one text, or the chunks of a long posting)
+            rule_score: Rule engine score of the posting
+            primary_ml: Serving model's ML score (None if the cascade skipped it)
+            primary_score: Serving combined score
+            primary_version: Serving model version
+
+        Returns:
+            False if the queue was full and the posting was dropped
+        """
+        item = (time.time(), text_key, texts, rule_score, primary_ml, primary_score, primary_version)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _score(self, texts: List[str]) -> float:
+        if self.scorer is not None:
+            return float(max(self.scorer.predict_proba(texts)))
+        return float(max(self.model.predict_proba(self.vectorizer.transform(texts))[:, 1]))
+
+    def _compare(self, item) -> tuple:
+        """SQLite row for one queued posting"""
+        created, text_key, texts, rule_score, primary_ml, primary_score, primary_version = item
+        start = time.perf_counter()
+        shadow_ml = self._score(texts)
+        shadow_ms = (time.perf_counter() - start) * 1e3
+
+        # The cascade decides on the rule score alone, so the candidate would be skipped too
+        shadow_score = primary_score if primary_ml is None else self.blend(shadow_ml, rule_score)
+        primary_label, shadow_label = self.label(primary_score), self.label(shadow_score)
+        return (
+            created, text_key, primary_version, self.version, rule_score, primary_ml,
+            shadow_ml, primary_score, shadow_score, shadow_score - primary_score,
+            primary_label, shadow_label, int(primary_label != shadow_label), shadow_ms
+        )
+
+    def _run(self):
+        """Worker loop: score queued postings and write them in batches"""
+        connection = sqlite3.connect(self.log_path)
+        try:
+            stopping = False
+            while not stopping:
+                items = [self._queue.get()]
+                while len(items) < WRITE_BATCH:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in items:
+                    stopping = True
+                    items = [item for item in items if item is not _STOP]
+
+                rows = []
+                for item in items:
+                    try:
+                        rows.append(self._compare(item))
+                    except Exception as e:
+                        logger.error(f"Shadow scoring error: {e}")
+                        with self._lock:
+                            self.errors += 1
+                if rows:
+                    try:
+                        with connection:
+                            connection.executemany(_INSERT, rows)
+                    except sqlite3.Error as e:
+                        logger.error(f"Could not write shadow scores to {self.log_path}: {e}")
+                        with self._lock:
+                            self.errors += len(rows)
+                        continue
+                with self._lock:
+                    self.scored += len(rows)
+        finally:
+            connection.close()
+
+    def close(self, timeout: float = 5.0):
+        """Score what is already queued (up to `timeout` seconds) and stop the worker"""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Shadow queue still full at shutdown; pending postings are lost")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Queue counters plus disagreement, score delta and latency over all logged rows"""
+        with self._lock:
+            stats = {
+                'version': self.version,
+                'submitted': self.submitted,
+                'dropped': self.dropped,
+                'scored': self.scored,
+                'errors': self.errors,
+                'queued': self._queue.qsize(),
+            }
+        with closing(sqlite3.connect(self.log_path)) as connection:
+            count, disagreements, mean_delta, mean_abs_delta, mean_ms = connection.execute(
+                "SELECT COUNT(*), TOTAL(disagree), AVG(delta), AVG(ABS(delta)), AVG(shadow_ms) "
+                "FROM shadow_scores WHERE shadow_version = ?", (self.version,)
+            ).fetchone()
+        stats.update({
+            'logged': count,
+            'disagreement_rate': disagreements / count if count else 0.0,
+            'mean_delta': mean_delta or 0.0,
+            'mean_abs_delta': mean_abs_delta or 0.0,
+            'mean_shadow_ms': mean_ms or 0.0,
+        })
+        return stats
@@ -0,0 +1,198 @@
+"""
+Analysis Context
+Per-request text views and match results shared by feature extraction and rules
+"""
+from bisect import bisect_right
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from backend.utils.literal_index import LiteralIndex
+from backend.utils.patterns import CompiledPattern, lowercase_offsets, needs_ignorecase
+
+# (start, end, matched text) of a match within one document
+Span = Tuple[int, int, str]
+
+
+class AnalysisContext:
+    """
+    Work derived from one posting, computed at most once per request
+
+    FeatureExtractor.extract and ScamRuleEngine.evaluate both accept a context;
+    passing the same one to both shares the lowercased text, tokens, literal
+    prefilter scan and regex results between them.
+    """
+
+    def __init__(self, text: str, url: str = None, literal_index: LiteralIndex = None):
+        """
+        Args:
+            text: Posting text
+            url: Posting URL (optional)
+            literal_index: Index covering the literals of every engine using
+                this context, so one scan serves all of them (optional)
+        """
+        self.text = text
+        self.url = url
+        self.text_lower = text.lower()
+        self.exact_case = needs_ignorecase(self.text_lower)
+        self.literal_index = literal_index
+        self._found: Dict[LiteralIndex, Set[str]] = {}
+        self._matches: Dict[tuple, object] = {}
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Whitespace-separated words of the original text"""
+        return self.text.split()
+
+    @cached_property
+    def lower_offsets(self) -> Optional[List[int]]:
+        """Offsets of text_lower in text (see lowercase_offsets)"""
+        return lowercase_offsets(self.text, self.text_lower)
+
+    def found_literals(self, index: LiteralIndex) -> Optional[Set[str]]:
+        """
+        Literals of `index` present in the text, or None to disable prefiltering
+
+        Uses the shared index when it covers `index`; extra literals in the
+        result are harmless since patterns only test their own anchors.
+        """
+        if self.exact_case:
+            return None
+        shared = self.literal_index
+        if shared is not None and index.literals <= shared.literals:
+            index = shared
+        found = self._found.get(index)
+        if found is None:
+            found = self._found[index] = index.find(self.text_lower)
+        return found
+
+    def search(self, compiled: CompiledPattern, original_case: bool = False):
+        """
+        First match of a compiled pattern, cached by pattern
+
+        Args:
+            compiled: Pattern to run
+            original_case: Match the original text with the IGNORECASE regex
+                instead of the lowercased text
+        """
+        key = (compiled.key, original_case)
+        try:
+            return self._matches[key]
+        except KeyError:
+            pass
+        if original_case:
+            match = compiled.fallback.search(self.text)
+        else:
+            match = compiled.search(self.text_lower, self.exact_case)
+        self._matches[key] = match
+        return match
+
+
+class TextBatch:
+    """
+    Many contexts searched together
+
+    Documents are joined with a separator no pattern can match across, so a
+    pattern runs once over the whole batch and jumps to the next candidate
+    document after each hit, instead of once per document.
+    """
+
+    # '.' stops at newlines and \b sees a boundary, as at the ends of a string
+    SEPARATOR = '\n\x00\n'
+
+    def __init__(self, contexts: Sequence[AnalysisContext]):
+        self.contexts = contexts
+
+    @cached_property
+    def _lower(self):
+        return self._join([context.text_lower for context in self.contexts])
+
+    @cached_property
+    def _original(self):
+        return self._join([context.text for context in self.contexts])
+
+    def _join(self, texts: List[str]):
+        """Joined text with the start and end offset of each document"""
+        starts, ends = [], []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text)
+            ends.append(position)
+            position += len(self.SEPARATOR)
+        return self.SEPARATOR.join(texts), starts, ends
+
+    def search(self, compiled: CompiledPattern, candidates: List[int],
+               original_case: bool = False) -> List[int]:
+        """
+        Indices of candidate documents in which the pattern matches
+
+        Args:
+            compiled: Pattern to run
+            candidates: Ascending document indices worth searching
+            original_case: As in AnalysisContext.search
+        """
+        return sorted(self.find(compiled, candidates, original_case))
+
+    def find(self, compiled: CompiledPattern, candidates: List[int],
+             original_case: bool = False) -> Dict[int, Span]:
+        """
+        First match in each candidate document, as AnalysisContext.search finds it
+
+        Returns:
+            Document index -> (start, end, matched text), with offsets into
+            that document's text_lower (or text when original_case)
+        """
+        spans = {}
+        batched = []
+        for index in candidates:
+            context = self.contexts[index]
+            if not compiled.position_independent or (context.exact_case and not original_case):
+                match = context.search(compiled, original_case)
+                if match:
+                    spans[index] = (match.start(), match.end(), match.group())
+            else:
+                batched.append(index)
+
+        if batched:
+            spans.update(self._scan(
+                compiled.fallback if original_case else compiled.regex, batched, original_case,
+                lambda index: self.contexts[index].search(compiled, original_case)
+            ))
+        return spans
+
+    def search_regex(self, regex, candidates: List[int] = None) -> List[int]:
+        """
+        Indices of documents whose original text a plain compiled regex matches
+
+        The regex must be position independent (see is_position_independent).
+        """
+        if candidates is None:
+            candidates = list(range(len(self.contexts)))
+        return sorted(self._scan(
+            regex, candidates, True, lambda index: regex.search(self.contexts[index].text)
+        ))
+
+    def _scan(self, regex, candidates: List[int], original_case: bool, verify) -> Dict[int, Span]:
+        """Search the joined text once, jumping to the next candidate after each hit"""
+        joined, starts, ends = self._original if original_case else self._lower
+        wanted = set(candidates)
+        spans = {}
+        position = 0
+        while position < len(candidates):
+            match = regex.search(joined, starts[candidates[position]])
+            if match is None:
+                break
+            index = bisect_right(starts, match.start()) - 1
+            if index in wanted:
+                if match.end() <= ends[index]:
+                    # Inside one document a match never reads past its end, so
+                    # it is the match the document alone would give
+                    offset = starts[index]
+                    spans[index] = (match.start() - offset, match.end() - offset, match.group())
+                else:
+                    # Matched across the separator; the document alone decides
+                    match = verify(index)
+                    if match:
+                        spans[index] = (match.start(), match.end(), match.group())
+            position = bisect_right(candidates, index)
+        return spans
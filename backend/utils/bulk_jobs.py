@@ -0,0 +1,216 @@
+"""
+Bulk Jobs
+Readers for JSONL and CSV uploads, and a background runner that works
+through queued jobs in a JobStore a chunk at a time
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+from typing import Awaitable, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from backend.utils.job_store import QUEUED, UNFINISHED, UPLOADING, JobItem, JobStore
+from backend.utils.ndjson import NDJSONLineError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_FORMATS = ('jsonl', 'csv')
+
+# Postings inserted per SQLite transaction while an upload is stored
+INSERT_BATCH = 1000
+
+# Columns taken from a CSV upload; others are ignored
+CSV_COLUMNS = ('id', 'text', 'url')
+
+
+def upload_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess the upload format from the file name or content type"""
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return None
+
+
+def read_jsonl(file: BinaryIO) -> Iterator[Tuple[int, object]]:
+    """
+    Records of a JSONL file, one per non-blank line
+
+    Yields:
+        (1-based line number, parsed value or NDJSONLineError)
+    """
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, NDJSONLineError(f"Invalid JSON: {e}")
+
+
+def read_csv(file: BinaryIO, max_field_size: int) -> Iterator[Tuple[int, object]]:
+    """
+    Records of a UTF-8 CSV file with a header row and a "text" column
+    ("id" and "url" optional, empty cells are treated as missing)
+
+    Yields:
+        (line number where the row ends, record dict)
+
+    Raises:
+        ValueError: if there is no "text" column
+        csv.Error: for malformed CSV or a field over max_field_size
+    """
+    # The csv module's limit is process-wide; only ever raise it
+    csv.field_size_limit(max(csv.field_size_limit(), max_field_size))
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    if 'text' not in (reader.fieldnames or []):
+        raise ValueError("CSV upload needs a header row with a 'text' column")
+    for row in reader:
+        record = {column: row[column] for column in CSV_COLUMNS if row.get(column)}
+        record.setdefault('text', row['text'] or '')
+        yield reader.line_num, record
+
+
+def store_upload(store: JobStore, job_id: str, items: Iterable[JobItem]) -> int:
+    """
+    Write an upload's postings to the store and queue the job
+
+    Returns:
+        Number of postings in the job
+    """
+    total = 0
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= INSERT_BATCH:
+            total += store.add_items(job_id, total, batch)
+            batch = []
+    if batch:
+        total += store.add_items(job_id, total, batch)
+    store.queue_job(job_id, total)
+    return total
+
+
+class BulkJobRunner:
+    """
+    Background workers for queued bulk jobs
+
+    Each worker takes one job at a time and analyzes it chunk by chunk,
+    committing each chunk's results together with the job's checkpoint. On
+    start, jobs left queued or running by a previous process are resumed
+    from their checkpoint; uploads that were cut off are marked failed,
+    since the uploaded file is gone. The store is also checked for queued
+    jobs every `poll_interval` seconds, so jobs uploaded through another
+    process sharing the store are picked up.
+
+    Only one process should run workers against a given store.
+    """
+
+    def __init__(self, store: JobStore,
+                 analyze: Callable[[List[JobItem], Optional[Tuple[str, ...]]], Awaitable[List[Dict]]],
+                 chunk_size: int = 256, workers: int = 1, retries: int = 3, retry_delay: float = 5.0,
+                 poll_interval: float = 5.0):
+        """
+        Args:
+            store: Job store
+            analyze: Async function mapping a chunk of postings and the
+                job's result fields to one output line ({"id", "result"} or
+                {"id", "error"}) each
+            chunk_size: Postings per analyze call and per checkpoint
+            workers: Jobs processed at once (0 = leave jobs to another process)
+            retries: Attempts per chunk before the job is marked failed
+            retry_delay: Seconds between attempts
+            poll_interval: Seconds between checks for jobs queued elsewhere
+        """
+        self.store = store
+        self.analyze = analyze
+        self.chunk_size = max(1, chunk_size)
+        self.workers = max(0, workers)
+        self.retries = max(1, retries)
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._claimed: Set[str] = set()  # Jobs queued or being processed here
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """Resume unfinished jobs and start the workers (call from the event loop)"""
+        if not self.workers:
+            return
+        for job_id in self.store.jobs_with_status(UPLOADING):
+            self.store.fail_job(job_id, "Upload was interrupted by a restart")
+        self._queue = asyncio.Queue()
+        resumed = self.store.jobs_with_status(*UNFINISHED)
+        for job_id in resumed:
+            self.submit(job_id)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._poll()))
+        logger.info(f"Bulk job runner started: {self.workers} workers, {len(resumed)} jobs resumed")
+
+    def submit(self, job_id: str):
+        """Queue a job whose upload is stored"""
+        if self._queue is not None and job_id not in self._claimed:
+            self._claimed.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def stop(self):
+        """Stop the workers; a chunk being analyzed is redone after a restart"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._claimed.clear()
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Bulk job {job_id} failed: {e}")
+                await asyncio.to_thread(self.store.fail_job, job_id, str(e))
+            finally:
+                self._claimed.discard(job_id)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                for job_id in await asyncio.to_thread(self.store.jobs_with_status, QUEUED):
+                    self.submit(job_id)
+            except Exception as e:
+                logger.error(f"Could not check for queued bulk jobs: {e}")
+
+    async def _process(self, job_id: str):
+        job = await asyncio.to_thread(self.store.get_job, job_id)
+        if job is None or job['status'] not in UNFINISHED:
+            return  # Deleted or already handled
+        await asyncio.to_thread(self.store.start_job, job_id)
+
+        while True:
+            pending = await asyncio.to_thread(self.store.pending_items, job_id, self.chunk_size)
+            if not pending:
+                break
+            outputs = await self._analyze_chunk([item for _, item in pending], job['fields'])
+            await asyncio.to_thread(
+                self.store.save_results, job_id, [(seq, output) for (seq, _), output in zip(pending, outputs)]
+            )
+        await asyncio.to_thread(self.store.complete_job, job_id)
+        logger.info(f"Bulk job {job_id} completed")
+
+    async def _analyze_chunk(self, items: List[JobItem], fields: Optional[Tuple[str, ...]]) -> List[Dict]:
+        for attempt in range(1, self.retries + 1):
+            try:
+                return await self.analyze(items, fields)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Bulk chunk failed ({e}), retrying in {self.retry_delay}s")
+                await asyncio.sleep(self.retry_delay)
+
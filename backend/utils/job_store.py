@@ -0,0 +1,226 @@
+"""
+Bulk Job Store
+SQLite-backed state, inputs and results of bulk analysis jobs, with a
+per-job checkpoint so a job picks up where it stopped after a restart
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+UPLOADING = 'uploading'
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+UNFINISHED = (QUEUED, RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    source TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    fields TEXT
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    text TEXT,
+    url TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    output TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+"""
+
+# One queued posting: (item id, text, url, error) where error is a
+# {"status", "detail"} dict for a record rejected at upload, else None
+JobItem = Tuple[object, Optional[str], Optional[str], Optional[Dict]]
+
+
+class JobStore:
+    """
+    Jobs, their queued postings and their results in one SQLite file
+
+    A job's `processed` count is its checkpoint: results for a chunk and the
+    new count are committed in one transaction, so after a crash the job
+    resumes at the first posting without a result. Inputs are deleted once
+    a job completes; results stay until the job is deleted.
+
+    Safe to use from several threads; each call takes its own connection
+    from a per-thread cache.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file (created with its directory if missing)
+        """
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")  # Pollers don't block the workers
+        connection.executescript(_SCHEMA)
+        columns = {row['name'] for row in connection.execute("PRAGMA table_info(jobs)")}
+        if 'fields' not in columns:  # Stores created before result fields could be chosen
+            connection.execute("ALTER TABLE jobs ADD COLUMN fields TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    def create_job(self, source: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> str:
+        """
+        Register a new job in the uploading state and return its id
+
+        Args:
+            source: Uploaded file name
+            fields: Result fields to keep per posting (None = all)
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, status, source, created, updated, fields) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, UPLOADING, source, now, now, json.dumps(list(fields)) if fields is not None else None)
+            )
+        return job_id
+
+    def add_items(self, job_id: str, start: int, items: Iterable[JobItem]) -> int:
+        """
+        Store a run of postings for an uploading job
+
+        Args:
+            job_id: Job id
+            start: Sequence number of the first posting
+            items: Postings in upload order
+
+        Returns:
+            Number of postings stored
+        """
+        rows = [
+            (job_id, start + offset, json.dumps(item_id), text, url, json.dumps(error) if error else None)
+            for offset, (item_id, text, url, error) in enumerate(items)
+        ]
+        with self._connection() as connection:
+            connection.executemany("INSERT INTO job_items VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def queue_job(self, job_id: str, total: int):
+        """Mark an upload as complete and ready for the workers"""
+        self._set(job_id, status=QUEUED, total=total)
+
+    def fail_job(self, job_id: str, error: str):
+        self._set(job_id, status=FAILED, error=error)
+
+    def start_job(self, job_id: str):
+        self._set(job_id, status=RUNNING)
+
+    def complete_job(self, job_id: str):
+        """Mark a job done and drop its stored inputs"""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            connection.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (COMPLETED, time.time(), job_id)
+            )
+
+    def _set(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connection() as connection:
+            connection.execute(
+                f"UPDATE jobs SET {assignments}, updated = ? WHERE id = ?",
+                (*fields.values(), time.time(), job_id)
+            )
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Job state, or None for an unknown id"""
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['fields'] = tuple(json.loads(job['fields'])) if job['fields'] else None
+        return job
+
+    def jobs_with_status(self, *statuses: str) -> List[str]:
+        """Ids of jobs in any of the given statuses, oldest first"""
+        placeholders = ", ".join("?" * len(statuses))
+        rows = self._connection().execute(
+            f"SELECT id FROM jobs WHERE status IN ({placeholders}) ORDER BY created", statuses
+        ).fetchall()
+        return [row['id'] for row in rows]
+
+    def pending_items(self, job_id: str, limit: int) -> List[Tuple[int, JobItem]]:
+        """The next `limit` postings after the job's checkpoint, as (seq, item)"""
+        rows = self._connection().execute(
+            "SELECT seq, item_id, text, url, error FROM job_items "
+            "WHERE job_id = ? AND seq >= (SELECT processed FROM jobs WHERE id = ?) "
+            "ORDER BY seq LIMIT ?", (job_id, job_id, limit)
+        ).fetchall()
+        return [
+            (row['seq'], (json.loads(row['item_id']), row['text'], row['url'],
+                          json.loads(row['error']) if row['error'] else None))
+            for row in rows
+        ]
+
+    def save_results(self, job_id: str, results: List[Tuple[int, Dict]]):
+        """
+        Store the outputs for a chunk and move the checkpoint past it
+
+        Args:
+            job_id: Job id
+            results: (seq, output line) per posting; the seqs must be the
+                ones pending_items() returned, in order
+        """
+        errors = sum('error' in output for _, output in results)
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO job_results VALUES (?, ?, ?)",
+                [(job_id, seq, json.dumps(output, ensure_ascii=False)) for seq, output in results]
+            )
+            connection.execute(
+                "UPDATE jobs SET processed = ?, errors = errors + ?, updated = ? WHERE id = ?",
+                (results[-1][0] + 1, errors, time.time(), job_id)
+            )
+
+    def results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        """Outputs of processed postings from sequence number `offset` on, in order"""
+        rows = self._connection().execute(
+            "SELECT output FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+            (job_id, offset, limit)
+        ).fetchall()
+        return [json.loads(row['output']) for row in rows]
+
+    def delete_job(self, job_id: str) -> bool:
+        """Remove a job with its inputs and results; False if it did not exist"""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            connection.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+            return connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount > 0
@@ -0,0 +1,39 @@
+"""
+JSON Encoding
+Response and NDJSON encoding with orjson when it is installed, falling back
+to the json module with the same compact output
+"""
+import json
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson  # Optional, several times faster than json: pip install orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Plain Python value for numpy scalars and arrays"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, separators=(',', ':'), default=_default
+    ).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps()"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,128 @@
+"""
+Literal Prefilter Index
+Find required keywords once per text so regexes that cannot match are skipped
+"""
+import re
+from typing import FrozenSet, Iterable, Optional, Set
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # pragma: no cover
+    import sre_parse
+    import sre_constants
+
+try:
+    import ahocorasick  # Optional: pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, 'POSSESSIVE_REPEAT'):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+# Character sets with more members than this are not worth indexing
+_MAX_SET_LITERALS = 4
+
+
+def required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Find lowercase literals of which at least one appears in every match
+
+    For '(?:registration|processing)\\s+fee' this is {'fee'}; for
+    '(?:whatsapp|telegram)\\s+only' it is {'whatsapp', 'telegram'}.
+
+    Returns:
+        Set of literals, or None if the pattern has no usable anchor
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    return _required(parsed)
+
+
+def _selectivity(literals: FrozenSet[str]):
+    """Rank anchor sets: longer shortest literal first, then fewer alternatives"""
+    return (min(len(literal) for literal in literals), -len(literals))
+
+
+def _required(items) -> Optional[FrozenSet[str]]:
+    candidates = []
+    run = []
+
+    def flush():
+        if run:
+            candidates.append(frozenset({''.join(run)}))
+            run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+
+        if op in _REPEATS:
+            min_count, max_count, item = av
+            if min_count >= 1 and len(item) == 1 and item[0][0] is sre_constants.LITERAL:
+                # 'a{2,}' / '!+' contribute their mandatory repetitions to the run
+                run.append(chr(item[0][1]) * min(min_count, 16))
+                if max_count != min_count:
+                    flush()
+                continue
+            flush()
+            if min_count >= 1:
+                candidates.append(_required(item))
+            continue
+
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            candidates.append(_required(av[-1]))
+        elif op is sre_constants.BRANCH:
+            branches = [_required(branch) for branch in av[1]]
+            if all(branches):
+                candidates.append(frozenset().union(*branches))
+        elif op is sre_constants.IN:
+            if len(av) <= _MAX_SET_LITERALS and all(kind is sre_constants.LITERAL for kind, _ in av):
+                candidates.append(frozenset(chr(value) for _, value in av))
+    flush()
+
+    usable = []
+    for literals in candidates:
+        if not literals:
+            continue
+        lowered = frozenset(literal.lower() for literal in literals)
+        # Non-ASCII letters have special case-folding rules; don't rely on them
+        if any(char.isalpha() and not char.isascii() for literal in lowered for char in literal):
+            continue
+        usable.append(lowered)
+
+    if not usable:
+        return None
+    return max(usable, key=_selectivity)
+
+
+class LiteralIndex:
+    """Multi-literal matcher that reports which literals occur in a text"""
+
+    def __init__(self, literals: Iterable[str]):
+        self.literals = frozenset(literals)
+        self._automaton = None
+
+        if not self.literals:
+            return
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for literal in self.literals:
+                automaton.add_word(literal, literal)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find(self, text_lower: str) -> Set[str]:
+        """Return the set of indexed literals occurring in lowercased text"""
+        if self._automaton is not None:
+            return {literal for _, literal in self._automaton.iter(text_lower)}
+
+        # Without pyahocorasick, substring checks beat a regex alternation:
+        # each one is a C-level fast search, the alternation steps every position
+        return {literal for literal in self.literals if literal in text_lower}
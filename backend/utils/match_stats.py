@@ -0,0 +1,94 @@
+"""
+Match Statistics
+Per-rule and per-feature-group counters for evaluations, hits and time spent
+"""
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from backend.config import settings
+
+# (name, hit, elapsed_ns); hit is None when the prefilter skipped the pattern
+Sample = Tuple[str, Optional[bool], int]
+
+
+class MatchStats:
+    """
+    Thread-safe counters keyed by rule or feature name
+
+    Callers collect samples for one evaluation and merge them with a single
+    record() call, so the lock is taken once per request, not once per rule.
+    When disabled, engines skip timing entirely.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, list] = {}
+
+    def record(self, samples: Iterable[Sample]):
+        """Merge samples from one evaluation"""
+        with self._lock:
+            for name, hit, elapsed_ns in samples:
+                counter = self._counters.get(name)
+                if counter is None:
+                    # evaluations, skipped, hits, total_ns, max_ns
+                    counter = self._counters[name] = [0, 0, 0, 0, 0]
+                if hit is None:
+                    counter[1] += 1
+                    continue
+                counter[0] += 1
+                counter[2] += hit
+                counter[3] += elapsed_ns
+                if elapsed_ns > counter[4]:
+                    counter[4] = elapsed_ns
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Counters per name, slowest (by total time) first"""
+        with self._lock:
+            items = [(name, list(counter)) for name, counter in self._counters.items()]
+
+        result = {}
+        for name, (evaluations, skipped, hits, total_ns, max_ns) in sorted(
+            items, key=lambda item: item[1][3], reverse=True
+        ):
+            result[name] = {
+                'evaluations': evaluations,
+                'skipped': skipped,
+                'hits': hits,
+                'hit_rate': hits / evaluations if evaluations else 0.0,
+                'total_ns': total_ns,
+                'mean_ns': total_ns // evaluations if evaluations else 0,
+                'max_ns': max_ns,
+            }
+        return result
+
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self._counters.clear()
+
+
+# Shared across rule pack reloads so counters survive a hot swap
+rule_stats = MatchStats(enabled=settings.RULE_STATS_ENABLED)
+feature_stats = MatchStats(enabled=settings.RULE_STATS_ENABLED)
+
+
+def get_match_stats() -> Dict:
+    """Rule and feature-group counters collected so far"""
+    return {
+        'enabled': rule_stats.enabled or feature_stats.enabled,
+        'rules': rule_stats.snapshot(),
+        'features': feature_stats.snapshot(),
+    }
+
+
+def set_match_stats_enabled(enabled: bool):
+    """Turn counting on or off for rules and feature groups"""
+    rule_stats.enabled = enabled
+    feature_stats.enabled = enabled
+
+
+def reset_match_stats():
+    """Clear rule and feature-group counters"""
+    rule_stats.reset()
+    feature_stats.reset()
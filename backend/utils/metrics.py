@@ -0,0 +1,289 @@
+"""
+Metrics
+Counters and histograms rendered in the Prometheus text exposition format,
+plus the ASGI middleware that times every request
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+
+# Seconds; per-request latencies
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds; single analysis stages take microseconds to milliseconds
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric family with fixed label names"""
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._sample_lines())
+        return lines
+
+    def _sample_lines(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class ShardedMetric(Metric):
+    """
+    Metric whose values are kept per thread
+
+    Each thread only ever writes its own shard, so updates take no lock;
+    scrapes add the shards up. Shards of finished threads are kept, so
+    totals never go down.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+
+    def _new_shard(self) -> dict:
+        """Create the calling thread's shard (callers try self._local.shard first)"""
+        shard = self._local.shard = {}
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def _shard_items(self) -> List[Tuple[Labels, object]]:
+        with self._lock:
+            shards = list(self._shards)
+        # list(dict.items()) copies without letting other threads run
+        return [item for shard in shards for item in list(shard.items())]
+
+
+class Counter(ShardedMetric):
+    """Monotonic count per label set"""
+    kind = 'counter'
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        """Totals per label set"""
+        totals: Dict[Labels, float] = {}
+        for labels, value in self._shard_items():
+            totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def _sample_lines(self) -> Iterable[str]:
+        for labels, value in self.values().items():
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram(ShardedMetric):
+    """
+    Bucketed observations per label set
+
+    Buckets are kept non-cumulative so observe() touches one counter;
+    they are accumulated when rendered.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = (), count: int = 1):
+        """
+        Record `count` observations of `value`
+
+        A batch step that took T seconds for n postings can be recorded as
+        observe(T / n, count=n), one per-posting sample each.
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        series = shard.get(labels)
+        if series is None:
+            # Bucket counts (the last one is +Inf), then the sum
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += count
+        series[-1] += value * count
+
+    def series(self) -> Dict[Labels, list]:
+        """Non-cumulative bucket counts plus sum, per label set"""
+        totals: Dict[Labels, list] = {}
+        for labels, series in self._shard_items():
+            total = totals.get(labels)
+            if total is None:
+                totals[labels] = list(series)
+            else:
+                totals[labels] = [a + b for a, b in zip(total, series)]
+        return totals
+
+    def snapshot(self, labels: Labels = ()) -> Tuple[int, float]:
+        """(count, sum) for one label set"""
+        series = self.series().get(labels)
+        if series is None:
+            return 0, 0.0
+        return sum(series[:-1]), series[-1]
+
+    def _sample_lines(self) -> Iterable[str]:
+        for labels, series in self.series().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                label_text = _label_text(self.labelnames, labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = _label_text(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_number(series[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class CallbackMetric(Metric):
+    """Values read from a callback at scrape time, so the hot path pays nothing"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Labels, float]], kind: str = 'gauge'):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+            callback: Returns {label values: value}
+            kind: "gauge" or "counter" (for totals kept elsewhere)
+        """
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def _sample_lines(self) -> Iterable[str]:
+        for labels, value in self.callback().items():
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}"
+
+
+class Registry:
+    """Metric families in registration order"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, replacing one registered under the same name"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_count = registry.register(Counter(
+    'http_requests_total', 'HTTP requests by route and status', ('method', 'endpoint', 'status')
+))
+request_seconds = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('method', 'endpoint'),
+    buckets=REQUEST_BUCKETS
+))
+# Per posting: batch steps are recorded as one sample per posting (see Histogram.observe)
+stage_seconds = registry.register(Histogram(
+    'analysis_stage_duration_seconds', 'Time per posting in each analysis stage', ('stage',),
+    buckets=STAGE_BUCKETS
+))
+predictions = registry.register(Counter(
+    'predictions_total', 'Analysis results served by prediction label', ('label',)
+))
+
+
+class StageClock:
+    """
+    Times consecutive analysis stages into stage_seconds
+
+    Each lap() records the time since the previous lap (or creation), so
+    back-to-back stages cost one perf_counter() call each.
+    """
+
+    def __init__(self, postings: int = 1):
+        """
+        Args:
+            postings: Postings handled by each stage, for per-posting samples
+        """
+        self.postings = max(1, postings)
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        stage_seconds.observe((now - self.last) / self.postings, (stage,), self.postings)
+        self.last = now
+
+
+class MetricsMiddleware:
+    """
+    Counts and times every HTTP request by method, route template and status
+
+    Plain ASGI rather than BaseHTTPMiddleware, which would add a task and
+    a stream copy per request. Routes are labelled by their path template
+    (/jobs/{job_id}), so labels stay bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            endpoint = getattr(route, 'path', 'unmatched')
+            method = scope['method']
+            request_seconds.observe(time.perf_counter() - start, (method, endpoint))
+            request_count.inc((method, endpoint, str(status)))
@@ -0,0 +1,124 @@
+"""
+Micro-Batcher
+Coalesces concurrent single-item requests into one batched call and fans
+the results back out to the waiting requests
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects items submitted concurrently on the event loop into batches
+
+    While traffic is serial (the previous batch held one item and nothing is
+    pending or running), an item is dispatched at once, so a lone client
+    never waits. Otherwise the first item of a batch waits at most
+    `max_wait_ms` for others, and a batch is dispatched as soon as it holds
+    `max_size` items. Batches run concurrently with each other, so a slow
+    batch does not hold up the next one.
+
+    A result that is an exception is raised in its own request only; if the
+    handler itself raises, every request in the batch gets the error.
+    """
+
+    def __init__(self, handler: Callable[[List], Awaitable[List]], max_size: int = 32,
+                 max_wait_ms: float = 2.0):
+        """
+        Args:
+            handler: Async function mapping a list of items to a list of
+                results in the same order (an exception instance fails
+                only its item)
+            max_size: Max items per batch (1 = call the handler per item)
+            max_wait_ms: Max time an item waits for the batch to fill
+        """
+        self.handler = handler
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1e3
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+        self._pending: List[tuple] = []  # (item, future)
+        self._running = 0  # Items in dispatched batches that haven't finished
+        self._last_size = 1  # Items in the last dispatched batch
+        self._timer = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item):
+        """Add an item to the next batch and wait for its result"""
+        if self.max_size == 1:
+            self._count(1)
+            result = (await self.handler([item]))[0]
+            if isinstance(result, BaseException):
+                raise result
+            return result
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        serial = self._last_size == 1 and len(self._pending) == 1 and not self._running
+        if len(self._pending) >= self.max_size or serial:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _count(self, size: int):
+        self.batches += 1
+        self.items += size
+        self.largest = max(self.largest, size)
+
+    def _flush(self):
+        """Dispatch the pending items as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self._count(len(batch))
+        self._running += len(batch)
+        self._last_size = len(batch)
+        task = asyncio.ensure_future(self._run(batch))
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]):
+        error = None
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as e:
+            error = e
+        except BaseException:
+            for _, future in batch:
+                future.cancel()
+            raise
+        finally:
+            self._running -= len(batch)
+
+        for index, (_, future) in enumerate(batch):
+            # Requests whose client went away are cancelled; their result is dropped
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            elif isinstance(results[index], BaseException):
+                future.set_exception(results[index])
+            else:
+                future.set_result(results[index])
+
+    def stats(self) -> Dict:
+        """Batch counts and sizes since start"""
+        return {
+            'max_size': self.max_size,
+            'max_wait_ms': self.max_wait * 1e3,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_size': self.items / self.batches if self.batches else 0.0,
+            'largest': self.largest,
+            'pending': len(self._pending),
+        }
@@ -0,0 +1,171 @@
+"""
+Model Artifact
+Directory format for trained models whose numeric arrays are memory-mapped,
+so worker processes share one copy of them through the page cache
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+SKELETON_FILE = "model.pkl"
+ARRAY_FILE = "arrays.bin"
+
+# Arrays smaller than a page are cheaper to keep inside the pickle
+MMAP_MIN_BYTES = 4096
+
+# Array offsets in ARRAY_FILE are aligned for vectorized reads
+_ALIGNMENT = 64
+
+
+class _ArrayPickler(pickle.Pickler):
+    """Pickler that appends large numeric arrays to one binary file instead of the stream"""
+
+    def __init__(self, file, array_file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.array_file = array_file
+        self.arrays = 0
+        self._saved: Dict[int, tuple] = {}  # id(array) -> (persistent id, array)
+
+    def persistent_id(self, obj):
+        if not isinstance(obj, np.ndarray):
+            return None
+        if obj.dtype.hasobject or obj.nbytes < MMAP_MIN_BYTES:
+            return None
+
+        saved = self._saved.get(id(obj))
+        if saved is None:
+            offset = self.array_file.tell()
+            padding = -offset % _ALIGNMENT
+            self.array_file.write(b'\0' * padding)
+            data = np.ascontiguousarray(obj)
+            self.array_file.write(data.tobytes())
+            self.arrays += 1
+            # Keep the array alive so its id() is not reused during this dump
+            saved = self._saved[id(obj)] = (
+                ('ndarray', offset + padding, data.dtype, data.shape), obj
+            )
+        return saved[0]
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """Unpickler that returns arrays written by _ArrayPickler as views of one buffer"""
+
+    def __init__(self, file, buffer: np.ndarray):
+        super().__init__(file)
+        self.buffer = buffer
+
+    def persistent_load(self, pid):
+        kind, offset, dtype, shape = pid
+        if kind != 'ndarray':
+            raise pickle.UnpicklingError(f"Unknown persistent id {kind!r}")
+        size = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        return self.buffer[offset:offset + size].view(dtype).reshape(shape)
+
+
+def _hash_files(directory: str, names: List[str]) -> str:
+    """sha256[:16] over the given files in order"""
+    digest = hashlib.sha256()
+    for name in names:
+        with open(os.path.join(directory, name), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def is_model_artifact(path: str) -> bool:
+    """Check whether `path` is an artifact directory written by save_model_artifact"""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def save_model_artifact(model_data: Dict, path: str) -> str:
+    """
+    Write `model_data` as an artifact directory
+
+    Numeric arrays of at least MMAP_MIN_BYTES go to arrays.bin; everything
+    else (estimator objects, vocabulary) is pickled in model.pkl with
+    offsets into that file. The directory is written next to `path` and
+    swapped in with a rename, so readers never see a partial artifact;
+    processes that mapped the old files keep reading them until they reload.
+
+    Args:
+        model_data: Dict with 'model' and 'vectorizer' (as in the pickle format)
+        path: Artifact directory to create or replace
+
+    Returns:
+        Content version (sha256[:16] of all artifact files)
+    """
+    path = os.path.normpath(path)
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    with open(os.path.join(staging, ARRAY_FILE), 'wb') as array_file, \
+            open(os.path.join(staging, SKELETON_FILE), 'wb') as skeleton:
+        pickler = _ArrayPickler(skeleton, array_file)
+        pickler.dump(model_data)
+        array_bytes = array_file.tell()
+
+    version = _hash_files(staging, [SKELETON_FILE, ARRAY_FILE])
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump({
+            'format': ARTIFACT_FORMAT,
+            'version': version,
+            'arrays': pickler.arrays,
+            'array_bytes': array_bytes,
+        }, f, indent=2)
+
+    previous = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, previous)
+    os.rename(staging, path)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    logger.info(f"Model artifact {version} written to {path} ({pickler.arrays} arrays)")
+    return version
+
+
+def load_model_artifact(path: str, mmap: bool = True) -> Dict:
+    """
+    Load an artifact directory
+
+    Args:
+        path: Directory written by save_model_artifact
+        mmap: Map arrays read-only instead of reading them into memory
+
+    Returns:
+        The saved dict, with 'version' set from the manifest
+
+    Raises:
+        ValueError: if the directory is not an artifact of a supported format
+    """
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Not a model artifact: {path} ({e})")
+    if manifest.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported model artifact format {manifest.get('format')!r} in {path}")
+
+    array_path = os.path.join(path, ARRAY_FILE)
+    if not manifest['array_bytes']:
+        buffer = np.zeros(0, dtype=np.uint8)  # np.memmap cannot map an empty file
+    elif mmap:
+        buffer = np.memmap(array_path, dtype=np.uint8, mode='r')
+    else:
+        buffer = np.fromfile(array_path, dtype=np.uint8)
+
+    with open(os.path.join(path, SKELETON_FILE), 'rb') as f:
+        model_data = _ArrayUnpickler(f, buffer).load()
+
+    model_data.setdefault('version', manifest['version'])
+    return model_data
@@ -0,0 +1,112 @@
+"""
+NDJSON Streams
+Incremental reading of newline-delimited JSON request bodies with a bounded
+line buffer, and encoding of result lines
+"""
+import json
+import logging
+from typing import AsyncIterator, List, Tuple
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from backend.utils.json_codec import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class NDJSONLineError(ValueError):
+    """One line of the stream could not be used; the rest of the stream is unaffected"""
+
+
+async def read_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Parse an NDJSON byte stream one line at a time
+
+    At most `max_line_bytes` of a line are buffered: a longer line is skipped
+    up to its newline and reported as an error instead of being read into
+    memory. Blank lines are ignored but still counted.
+
+    Args:
+        chunks: Byte chunks as they arrive (split anywhere, even mid-character)
+        max_line_bytes: Longest line accepted, excluding the newline
+
+    Yields:
+        (1-based line number, parsed value or NDJSONLineError)
+    """
+    buffer = bytearray()
+    line_number = 0
+    skipping = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end == -1:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        skipping = True
+                        buffer.clear()
+                break
+
+            line_number += 1
+            if skipping:
+                skipping = False
+                yield line_number, NDJSONLineError(f"Line is longer than {max_line_bytes} bytes")
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield line_number, NDJSONLineError(f"Line is longer than {max_line_bytes} bytes")
+                elif buffer.strip():
+                    yield line_number, _parse(buffer)
+            buffer.clear()
+            start = end + 1
+
+    # Last line without a trailing newline
+    if skipping:
+        yield line_number + 1, NDJSONLineError(f"Line is longer than {max_line_bytes} bytes")
+    elif buffer.strip():
+        yield line_number + 1, _parse(buffer)
+
+
+def _parse(line: bytearray) -> object:
+    try:
+        return json.loads(line)
+    except ValueError as e:  # Invalid JSON or UTF-8
+        return NDJSONLineError(f"Invalid JSON: {e}")
+
+
+async def batched(items: AsyncIterator, size: int) -> AsyncIterator[List]:
+    """Group an async iterator into lists of up to `size` items"""
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def encode_line(value: dict) -> bytes:
+    """One NDJSON output line"""
+    return dumps(value) + b'\n'
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming NDJSON response whose body iterator may read the request body
+
+    StreamingResponse listens for the client disconnecting by calling
+    receive() alongside the body iterator, which would steal request body
+    messages from a body iterator reading request.stream(). Here the body
+    iterator is the only reader: a disconnect while the request is still
+    uploading surfaces as ClientDisconnect from request.stream().
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,248 @@
+"""
+Near-Duplicate Index
+SimHash fingerprints of analyzed postings with a bounded, persistent lookup
+table for reposts that differ only by small edits
+"""
+import hashlib
+import logging
+import os
+import string
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# How a near-duplicate's stored ML score is used: instead of the model, or
+# averaged with it
+NEAR_DUPLICATE_MODES = ('reuse', 'blend')
+
+# Postings with fewer shingles than this give unstable fingerprints
+MIN_SHINGLES = 8
+
+# Word 3-grams; digits are dropped so edited phone numbers and amounts still match
+_SHINGLE_SIZE = 3
+_NORMALIZE = str.maketrans(string.punctuation, ' ' * len(string.punctuation), string.digits)
+
+# Odd multipliers combining the three word hashes of a shingle
+_K1 = np.uint64(0x9E3779B97F4A7C15)
+_K2 = np.uint64(0xC2B2AE3D27D4EB4F)
+
+# Bucket heads per block; wider blocks (max_distance < 3) are hashed down to
+# this many bits so the table stays at most 256 KiB per block
+HEAD_BITS = 16
+_FIBONACCI = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+# Word hashes are cached; cleared when it grows past this many words
+_WORD_CACHE_SIZE = 1 << 18
+_word_hashes: Dict[str, int] = {}
+
+
+
+def _word_hash(word: str) -> int:
+    """Stable 64-bit hash of a word (Python's hash() changes between processes)"""
+    value = _word_hashes.get(word)
+    if value is None:
+        if len(_word_hashes) >= _WORD_CACHE_SIZE:
+            _word_hashes.clear()
+        digest = hashlib.blake2b(word.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+        value = _word_hashes[word] = int.from_bytes(digest, 'little')
+    return value
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word 3-shingles
+
+    Texts with a small edit differ in few bits; similarity is
+    1 - hamming_distance / 64.
+
+    Returns:
+        Fingerprint, or None if the text is too short to fingerprint
+    """
+    words = text.lower().translate(_NORMALIZE).split()
+    if len(words) < MIN_SHINGLES + _SHINGLE_SIZE - 1:
+        return None
+
+    hashes = list(map(_word_hashes.get, words))
+    if None in hashes:
+        hashes = [_word_hash(word) for word in words]
+    hashes = np.array(hashes, dtype=np.uint64)
+    # Word hashes are uniformly random, so each shingle hash is too (array
+    # arithmetic wraps mod 2**64)
+    shingles = hashes[:-2] * _K1 + hashes[1:-1] * _K2 + hashes[2:]
+
+    # Bit i of the fingerprint is set when most shingle hashes have bit i set
+    bits = np.unpackbits(shingles.astype('<u8').view(np.uint8), bitorder='little')
+    majority = bits.reshape(-1, FINGERPRINT_BITS).sum(axis=0, dtype=np.uint32) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority, bitorder='little').tobytes(), 'little')
+
+
+def max_distance_for(threshold: float) -> int:
+    """Largest Hamming distance whose similarity is at least `threshold`"""
+    return int((1 - threshold) * FINGERPRINT_BITS + 1e-9)
+
+
+def similarity(first: int, second: int) -> float:
+    """Fraction of equal fingerprint bits"""
+    return 1 - (first ^ second).bit_count() / FINGERPRINT_BITS
+
+
+class NearDuplicateIndex:
+    """
+    Fixed-capacity table of fingerprints with a value per posting
+
+    The fingerprint is split into max_distance + 1 blocks; two fingerprints
+    within max_distance bits share at least one block exactly, so a lookup
+    only compares entries in the same block buckets. Blocks wider than
+    HEAD_BITS are hashed into 2**HEAD_BITS buckets, so a bucket may also hold
+    other block values; every candidate's full fingerprint is compared. Each
+    bucket is a linked chain through preallocated arrays, and slots are
+    reused oldest-first, so memory never grows past `capacity` entries.
+    """
+
+    def __init__(self, capacity: int = 100000, max_distance: int = 3, version: str = ""):
+        """
+        Args:
+            capacity: Postings kept; the oldest is evicted beyond this
+            max_distance: Largest Hamming distance treated as a near-duplicate
+            version: Tag for what the stored values mean (e.g. model version)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 <= max_distance < 16:
+            raise ValueError("max_distance must be between 0 and 15")
+
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.version = version
+        self._lock = threading.Lock()
+
+        blocks = max_distance + 1
+        widths = [FINGERPRINT_BITS // blocks + (1 if i < FINGERPRINT_BITS % blocks else 0)
+                  for i in range(blocks)]
+        shifts = np.cumsum([0] + widths[:-1])
+        self._blocks = [(int(shift), (1 << width) - 1, width > HEAD_BITS)
+                        for shift, width in zip(shifts, widths)]
+
+        self._fingerprints = np.zeros(capacity, dtype=np.uint64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._sequence = np.full(capacity, -1, dtype=np.int64)
+        self._next = np.full((blocks, capacity), -1, dtype=np.int32)
+        self._heads = np.full((blocks, 1 << min(max(widths), HEAD_BITS)), -1, dtype=np.int32)
+        self._count = 0  # Postings ever added; slot = count % capacity
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index arrays"""
+        return sum(array.nbytes for array in (
+            self._fingerprints, self._values, self._sequence, self._next, self._heads
+        ))
+
+    def _bucket(self, fingerprint: int, block: int) -> int:
+        """Bucket of a fingerprint in one block"""
+        shift, mask, hashed = self._blocks[block]
+        key = (fingerprint >> shift) & mask
+        if hashed:
+            key = ((key * _FIBONACCI) & _MASK64) >> (64 - HEAD_BITS)
+        return key
+
+    def add(self, fingerprint: int, value: float):
+        """Store a posting's fingerprint and value, evicting the oldest when full"""
+        with self._lock:
+            slot = self._count % self.capacity
+            self._fingerprints[slot] = fingerprint
+            self._values[slot] = value
+            self._sequence[slot] = self._count
+            for block in range(len(self._blocks)):
+                key = self._bucket(fingerprint, block)
+                self._next[block, slot] = self._heads[block, key]
+                self._heads[block, key] = slot
+            self._count += 1
+
+    def lookup(self, fingerprint: int) -> Optional[Tuple[float, float]]:
+        """
+        Closest stored posting within max_distance bits
+
+        Returns:
+            (similarity, value) or None
+        """
+        candidates = []
+        with self._lock:
+            fingerprints = self._fingerprints
+            sequence = self._sequence
+            for block in range(len(self._blocks)):
+                key = self._bucket(fingerprint, block)
+                chain = self._next[block]
+                slot = self._heads[block, key].item()
+                # A head slot reused for another bucket means the chain was evicted
+                if slot < 0 or self._bucket(fingerprints.item(slot), block) != key:
+                    continue
+                while True:
+                    candidates.append(slot)
+                    following = chain.item(slot)
+                    # Links always point at older entries; a newer one was reused after eviction
+                    if following < 0 or sequence.item(following) > sequence.item(slot):
+                        break
+                    slot = following
+            
+            if not candidates:
+                return None
+            slots = np.array(candidates, dtype=np.intp)
+            differing = np.unpackbits(
+                (fingerprints[slots] ^ np.uint64(fingerprint)).astype('<u8').view(np.uint8)
+            ).reshape(len(slots), -1).sum(axis=1)
+            best = int(differing.argmin())
+            if differing[best] > self.max_distance:
+                return None
+            return 1 - int(differing[best]) / FINGERPRINT_BITS, self._values.item(slots[best])
+    
+    def save(self, path: str):
+        """Write the index to `path` (.npz), replacing any previous file atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with self._lock:
+            with open(temporary, 'wb') as f:
+                np.savez(
+                    f,
+                    fingerprints=self._fingerprints, values=self._values,
+                    sequence=self._sequence, next=self._next, heads=self._heads,
+                    meta=np.array([self.capacity, self.max_distance, self._count], dtype=np.int64),
+                    version=np.array(self.version),
+                )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        """Read an index written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            capacity, max_distance, count = (int(value) for value in data['meta'])
+            index = cls(capacity, max_distance, str(data['version']))
+            if data['heads'].shape != index._heads.shape:
+                raise ValueError("index was saved with a different bucket layout")
+            index._fingerprints = data['fingerprints']
+            index._values = data['values']
+            index._sequence = data['sequence']
+            index._next = data['next']
+            index._heads = data['heads']
+            index._count = count
+        return index
+
+    def stats(self) -> Dict:
+        """Size and capacity"""
+        return {
+            'entries': len(self),
+            'capacity': self.capacity,
+            'max_distance': self.max_distance,
+            'added': self._count,
+            'bytes': self.nbytes,
+        }
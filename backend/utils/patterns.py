@@ -0,0 +1,255 @@
+"""
+Pattern Compilation Utilities
+Compile detection regexes once for matching against lowercased text
+"""
+import logging
+import re
+import time
+from typing import List, Optional, Set
+from backend.utils.literal_index import required_literals, sre_constants, sre_parse
+
+try:
+    import re2  # Optional linear-time engine: pip install google-re2
+except ImportError:
+    re2 = None
+
+logger = logging.getLogger(__name__)
+
+# Characters that survive str.lower() but still match an ASCII letter under
+# re.IGNORECASE (dotless i, long s). Texts containing them take the slow path.
+_CASEFOLD_EXCEPTIONS = ('ı', 'ſ')
+
+# Letter escapes whose meaning does not depend on case-insensitive matching
+_SAFE_LETTER_ESCAPES = set('sSdDwWbBAZ')
+
+# Inline flag groups such as (?-i:...) change case sensitivity mid-pattern
+_INLINE_FLAGS = re.compile(r'\(\?[aiLmsux-]')
+
+# Unbounded wildcard spans: .* .+ .{n,} (optionally lazy)
+_WILDCARD_SPAN = re.compile(r'\.(?:\*|\+|\{(\d+),\})')
+
+# RE2 rejects counted repetitions above this
+_RE2_MAX_REPEAT = 1000
+
+REGEX_ENGINES = ('re', 're2')
+
+
+def lowercase_offsets(text: str, text_lower: str) -> Optional[List[int]]:
+    """
+    Map offsets in text.lower() back to text
+
+    Returns:
+        None when lowercasing kept every offset (the usual case), otherwise a
+        list with the index in `text` of each character of `text_lower`
+    """
+    if len(text_lower) == len(text):
+        return None
+    offsets = []
+    for index, char in enumerate(text):
+        offsets.extend([index] * len(char.lower()))  # 'İ' lowercases to two chars
+    return offsets
+
+
+def bound_wildcards(pattern: str, window: int) -> str:
+    """
+    Cap unbounded wildcard spans at `window` characters
+
+    'pay.*\\$\\d+' becomes 'pay.{0,200}\\$\\d+' for window=200, so the two parts
+    of the pattern must occur close together and a failed match backtracks
+    over at most `window` characters instead of the rest of the text.
+    """
+    if window <= 0:
+        return pattern
+
+    bounded = []
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            bounded.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '.':
+            span = _WILDCARD_SPAN.match(pattern, i)
+            if span:
+                token = span.group()
+                minimum = 0 if token == '.*' else 1 if token == '.+' else int(span.group(1))
+                bounded.append('.{%d,%d}' % (minimum, max(window, minimum)))
+                i = span.end()
+                continue
+        bounded.append(char)
+        i += 1
+    return ''.join(bounded)
+
+
+def fold_pattern_case(pattern: str) -> Optional[str]:
+    """
+    Lowercase the literal characters of a regex pattern
+
+    Matching the folded pattern without re.IGNORECASE against lowercased text
+    finds the same matches as the original pattern with re.IGNORECASE, but
+    lets the regex engine use its literal-prefix fast search.
+
+    Returns:
+        Folded pattern, or None if the pattern cannot be folded safely
+    """
+    if _INLINE_FLAGS.search(pattern):
+        return None
+
+    folded = []
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == '\\':
+            # Escapes keep their case: \S, \D, \W, \B mean something else lowercased
+            escape = pattern[i + 1:i + 2]
+            if escape.isalnum() and escape not in _SAFE_LETTER_ESCAPES:
+                return None  # \x41, \u0041, \1 ... may spell out uppercase letters
+            folded.append(pattern[i:i + 2])
+            i += 2
+        elif pattern[i].isalpha() and not pattern[i].isascii():
+            return None  # Non-ASCII letters have special case-folding rules
+        else:
+            folded.append(pattern[i].lower())
+            i += 1
+    return ''.join(folded)
+
+
+def is_position_independent(pattern: str) -> bool:
+    """
+    Check that a pattern matches the same way inside a longer string
+
+    False for patterns with ^, $, \\A, \\Z or lookarounds, whose matches depend
+    on what surrounds the text; those cannot be searched across joined documents.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return False
+
+    def independent(items) -> bool:
+        for op, av in items:
+            if op is sre_constants.AT and av not in (
+                sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY
+            ):
+                return False
+            if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                return False  # Lookarounds can see past the end of the document
+            if op is sre_constants.SUBPATTERN:
+                if not independent(av[-1]):
+                    return False
+            elif op is sre_constants.BRANCH:
+                if not all(independent(branch) for branch in av[1]):
+                    return False
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) or (
+                op is getattr(sre_constants, 'POSSESSIVE_REPEAT', None)
+            ):
+                if not independent(av[2]):
+                    return False
+            elif op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+                if not independent(av):
+                    return False
+            elif op is sre_constants.GROUPREF_EXISTS:
+                if not independent(av[1]) or (av[2] is not None and not independent(av[2])):
+                    return False
+        return True
+
+    return independent(parsed)
+
+
+def needs_ignorecase(text_lower: str) -> bool:
+    """Check if lowercased text contains characters only IGNORECASE matching handles"""
+    for char in _CASEFOLD_EXCEPTIONS:
+        if char in text_lower:
+            return True
+    return False
+
+
+def resolve_engine(engine: str) -> str:
+    """Validate a regex engine name, falling back to 're' if RE2 is unavailable"""
+    if engine not in REGEX_ENGINES:
+        raise ValueError(f"Unknown regex engine {engine!r}, expected one of {REGEX_ENGINES}")
+    if engine == 're2' and re2 is None:
+        logger.warning("google-re2 is not installed; falling back to the re engine")
+        return 're'
+    return engine
+
+
+def _compile(pattern: str, ignorecase: bool, engine: str):
+    """Compile with the requested engine, falling back to re for unsupported syntax"""
+    if engine == 're2' and re2 is not None:
+        try:
+            return re2.compile('(?i)' + pattern if ignorecase else pattern)
+        except re2.error:
+            logger.debug(f"RE2 cannot compile {pattern!r}; using re")
+    return re.compile(pattern, re.IGNORECASE if ignorecase else 0)
+
+
+def match_deadline(budget_ms: float) -> Optional[float]:
+    """perf_counter() value after which matching should stop, or None for no budget"""
+    if budget_ms and budget_ms > 0:
+        return time.perf_counter() + budget_ms / 1000
+    return None
+
+
+def deadline_passed(deadline: Optional[float]) -> bool:
+    """Check a deadline returned by match_deadline()"""
+    return deadline is not None and time.perf_counter() > deadline
+
+
+class CompiledPattern:
+    """A detection regex compiled once for case-insensitive matching"""
+
+    __slots__ = ('pattern', 'key', 'regex', 'fallback', 'anchors', 'position_independent')
+
+    def __init__(self, pattern: str, window: int = 0, engine: str = 're'):
+        """
+        Args:
+            pattern: Regex written for re.IGNORECASE matching
+            window: Cap for wildcard spans in characters (0 = unbounded)
+            engine: 're' or 're2' (linear time, needs google-re2)
+        """
+        self.pattern = pattern
+        self.anchors = required_literals(pattern)
+        self.position_independent = is_position_independent(pattern)
+
+        if engine == 're2' and window:
+            window = min(window, _RE2_MAX_REPEAT)
+        source = bound_wildcards(pattern, window)
+        # Patterns with equal keys always find the same matches
+        self.key = (source, engine)
+        self.fallback = _compile(source, True, engine)
+
+        folded = fold_pattern_case(source)
+        try:
+            self.regex = _compile(folded, False, engine) if folded is not None else self.fallback
+        except re.error:
+            self.regex = self.fallback
+
+    def search(self, text_lower: str, exact_case: bool = False):
+        """
+        Find the first match in lowercased text
+
+        Args:
+            text_lower: Text already passed through str.lower()
+            exact_case: Use the IGNORECASE regex (see needs_ignorecase)
+        """
+        if exact_case:
+            return self.fallback.search(text_lower)
+        return self.regex.search(text_lower)
+
+    def could_match(self, found_literals: Optional[Set[str]]) -> bool:
+        """
+        Check the literal prefilter before running the regex
+
+        Args:
+            found_literals: Literals a LiteralIndex found in the text, or None
+                to disable prefiltering
+        """
+        if found_literals is None or self.anchors is None:
+            return True
+        return not self.anchors.isdisjoint(found_literals)
@@ -0,0 +1,223 @@
+"""
+Report Store
+Scam reports persisted to SQLite by a background writer, so a burst of
+reports never waits on the disk, and read back for retraining
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Iterator, List, Optional
+
+from backend.utils.result_cache import content_key
+
+logger = logging.getLogger(__name__)
+
+# Reports written per SQLite transaction
+WRITE_BATCH = 256
+
+# Attempts per batch before its reports are dropped, and seconds between them
+WRITE_RETRIES = 3
+RETRY_DELAY = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    content_hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    url TEXT,
+    user_feedback TEXT,
+    first_reported REAL NOT NULL,
+    last_reported REAL NOT NULL,
+    report_count INTEGER NOT NULL
+)
+"""
+
+# A repeat report bumps the count and fills in a URL or feedback the first one lacked
+_UPSERT = """
+INSERT INTO reports VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (content_hash) DO UPDATE SET
+    url = COALESCE(url, excluded.url),
+    user_feedback = COALESCE(user_feedback, excluded.user_feedback),
+    last_reported = MAX(last_reported, excluded.last_reported),
+    report_count = report_count + excluded.report_count
+"""
+
+_STOP = object()
+
+
+def report_key(text: str) -> str:
+    """Content hash of a reported posting; whitespace and case are ignored"""
+    return content_key(' '.join(text.split()).casefold())
+
+
+class ReportStore:
+    """
+    Write-behind buffer in front of a SQLite table of reports
+
+    submit() only puts the report on a bounded queue. One daemon thread
+    takes whatever has queued up (up to WRITE_BATCH reports), merges
+    repeats of the same posting and commits them in one transaction, so
+    under load many reports share one fsync. Reports are keyed by
+    report_key(); a posting reported again is stored once with its
+    report count raised.
+
+    close() writes everything still queued; reports only in the queue are
+    lost if the process is killed.
+    """
+
+    def __init__(self, path: str, queue_size: int = 10000):
+        """
+        Args:
+            path: SQLite file (created with its directory if missing)
+            queue_size: Max reports waiting to be written; more are refused
+        """
+        self.path = path
+        self.submitted = 0
+        self.refused = 0
+        self.written = 0
+        self.duplicates = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(sqlite3.connect(path)) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")  # Exports don't block the writer
+            connection.execute(_SCHEMA)
+
+        self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, url: Optional[str] = None, user_feedback: Optional[str] = None) -> bool:
+        """
+        Queue a report for writing
+
+        Returns:
+            False if the queue was full and the report was refused
+        """
+        try:
+            self._queue.put_nowait((time.time(), text, url, user_feedback))
+        except queue.Full:
+            with self._lock:
+                self.refused += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    @staticmethod
+    def _merge(items: List[tuple]) -> List[tuple]:
+        """One upsert row per distinct posting in a batch"""
+        rows: Dict[str, list] = {}
+        for reported, text, url, user_feedback in items:
+            key = report_key(text)
+            row = rows.get(key)
+            if row is None:
+                rows[key] = [key, text, url, user_feedback, reported, reported, 1]
+            else:
+                row[2] = row[2] or url
+                row[3] = row[3] or user_feedback
+                row[5] = max(row[5], reported)
+                row[6] += 1
+        return [tuple(row) for row in rows.values()]
+
+    def _run(self):
+        """Worker loop: write queued reports in batches"""
+        connection = sqlite3.connect(self.path)
+        try:
+            stopping = False
+            while not stopping:
+                items = [self._queue.get()]
+                while len(items) < WRITE_BATCH:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in items:
+                    stopping = True
+                    items = [item for item in items if item is not _STOP]
+                if items:
+                    self._store(connection, items)
+        finally:
+            connection.close()
+
+    def _store(self, connection: sqlite3.Connection, items: List[tuple]):
+        """Write one batch, retrying transient errors such as a locked database"""
+        rows = self._merge(items)
+        keys = [row[0] for row in rows]
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                with connection:
+                    placeholders = ", ".join("?" * len(keys))
+                    known = connection.execute(
+                        f"SELECT COUNT(*) FROM reports WHERE content_hash IN ({placeholders})", keys
+                    ).fetchone()[0]
+                    connection.executemany(_UPSERT, rows)
+                break
+            except sqlite3.Error as e:
+                if attempt == WRITE_RETRIES:
+                    logger.error(f"Could not write {len(items)} reports to {self.path}: {e}")
+                    with self._lock:
+                        self.errors += len(items)
+                    return
+                logger.warning(f"Report write failed ({e}), retrying in {RETRY_DELAY}s")
+                time.sleep(RETRY_DELAY)
+        with self._lock:
+            self.written += len(items)
+            self.duplicates += len(items) - (len(rows) - known)
+
+    def close(self, timeout: float = 5.0):
+        """Write what is already queued (up to `timeout` seconds) and stop the writer"""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Report queue still full at shutdown; queued reports are lost")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Queue counters plus the number of stored postings and reports"""
+        with self._lock:
+            stats = {
+                'submitted': self.submitted,
+                'refused': self.refused,
+                'written': self.written,
+                'duplicates': self.duplicates,
+                'errors': self.errors,
+                'queued': self._queue.qsize(),
+            }
+        with closing(sqlite3.connect(self.path)) as connection:
+            postings, reports = connection.execute(
+                "SELECT COUNT(*), TOTAL(report_count) FROM reports"
+            ).fetchone()
+        stats.update({'stored_postings': postings, 'stored_reports': int(reports)})
+        return stats
+
+
+def iter_reports(path: str, min_reports: int = 1, since: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Stored reports, oldest first, read a row at a time
+
+    Args:
+        path: Report database written by ReportStore
+        min_reports: Only postings reported at least this many times
+        since: Only postings first reported at or after this Unix time
+
+    Yields:
+        Dicts with text, url, user_feedback, report_count, first_reported
+        and last_reported
+    """
+    with closing(sqlite3.connect(path)) as connection:
+        connection.row_factory = sqlite3.Row
+        cursor = connection.execute(
+            "SELECT text, url, user_feedback, report_count, first_reported, last_reported "
+            "FROM reports WHERE report_count >= ? AND first_reported >= ? ORDER BY rowid",
+            (min_reports, since if since is not None else float('-inf'))
+        )
+        for row in cursor:
+            yield dict(row)
@@ -0,0 +1,92 @@
+"""
+Result Cache
+Bounded LRU cache with TTL for analysis results keyed by content hash
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def content_key(*parts: Optional[str]) -> str:
+    """Hex SHA-256 over the parts (None counts as empty), unambiguous for any input"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = (part or '').encode('utf-8', 'surrogatepass')
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache whose entries expire after `ttl` seconds
+
+    Values are stored as given; callers must not mutate what they get back.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid (0 = no expiry)
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and now >= expires_at:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store value, evicting least recently used entries beyond max_entries"""
+        expires_at = time.monotonic() + self.ttl if self.ttl and self.ttl > 0 else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """Drop all entries (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit, miss, eviction and expiration counts"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+            }
@@ -3,7 +3,35 @@ Text Processing Utilities
 Clean and preprocess job posting text
 """
 import re
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
+
+# Every character of the raw text falls in exactly one of these classes, in
+# the same way clean_text() sees it: whitespace runs, characters clean_text()
+# removes, currency symbols it expands, and runs of characters it keeps
+_CLEAN_TOKENS = re.compile(
+    r'(\s+)|([^\w\s$₹@.,!?\-\(\)\[\]]+)|([$₹])|([\w@.,!?\-\(\)\[\]]+)'
+)
+_CURRENCY_NAMES = {'₹': 'INR ', '$': 'USD '}
+
+# Sentence ends that clean_text() keeps, searched from the end of a chunk
+_SENTENCE_ENDS = ('. ', '! ', '? ', '\n')
+
+
+class OffsetMap:
+    """Maps character offsets in cleaned text back to the original text"""
+    
+    def __init__(self, offsets: List[int], original_length: int):
+        self.offsets = offsets  # offsets[i] = original index of cleaned char i
+        self.original_length = original_length
+    
+    def to_original(self, start: int, end: int) -> Tuple[int, int]:
+        """Convert a [start, end) span in cleaned text to the original text"""
+        if start >= len(self.offsets):
+            return self.original_length, self.original_length
+        original_start = self.offsets[start]
+        if end <= start:
+            return original_start, original_start
+        return original_start, self.offsets[min(end, len(self.offsets)) - 1] + 1
 
 
 class TextProcessor:
@@ -38,6 +66,43 @@ class TextProcessor:
         
         return text
     
+    def clean_text_with_offsets(self, text: str) -> Tuple[str, OffsetMap]:
+        """
+        Clean text like clean_text() and keep track of where each character came from
+        
+        Args:
+            text: Raw job posting text
+            
+        Returns:
+            (cleaned text, OffsetMap from cleaned to raw offsets)
+        """
+        if not text:
+            return "", OffsetMap([], 0)
+        
+        parts = []
+        offsets = []
+        for match in _CLEAN_TOKENS.finditer(text):
+            start = match.start()
+            whitespace, removed, currency, kept = match.groups()
+            if whitespace:
+                parts.append(' ')
+                offsets.append(start)
+            elif currency:
+                name = _CURRENCY_NAMES[currency]
+                parts.append(name)
+                offsets.extend([start] * len(name))
+            elif kept:
+                parts.append(kept)
+                offsets.extend(range(start, match.end()))
+        
+        cleaned = ''.join(parts)
+        stripped = cleaned.strip()
+        if len(stripped) != len(cleaned):
+            lead = len(cleaned) - len(cleaned.lstrip())
+            offsets = offsets[lead:lead + len(stripped)]
+        
+        return stripped, OffsetMap(offsets, len(text))
+    
     def extract_from_ocr(self, image_path: str) -> Optional[str]:
         """
         Extract text from image using OCR
@@ -67,3 +132,39 @@ class TextProcessor:
         if len(text) <= max_length:
             return text
         return text[:max_length] + "..."
+    
+    def split_chunks(self, text: str, chunk_size: int) -> Iterator[Tuple[int, str]]:
+        """
+        Split text into consecutive chunks of at most chunk_size characters
+        
+        Chunks end at the last paragraph or sentence break in their second
+        half, else at the last space, else mid-word. Every character belongs
+        to exactly one chunk, so text == ''.join(chunks).
+        
+        Args:
+            text: Text to split
+            chunk_size: Max characters per chunk
+            
+        Yields:
+            (offset of the chunk in text, chunk)
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        
+        start = 0
+        while start < len(text):
+            end = start + chunk_size
+            if end < len(text):
+                middle = start + chunk_size // 2
+                # The break stays with the chunk it ends
+                cut = -1
+                for mark in _SENTENCE_ENDS:
+                    found = text.rfind(mark, middle, end)
+                    if found >= 0:
+                        cut = max(cut, found + len(mark))
+                if cut < 0:
+                    cut = text.rfind(' ', middle, end) + 1
+                if cut > 0:
+                    end = cut
+            yield start, text[start:end]
+            start = end
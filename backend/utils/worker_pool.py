@@ -0,0 +1,201 @@
+"""
+Worker Pool
+Runs CPU-bound analysis in threads or forked processes behind a bounded
+admission queue, so the event loop stays responsive and overload is refused
+early instead of piling up
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+POOL_KINDS = ('thread', 'process', 'none')
+
+# Completed calls kept for wait and run time percentiles
+TIMING_WINDOW = 1000
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the admission queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PoolUnavailable(Exception):
+    """The pool is shut down or a worker process died"""
+
+
+def _timed_call(func: Callable, *args):
+    """Run func in a worker; wall-clock start and end times are comparable across processes"""
+    started = time.time()
+    result = func(*args)
+    return started, time.time(), result
+
+
+def _summary(values) -> Dict:
+    """Mean, p50, p99 and max of a window of seconds, in milliseconds"""
+    if not values:
+        return {'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    values = np.asarray(values) * 1e3
+    return {
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+class WorkerPool:
+    """
+    Executor for blocking calls from async handlers with bounded admission
+
+    At most `workers` calls run at once and `queue_size` more wait for a
+    worker; further calls fail immediately with PoolSaturated, carrying a
+    Retry-After estimate from recent run times. Process pools fork from the
+    parent where the platform allows, so workers start with everything the
+    parent has loaded (models, rule packs) without pickling it.
+
+    Admission counters are only touched from the event loop thread.
+    """
+
+    def __init__(self, kind: str = 'thread', workers: int = 4, queue_size: int = 64,
+                 initializer: Optional[Callable] = None):
+        """
+        Args:
+            kind: "thread", "process" or "none" (run calls on the event loop)
+            workers: Calls running at once
+            queue_size: Calls waiting for a worker before new ones are refused
+            initializer: Called once in each worker process (process pools only)
+
+        Raises:
+            ValueError: for an unknown kind or fewer than one worker
+        """
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Unknown worker pool {kind!r}, expected one of {POOL_KINDS}")
+        if workers < 1:
+            raise ValueError(f"Worker pool needs at least one worker, got {workers}")
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = max(0, queue_size)
+        self.initializer = initializer
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._closed = False
+        self._executor: Optional[Executor] = None
+        self._waits = deque(maxlen=TIMING_WINDOW)
+        self._runs = deque(maxlen=TIMING_WINDOW)
+
+    def _new_executor(self) -> Executor:
+        if self.kind == 'thread':
+            return ThreadPoolExecutor(self.workers, thread_name_prefix='analysis')
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        return ProcessPoolExecutor(self.workers, mp_context=context, initializer=self.initializer)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._new_executor()
+        return self._executor
+
+    def start(self):
+        """Create the executor now; process workers are started and initialized before returning"""
+        if self.kind == 'none':
+            return
+        executor = self._get_executor()
+        if self.kind == 'process':
+            for future in [executor.submit(time.sleep, 0) for _ in range(self.workers)]:
+                future.result()
+        logger.info(f"Analysis pool started: {self.workers} {self.kind} workers, queue {self.queue_size}")
+
+    def recycle(self):
+        """
+        Replace process workers so new ones fork from the parent's current state
+
+        Call after swapping the model or rule pack in the parent. Running calls
+        finish on the old workers.
+        """
+        if self.kind != 'process' or self._executor is None:
+            return
+        old, self._executor = self._executor, None
+        old.shutdown(wait=False)
+        self.start()
+
+    def shutdown(self):
+        """Refuse new calls, drop queued ones and wait for running ones"""
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def retry_after(self) -> int:
+        """Seconds until a queued call would likely start, from recent run times (at least 1)"""
+        mean_run = sum(self._runs) / len(self._runs) if self._runs else 0.0
+        waiting = max(0, self.in_flight - self.workers) + 1
+        return max(1, math.ceil(mean_run * waiting / self.workers))
+
+    async def run(self, func: Callable, *args):
+        """
+        Run func(*args) on a worker and return its result
+
+        Raises:
+            PoolSaturated: if workers and queue are full
+            PoolUnavailable: if the pool is shut down or a worker process died
+        """
+        if self.kind == 'none':
+            return func(*args)
+        if self._closed:
+            raise PoolUnavailable("Analysis pool is shut down")
+        if self.in_flight >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise PoolSaturated(self.retry_after())
+
+        self.in_flight += 1
+        enqueued = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started, finished, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, func, *args
+            )
+        except BrokenProcessPool as e:
+            self.failed += 1
+            self._executor = None  # Next call starts fresh workers
+            logger.error(f"Analysis worker process died: {e}")
+            raise PoolUnavailable("Analysis worker process died")
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self._waits.append(max(0.0, started - enqueued))
+        self._runs.append(finished - started)
+        return result
+
+    def stats(self) -> Dict:
+        """Queue depth, counters, and wait/run time over the last TIMING_WINDOW calls"""
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'running': min(self.in_flight, self.workers),
+            'queued': max(0, self.in_flight - self.workers),
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'wait': _summary(self._waits),
+            'run': _summary(self._runs),
+        }
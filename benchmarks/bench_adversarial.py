@@ -0,0 +1,91 @@
+"""
+Worst-case regex latency per rule on adversarial postings
+Usage: python benchmarks/bench_adversarial.py [--size CHARS] [--window N]
+
+Each input repeats the first half of a ".*" rule many times without ever
+completing it, which makes unbounded backtracking quadratic in text length.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.feature_extractor import FeatureExtractor
+from backend.models.rules import ScamRuleEngine
+from backend.utils import patterns
+
+ADVERSARIAL_UNITS = [
+    "pay ",
+    "$10000 ",
+    "earn $10000 ",
+    "make $10000 ",
+    "work from home ",
+    "12345 ",
+    "whatsapp contact dm message telegram ",
+    "amazon itunes google play ",
+    "guaranteed direct automatic payment administrative ",
+    "a.b-c_d ",
+]
+
+
+def adversarial_texts(size):
+    return {unit.strip(): (unit * (size // len(unit) + 1))[:size] for unit in ADVERSARIAL_UNITS}
+
+
+def compiled_patterns(match_window, regex_engine):
+    """(name, CompiledPattern) for every rule and feature pattern"""
+    engine = ScamRuleEngine(match_window=match_window, regex_engine=regex_engine)
+    extractor = FeatureExtractor(match_window=match_window, regex_engine=regex_engine)
+    items = [(f"rule: {rule['reason']}", compiled) for rule, compiled in engine._compiled]
+    for group, group_patterns in extractor._compiled.items():
+        items.extend((f"{group}: {compiled.pattern}", compiled) for compiled in group_patterns)
+    return items
+
+
+def worst_case(compiled, texts):
+    """Slowest single search over all adversarial texts, in milliseconds"""
+    worst = 0.0
+    for text in texts.values():
+        text_lower = text.lower()
+        start = time.perf_counter()
+        compiled.search(text_lower)
+        worst = max(worst, time.perf_counter() - start)
+    return worst * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=20000, help='Adversarial text length')
+    parser.add_argument('--window', type=int, default=300, help='Bounded-window size')
+    args = parser.parse_args()
+
+    texts = adversarial_texts(args.size)
+    modes = [('re', 0), ('re', args.window)]
+    if patterns.re2 is not None:
+        modes += [('re2', 0), ('re2', args.window)]
+    else:
+        print("google-re2 not installed; skipping re2 modes")
+
+    columns = {}
+    for engine, window in modes:
+        label = f"{engine}/{'w' + str(window) if window else 'unbounded'}"
+        columns[label] = [
+            (name, worst_case(compiled, texts))
+            for name, compiled in compiled_patterns(window, engine)
+        ]
+
+    labels = list(columns)
+    print(f"Worst-case ms per pattern over {len(texts)} adversarial texts of {args.size} chars\n")
+    print(f"{'pattern':<58}" + ''.join(f"{label:>15}" for label in labels))
+    names = [name for name, _ in columns[labels[0]]]
+    for row, name in enumerate(names):
+        print(f"{name[:57]:<58}" + ''.join(f"{columns[label][row][1]:>15.2f}" for label in labels))
+    print(f"{'TOTAL':<58}" + ''.join(
+        f"{sum(ms for _, ms in columns[label]):>15.2f}" for label in labels
+    ))
+
+
+if __name__ == '__main__':
+    main()
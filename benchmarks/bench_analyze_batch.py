@@ -0,0 +1,62 @@
+"""
+Benchmark JobScamDetector.analyze_batch against one analyze() call per posting
+Usage: python benchmarks/bench_analyze_batch.py [--count N] [--size CHARS]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.detector import JobScamDetector
+from benchmarks.samples import make_corpus, train_sample_model
+
+
+def run_single(detector, corpus, batch_size):
+    for text in corpus:
+        detector.analyze(text)
+
+
+def run_batches(detector, corpus, batch_size):
+    for start in range(0, len(corpus), batch_size):
+        detector.analyze_batch(corpus[start:start + batch_size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1024)
+    parser.add_argument('--size', type=int, default=1500)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 512])
+    parser.add_argument('--no-model', action='store_true', help='Rules and features only')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    detector = JobScamDetector()
+    detector.cache = None  # Measure analysis, not cache hits
+    if not args.no_model:
+        trainer = train_sample_model()
+        detector.set_model(trainer.model, trainer.vectorizer, "benchmark")
+    logging.disable(logging.NOTSET)
+
+    corpus = make_corpus(args.count, args.size, scam_ratio=0.1)
+    model = type(detector.model).__name__ if detector.model else 'no model'
+    print(f"{args.count} postings of {args.size} chars, {model}")
+
+    run_single(detector, corpus[:16], 1)  # warm up
+    start = time.perf_counter()
+    run_single(detector, corpus, 1)
+    baseline = time.perf_counter() - start
+    print(f"{'analyze() loop':<18}{args.count / baseline:>10.0f} postings/s")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        run_batches(detector, corpus, batch_size)
+        seconds = time.perf_counter() - start
+        print(f"{f'batch of {batch_size}':<18}{args.count / seconds:>10.0f} postings/s"
+              f"{baseline / seconds:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
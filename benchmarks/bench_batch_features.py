@@ -0,0 +1,46 @@
+"""
+Benchmark batch feature extraction against one extract() call per posting
+Usage: python benchmarks/bench_batch_features.py [--count N] [--size CHARS]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.feature_extractor import FeatureExtractor
+from benchmarks.samples import make_corpus
+
+
+def run_single(extractor, corpus):
+    return [extractor.extract(text) for text in corpus]
+
+
+def run_batch(extractor, corpus):
+    return extractor.extract_batch(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 3000])
+    parser.add_argument('--scam-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+
+    extractor = FeatureExtractor()
+    print(f"{'chars':>6}{'extract() us':>15}{'batch us':>12}{'speedup':>10}")
+    for size in args.sizes:
+        corpus = make_corpus(args.count, size, args.scam_ratio)
+        timings = {}
+        for label, func in (('single', run_single), ('batch', run_batch)):
+            func(extractor, corpus[:50])  # warm up
+            start = time.perf_counter()
+            func(extractor, corpus)
+            timings[label] = (time.perf_counter() - start) / args.count * 1e6
+        print(f"{size:>6}{timings['single']:>15.1f}{timings['batch']:>12.1f}"
+              f"{timings['single'] / timings['batch']:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
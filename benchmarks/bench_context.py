@@ -0,0 +1,77 @@
+"""
+Benchmark sharing one AnalysisContext between feature extraction and rules
+Usage: python benchmarks/bench_context.py [--count N] [--size CHARS]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.rule_pack import load_rule_pack
+from benchmarks.samples import make_corpus
+
+
+def run_separate(pack, corpus):
+    """Each stage derives its own lowercased text, tokens and prefilter scan"""
+    for text in corpus:
+        features = pack.feature_extractor.extract(text)
+        pack.rule_engine.evaluate(text, features)
+
+
+def run_shared(pack, corpus):
+    """Both stages read from one context per posting"""
+    for text in corpus:
+        context = pack.context(text)
+        features = pack.feature_extractor.extract(text, context=context)
+        pack.rule_engine.evaluate(text, features, context)
+
+
+class CountingText(str):
+    """str that counts the full-text copies made by lower() and split()"""
+    copies = 0
+
+    def lower(self):
+        CountingText.copies += 1
+        return super().lower()
+
+    def split(self, *args, **kwargs):
+        CountingText.copies += 1
+        return super().split(*args, **kwargs)
+
+
+def measure(func, pack, corpus):
+    func(pack, corpus[:20])  # warm up
+    start = time.perf_counter()
+    func(pack, corpus)
+    seconds = time.perf_counter() - start
+
+    CountingText.copies = 0
+    func(pack, [CountingText(text) for text in corpus])
+    copies = CountingText.copies / len(corpus)
+    return seconds, copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--size', type=int, default=3000)
+    parser.add_argument('--scam-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.count, args.size, args.scam_ratio)
+    pack = load_rule_pack(None)
+    print(f"{args.count} postings of {args.size} chars, {args.scam_ratio:.0%} scams")
+
+    results = {}
+    for label, func in (('separate', run_separate), ('shared', run_shared)):
+        results[label] = seconds, copies = measure(func, pack, corpus)
+        print(f"{label:<10}{seconds / args.count * 1e6:>10.1f} us/posting"
+              f"{copies:>6.1f} text copies/posting (~{copies * args.size / 1024:.1f} KiB)")
+
+    print(f"speedup: {results['separate'][0] / results['shared'][0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark the flat forest evaluator against sklearn's RandomForestClassifier
+and the soft-voting ensemble from train_model.py
+Usage: python benchmarks/bench_forest_evaluator.py [--count N] [--batch-sizes N ...]
+"""
+import argparse
+import logging
+import os
+import pickle
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.forest_evaluator import CompiledForestScorer, FlatForest
+from benchmarks.samples import make_corpus, make_labelled_corpus
+
+
+def train(count, noise):
+    """train_model.py ensemble; label noise grows the trees like real data does"""
+    import pandas as pd
+    from train_model import ScamDetectorTrainer
+
+    texts, labels = make_labelled_corpus(count, 1500)
+    rng = random.Random(1)
+    labels = [1 - label if rng.random() < noise else label for label in labels]
+    texts = [f"{text} ref{rng.randrange(20000)}" for text in texts]
+
+    trainer = ScamDetectorTrainer()
+    trainer.prepare_data(pd.DataFrame({'text': texts, 'label': labels}))
+    trainer.train_model('ensemble')
+    return trainer.model, trainer.vectorizer
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=3000)
+    parser.add_argument('--label-noise', type=float, default=0.1)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    model, vectorizer = train(args.count, args.label_noise)
+    forest = dict(model.named_estimators_)['rf']
+    flat = FlatForest(forest)
+    scorer = CompiledForestScorer(model, vectorizer)
+
+    corpus = make_corpus(max(args.batch_sizes), 1500, scam_ratio=0.3, seed=5)
+    X = vectorizer.transform(corpus)
+    identical = np.array_equal(flat.predict_proba(X), forest.predict_proba(X))
+    print(f"{len(flat.threshold)} nodes in {len(flat.roots)} trees (depth {flat.max_depth}), "
+          f"{len(flat.columns)} split columns; identical probabilities: {identical}")
+    print(f"memory: pickled forest {len(pickle.dumps(forest)) / 1e6:.2f} MB, "
+          f"flat arrays {flat.nbytes / 1e6:.2f} MB")
+
+    print(f"{'batch':>6}{'forest':>12}{'flat':>12}{'speedup':>9}"
+          f"{'ensemble':>12}{'compiled':>12}{'speedup':>9}   (ms per batch)")
+    for size in args.batch_sizes:
+        rows, texts = X[:size], corpus[:size]
+        forest_time = best_time(lambda: forest.predict_proba(rows), args.repeat)
+        flat_time = best_time(lambda: flat.predict_proba(rows), args.repeat)
+        ensemble_time = best_time(
+            lambda: model.predict_proba(vectorizer.transform(texts)), args.repeat
+        )
+        compiled_time = best_time(lambda: scorer.predict_proba(texts), args.repeat)
+        print(f"{size:>6}{forest_time * 1e3:>12.2f}{flat_time * 1e3:>12.2f}"
+              f"{forest_time / flat_time:>8.1f}x{ensemble_time * 1e3:>12.2f}"
+              f"{compiled_time * 1e3:>12.2f}{ensemble_time / compiled_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the compiled linear scorer against sklearn's transform + predict_proba
+Usage: python benchmarks/bench_linear_scorer.py [--count N] [--sizes CHARS ...]
+"""
+import argparse
+import logging
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.linear_scorer import CompiledLinearScorer
+from benchmarks.samples import make_corpus, train_sample_model
+
+
+def allocated(build):
+    """Bytes still allocated by Python after build() returns"""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def latencies(score, corpus):
+    timings = []
+    for text in corpus:
+        start = time.perf_counter()
+        score([text])
+        timings.append(time.perf_counter() - start)
+    values = np.array(timings) * 1e6
+    return np.percentile(values, 50), np.percentile(values, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 1500, 5000])
+    parser.add_argument('--train-count', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    trainer = train_sample_model(count=args.train_count, size=1500, model_type='logistic')
+    model, vectorizer = trainer.model, trainer.vectorizer
+
+    # Memory of each runtime as loaded in a worker
+    serialized = pickle.dumps((model, vectorizer))
+    _, sklearn_bytes = allocated(lambda: pickle.loads(serialized))
+    scorer, compiled_bytes = allocated(lambda: CompiledLinearScorer(model, vectorizer))
+    print(f"vocabulary {len(vectorizer.vocabulary_)} terms; "
+          f"sklearn {sklearn_bytes / 1e6:.2f} MB, compiled {compiled_bytes / 1e6:.2f} MB")
+
+    def sklearn_score(texts):
+        return model.predict_proba(vectorizer.transform(texts))[:, 1]
+
+    for size in args.sizes:
+        corpus = make_corpus(args.count, size, scam_ratio=0.3, seed=size)
+        difference = np.abs(scorer.predict_proba(corpus) - sklearn_score(corpus)).max()
+        print(f"{size} chars (max |difference| {difference:.1e})")
+        for label, score in [('sklearn', sklearn_score), ('compiled', scorer.predict_proba)]:
+            score(corpus[:20])  # warm up
+            p50, p99 = latencies(score, corpus)
+            start = time.perf_counter()
+            score(corpus)
+            batch = (time.perf_counter() - start) / len(corpus) * 1e6
+            print(f"  {label:<9} single p50 {p50:7.1f} us  p99 {p99:7.1f} us"
+                  f"   batch of {len(corpus)} {batch:7.1f} us/posting")
+
+
+if __name__ == "__main__":
+    main()
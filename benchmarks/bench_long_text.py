@@ -0,0 +1,67 @@
+"""
+Latency of /analyze-style detection on long postings, whole text vs chunked
+Usage: python benchmarks/bench_long_text.py [--sizes CHARS ...] [--repeat N]
+
+Each size is measured on a scraped-page-like posting and on one that repeats
+"work from home " without a salary, the worst case for the ".*" rules.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.config import settings
+from backend.models.detector import JobScamDetector
+from backend.utils.text_processor import TextProcessor
+from benchmarks.samples import make_posting, train_sample_model
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000, 50000, 100000, 200000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    processor = TextProcessor()
+    detector = JobScamDetector()
+    detector.cache = None
+    detector.near_duplicates = None
+    trainer = train_sample_model()
+    detector.set_model(trainer.model, trainer.vectorizer, "benchmark")
+    detector.near_duplicates = None
+
+    # LONG_TEXT_THRESHOLD per mode; 0 analyzes the whole text at once
+    modes = {'whole': 0, 'chunked': settings.LONG_TEXT_THRESHOLD}
+
+    print(f"chunked: threshold {settings.LONG_TEXT_THRESHOLD}, chunks of {settings.LONG_TEXT_CHUNK_SIZE}, "
+          f"at most {settings.LONG_TEXT_MAX_CHARS} chars scored")
+    print(f"{'size':>8}{'posting':>12}{'whole ms':>12}{'chunked ms':>12}")
+    for size in args.sizes:
+        postings = {
+            'page': make_posting('scam', size, seed=size),
+            'adversarial': ("work from home " * (size // 15 + 1))[:size],
+        }
+        for name, raw in postings.items():
+            text = processor.clean_text(raw)
+            timings = {}
+            for mode, threshold in modes.items():
+                settings.LONG_TEXT_THRESHOLD = threshold
+                timings[mode] = best_time(lambda: detector.analyze(text), args.repeat)
+            print(f"{size:>8}{name:>12}{timings['whole'] * 1e3:>12.1f}{timings['chunked'] * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
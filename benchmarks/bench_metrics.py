@@ -0,0 +1,87 @@
+"""
+Benchmark of the per-request cost of metrics collection
+Usage: python benchmarks/bench_metrics.py [--count N]
+
+Times the primitives an /analyze request touches and adds them up per
+request: one middleware pass, one prediction counter, clean_text and
+explain laps per posting, and the other stage laps once per detector call
+(shared by a micro-batch).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.metrics import Counter, Histogram, MetricsMiddleware, StageClock, STAGE_BUCKETS
+
+# clean_text and explain are timed per posting; each has its own StageClock
+PER_POSTING_LAPS = 2
+# context, extract_features, evaluate_rules (one clock), vectorize, predict_proba (another)
+PER_CALL_LAPS, PER_CALL_CLOCKS = 5, 2
+
+
+def per_call_us(func, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+async def empty_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def asgi_call_us(app, count: int) -> float:
+    scope = {'type': 'http', 'method': 'POST', 'path': '/analyze'}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        pass
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(count):
+            await app(scope, receive, send)
+        return (time.perf_counter() - start) / count * 1e6
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=200_000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16])
+    args = parser.parse_args()
+
+    histogram = Histogram('bench_seconds', 'bench', ('stage',), buckets=STAGE_BUCKETS)
+    counter = Counter('bench_total', 'bench', ('label',))
+    clock = StageClock()
+
+    observe = per_call_us(lambda: histogram.observe(0.0003, ('extract_features',)), args.count)
+    inc = per_call_us(lambda: counter.inc(('Likely Legitimate',)), args.count)
+    lap = per_call_us(lambda: clock.lap('extract_features'), args.count)
+    new_clock = per_call_us(StageClock, args.count)
+    bare = asgi_call_us(empty_app, args.count // 4)
+    wrapped = asgi_call_us(MetricsMiddleware(empty_app), args.count // 4)
+    middleware = wrapped - bare
+
+    print(f"{'Histogram.observe':<28}{observe:>8.2f} us")
+    print(f"{'Counter.inc':<28}{inc:>8.2f} us")
+    print(f"{'StageClock()':<28}{new_clock:>8.2f} us")
+    print(f"{'StageClock.lap':<28}{lap:>8.2f} us")
+    print(f"{'MetricsMiddleware':<28}{middleware:>8.2f} us  ({bare:.2f} -> {wrapped:.2f} us per ASGI call)")
+    per_posting = middleware + inc + PER_POSTING_LAPS * (new_clock + lap)
+    per_call = PER_CALL_LAPS * lap + PER_CALL_CLOCKS * new_clock
+    for batch_size in args.batch_sizes:
+        total = per_posting + per_call / batch_size
+        print(f"{f'per /analyze, batch {batch_size}':<28}{total:>8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark loading the model from the memory-mapped artifact vs the pickle
+Usage: python benchmarks/bench_model_artifact.py [--count N] [--label-noise P]
+
+Each load runs in a fresh process. Private memory (RssAnon) is what every
+uvicorn worker pays on its own; mapped file pages (RssFile) are shared
+through the page cache.
+"""
+import argparse
+import logging
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.model_artifact import save_model_artifact
+from benchmarks.samples import make_labelled_corpus
+
+LOADER = """
+import pickle, sys, time, warnings
+warnings.simplefilter('ignore')
+sys.path.insert(0, {root!r})
+from backend.utils.model_artifact import load_model_artifact
+# Import cost is the same for both formats; keep it out of the measurement
+import sklearn.ensemble, sklearn.feature_extraction.text, sklearn.linear_model
+
+def memory():
+    fields = dict(line.split(':', 1) for line in open('/proc/self/status'))
+    return {{key: int(fields[key].split()[0]) for key in ('RssAnon', 'RssFile')}}
+
+before = memory()
+start = time.perf_counter()
+if {kind!r} == 'pickle':
+    with open({path!r}, 'rb') as f:
+        data = pickle.load(f)
+else:
+    data = load_model_artifact({path!r}, mmap={kind!r} == 'artifact')
+seconds = time.perf_counter() - start
+data['model'].predict_proba(data['vectorizer'].transform(['warm up the mapped pages']))
+after = memory()
+print(seconds, after['RssAnon'] - before['RssAnon'], after['RssFile'] - before['RssFile'])
+"""
+
+
+def train(count, noise):
+    """Train the train_model.py ensemble; label noise grows the forest like real data does"""
+    import pandas as pd
+    from train_model import ScamDetectorTrainer
+
+    texts, labels = make_labelled_corpus(count, 1500)
+    rng = random.Random(1)
+    labels = [1 - label if rng.random() < noise else label for label in labels]
+    # Vary vocabulary so the TF-IDF vocabulary fills up as on real postings
+    texts = [f"{text} ref{rng.randrange(20000)} code{rng.randrange(20000)}" for text in texts]
+
+    trainer = ScamDetectorTrainer()
+    trainer.prepare_data(pd.DataFrame({'text': texts, 'label': labels}))
+    trainer.train_model('ensemble')
+    return {'model': trainer.model, 'vectorizer': trainer.vectorizer}
+
+
+def load_in_subprocess(kind, path):
+    code = LOADER.format(root=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+                         kind=kind, path=path)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    seconds, anon, mapped = output.stdout.split()
+    return float(seconds), int(anon), int(mapped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=3000)
+    parser.add_argument('--label-noise', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    model_data = train(args.count, args.label_noise)
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, 'model.pkl')
+        artifact_path = os.path.join(directory, 'model')
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(model_data, f)
+        save_model_artifact(model_data, artifact_path)
+
+        array_bytes = os.path.getsize(os.path.join(artifact_path, 'arrays.bin'))
+        print(f"pickle {os.path.getsize(pickle_path) / 1e6:.1f} MB, "
+              f"artifact arrays {array_bytes / 1e6:.1f} MB "
+              f"+ skeleton {os.path.getsize(os.path.join(artifact_path, 'model.pkl')) / 1e6:.1f} MB")
+
+        for kind, path in [('pickle', pickle_path), ('artifact', artifact_path),
+                           ('artifact-no-mmap', artifact_path)]:
+            runs = [load_in_subprocess(kind, path) for _ in range(args.repeat)]
+            seconds = min(run[0] for run in runs)
+            anon, mapped = runs[-1][1:]
+            print(f"{kind:<18} load {seconds * 1e3:7.1f} ms   private {anon / 1024:6.1f} MB"
+                  f"   shared mapped {mapped / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
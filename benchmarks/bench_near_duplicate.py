@@ -0,0 +1,102 @@
+"""
+Benchmark the near-duplicate index: fill time, lookup latency, memory, and
+the ML time saved on reposted postings
+Usage: python benchmarks/bench_near_duplicate.py [--entries N] [--lookups N]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.detector import JobScamDetector
+from backend.utils.near_duplicate import NearDuplicateIndex, simhash
+from benchmarks.samples import make_corpus, train_sample_model
+
+
+def percentiles(timings):
+    """p50/p99 in microseconds"""
+    values = np.array(timings) * 1e6
+    return np.percentile(values, 50), np.percentile(values, 99)
+
+
+def bench_index(entries, lookups, max_distance):
+    rng = random.Random(0)
+    index = NearDuplicateIndex(capacity=entries, max_distance=max_distance)
+    fingerprints = [rng.getrandbits(64) for _ in range(entries)]
+
+    start = time.perf_counter()
+    for value, fingerprint in enumerate(fingerprints):
+        index.add(fingerprint, value)
+    fill = time.perf_counter() - start
+    print(f"Filled {entries} entries in {fill:.1f}s ({fill / entries * 1e6:.1f} us/add), "
+          f"{index.nbytes / 1e6:.1f} MB")
+
+    for label, make_query in [
+        ('near-duplicate hit', lambda: _flip(rng.choice(fingerprints), rng, max_distance)),
+        ('miss', lambda: rng.getrandbits(64)),
+    ]:
+        queries = [make_query() for _ in range(lookups)]
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.lookup(query)
+            timings.append(time.perf_counter() - start)
+        p50, p99 = percentiles(timings)
+        print(f"  lookup {label:<20} p50 {p50:7.1f} us   p99 {p99:7.1f} us")
+
+
+def _flip(fingerprint, rng, max_distance):
+    for bit in rng.sample(range(64), rng.randint(0, max_distance)):
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def bench_detector(count, size):
+    corpus = make_corpus(count, size)
+    # Reposts: the same postings with a contact line appended
+    reposts = [text + "\nCall 555-0199 today" for text in corpus]
+
+    timings = []
+    for text in corpus[:200]:
+        start = time.perf_counter()
+        simhash(text)
+        timings.append(time.perf_counter() - start)
+    p50, p99 = percentiles(timings)
+    print(f"simhash ({size} chars)        p50 {p50:7.1f} us   p99 {p99:7.1f} us")
+
+    trainer = train_sample_model()
+    detector = JobScamDetector()
+    detector.cache = None
+    detector.set_model(trainer.model, trainer.vectorizer, "benchmark")
+
+    for label, texts in [('first seen', corpus), ('reposts', reposts)]:
+        start = time.perf_counter()
+        for text in texts:
+            detector.analyze(text)
+        elapsed = time.perf_counter() - start
+        print(f"  analyze {label:<12} {elapsed / len(texts) * 1e3:6.2f} ms/posting")
+    print(f"  index: {detector.near_duplicates.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entries', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    parser.add_argument('--max-distance', type=int, default=3)
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--size', type=int, default=1500)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    bench_index(args.entries, args.lookups, args.max_distance)
+    bench_detector(args.count, args.size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark the literal prefilter on a mostly-legitimate corpus
+Usage: python benchmarks/bench_prefilter.py [--count N] [--size CHARS]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.feature_extractor import FeatureExtractor
+from backend.models.rules import ScamRuleEngine
+from backend.utils import literal_index
+from benchmarks.samples import make_corpus
+
+
+def run(extractor, engine, corpus):
+    start = time.perf_counter()
+    for text in corpus:
+        features = extractor.extract(text)
+        engine.evaluate(text, features)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--size', type=int, default=3000)
+    parser.add_argument('--scam-ratio', type=float, default=0.05)
+    parser.add_argument('--no-automaton', action='store_true',
+                        help='Use the substring fallback even if pyahocorasick is installed')
+    args = parser.parse_args()
+
+    if args.no_automaton:
+        literal_index.ahocorasick = None
+
+    corpus = make_corpus(args.count, args.size, args.scam_ratio)
+    backend = 'pyahocorasick' if literal_index.ahocorasick else 'substring scan'
+    print(f"{args.count} postings of {args.size} chars, {args.scam_ratio:.0%} scams, "
+          f"literal index backend: {backend}")
+
+    results = {}
+    for prefilter in (False, True):
+        extractor = FeatureExtractor()
+        engine = ScamRuleEngine()
+        extractor.prefilter = engine.prefilter = prefilter
+        run(extractor, engine, corpus[:20])  # warm up
+        results[prefilter] = run(extractor, engine, corpus)
+
+    for prefilter, seconds in results.items():
+        label = 'prefilter on' if prefilter else 'prefilter off'
+        print(f"{label:<15}{seconds / args.count * 1e6:>10.1f} us/posting"
+              f"{args.count / seconds:>10.0f} postings/s")
+    print(f"speedup: {results[False] / results[True]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark for /report persistence: write-behind buffer vs a commit per report
+Usage: python benchmarks/bench_reports.py [--reports N] [--duplicate-rate R]
+
+Times what a request waits for when it stores one report: ReportStore.submit()
+(a queue put) against an INSERT and COMMIT on the spot, with SQLite's default
+fsync settings in WAL mode for both. Also reports how long the background
+writer needs to make the whole burst durable and how many transactions it used.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils import report_store
+from backend.utils.report_store import ReportStore, report_key
+from benchmarks.samples import make_corpus
+
+
+def summarize(name, seconds):
+    micros = np.asarray(seconds) * 1e6
+    print(f"{name:<22}{np.percentile(micros, 50):>10.1f}{np.percentile(micros, 99):>10.1f}"
+          f"{micros.max():>12.1f}")
+
+
+def direct_commits(path, texts):
+    """Per-report latency of an upsert committed before the request returns"""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(report_store._SCHEMA)
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        now = time.time()
+        with connection:
+            connection.execute(report_store._UPSERT, (report_key(text), text, None, None, now, now, 1))
+        timings.append(time.perf_counter() - start)
+    connection.close()
+    return timings
+
+
+def write_behind(path, texts):
+    """Per-report submit latency, plus the time until the burst is on disk"""
+    store = ReportStore(path, queue_size=len(texts))
+    batches = []
+    store_batch = store._store
+
+    def counting_store(connection, items):
+        batches.append(len(items))
+        store_batch(connection, items)
+
+    store._store = counting_store
+    timings = []
+    burst_start = time.perf_counter()
+    for text in texts:
+        start = time.perf_counter()
+        store.submit(text)
+        timings.append(time.perf_counter() - start)
+    store.close(timeout=60)
+    return timings, time.perf_counter() - burst_start, batches, store.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=5000)
+    parser.add_argument('--duplicate-rate', type=float, default=0.3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.reports)
+    rng = random.Random(0)
+    texts = []
+    for text in corpus:
+        # Some reports repeat a posting reported earlier
+        texts.append(rng.choice(texts) if texts and rng.random() < args.duplicate_rate else text)
+
+    with tempfile.TemporaryDirectory() as directory:
+        direct = direct_commits(os.path.join(directory, 'direct.sqlite'), texts)
+        buffered, drained, batches, stats = write_behind(os.path.join(directory, 'buffered.sqlite'), texts)
+
+    print(f"{args.reports} reports, {args.duplicate_rate:.0%} repeats")
+    print(f"{'request waits (us)':<22}{'p50':>10}{'p99':>10}{'max':>12}")
+    summarize('commit per report', direct)
+    summarize('write-behind submit', buffered)
+    print(f"\ncommit per report: {sum(direct):.2f}s for the burst, {len(texts)} transactions")
+    print(f"write-behind:      {drained:.2f}s until written, {len(batches)} transactions "
+          f"(mean {np.mean(batches):.0f} reports), {stats['stored_postings']} postings stored, "
+          f"{stats['duplicates']} repeats merged")
+
+
+if __name__ == "__main__":
+    main()
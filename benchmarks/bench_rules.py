@@ -0,0 +1,96 @@
+"""
+Benchmark ScamRuleEngine.evaluate against the original per-rule loop
+Usage: python benchmarks/bench_rules.py [--iterations N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.rules import ScamRuleEngine
+from benchmarks.samples import make_posting
+
+
+def legacy_evaluate(rules, text):
+    """Original implementation: one re.finditer per rule, all matches collected"""
+    text_lower = text.lower()
+    matched = []
+    for rule in rules:
+        matches = list(re.finditer(rule['pattern'], text_lower, re.IGNORECASE))
+        if matches:
+            matched.append((rule['reason'], matches[0].group()))
+    return matched
+
+
+def build_alternation(rules):
+    """Single-pass alternative: one alternation of lookaheads with named groups"""
+    branches = ['(?=(?P<r%d>%s))' % (i, rule['pattern']) for i, rule in enumerate(rules)]
+    return re.compile('|'.join(branches), re.IGNORECASE)
+
+
+def alternation_evaluate(rules, combined, anchored, text):
+    """Walk the text once with the combined regex, keeping the first hit per rule"""
+    text_lower = text.lower()
+    found = {}
+    for match in combined.finditer(text_lower):
+        index = int(match.lastgroup[1:])
+        found.setdefault(index, match.group(match.lastgroup))
+        # The alternation reports one branch per position; check later rules here too
+        for other in range(index + 1, len(rules)):
+            if other not in found:
+                other_match = anchored[other].match(text_lower, match.start())
+                if other_match:
+                    found[other] = other_match.group()
+        if len(found) == len(rules):
+            break
+    return [(rules[i]['reason'], found[i]) for i in sorted(found)]
+
+
+def engine_evaluate(engine, text):
+    result = engine.evaluate(text, {})
+    return [(p['reason'], p['match']) for p in result['matched_patterns']]
+
+
+def timeit(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    engine = ScamRuleEngine()
+    rules = engine.rules
+    combined = build_alternation(rules)
+    anchored = [re.compile(rule['pattern'], re.IGNORECASE) for rule in rules]
+
+    print(f"{'posting':<14}{'variant':<22}{'us/call':>10}{'posts/s':>10}{'speedup':>9}")
+    for kind in ('legit', 'scam'):
+        for size in (1000, 5000, 20000):
+            text = make_posting(kind, size)
+            expected = legacy_evaluate(rules, text)
+            assert engine_evaluate(engine, text) == expected
+            assert alternation_evaluate(rules, combined, anchored, text) == expected
+
+            variants = [
+                ('per-rule finditer', lambda: legacy_evaluate(rules, text)),
+                ('combined alternation', lambda: alternation_evaluate(rules, combined, anchored, text)),
+                ('ScamRuleEngine', lambda: engine_evaluate(engine, text)),
+            ]
+            baseline = None
+            for name, func in variants:
+                seconds = timeit(func, args.iterations)
+                baseline = baseline or seconds
+                print(f"{kind + '/' + str(size):<14}{name:<22}{seconds * 1e6:>10.1f}"
+                      f"{1 / seconds:>10.0f}{baseline / seconds:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark score-only analysis and response encoding
+Usage: python benchmarks/bench_score_only.py [--count N] [--size CHARS]
+
+Compares full and score-only analyze_batch throughput on a mostly
+legitimate corpus and on an all-scam corpus (where rule evaluation stops
+once the score saturates), then times encoding the full results through
+the response model (the previous response path), json and json_codec.dumps.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.main import JobAnalysisResponse
+from backend.models.detector import JobScamDetector
+from backend.utils import json_codec
+from benchmarks.samples import make_corpus, train_sample_model
+
+
+def postings_per_second(detector, corpus, batch_size, score_only):
+    start = time.perf_counter()
+    for index in range(0, len(corpus), batch_size):
+        detector.analyze_batch(corpus[index:index + batch_size], score_only=score_only)
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def per_call_us(func, values) -> float:
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    return (time.perf_counter() - start) / len(values) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1024)
+    parser.add_argument('--size', type=int, default=1500)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--no-model', action='store_true', help='Rules and features only')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    detector = JobScamDetector()
+    detector.cache = None  # Measure analysis, not cache hits
+    detector.near_duplicates = None
+    if not args.no_model:
+        trainer = train_sample_model()
+        detector.set_model(trainer.model, trainer.vectorizer, "benchmark")
+    logging.disable(logging.NOTSET)
+
+    model = type(detector.model).__name__ if detector.model else 'no model'
+    print(f"{args.count} postings of {args.size} chars, batches of {args.batch_size}, {model}")
+    for name, scam_ratio in (('mostly legitimate', 0.1), ('all scam', 1.0)):
+        corpus = make_corpus(args.count, args.size, scam_ratio=scam_ratio)
+        postings_per_second(detector, corpus[:64], args.batch_size, False)  # warm up
+        full = postings_per_second(detector, corpus, args.batch_size, False)
+        score = postings_per_second(detector, corpus, args.batch_size, True)
+        print(f"{name:<20}full {full:>8.0f}/s   score-only {score:>8.0f}/s   {score / full:>5.2f}x")
+
+    results = detector.analyze_batch(make_corpus(args.count, args.size, scam_ratio=0.3))
+    encoders = {
+        'response model': lambda result: json.dumps(
+            jsonable_encoder(JobAnalysisResponse(**result)), ensure_ascii=False,
+            allow_nan=False, separators=(',', ':')
+        ).encode('utf-8'),
+        'json': lambda result: json.dumps(result, separators=(',', ':')).encode('utf-8'),
+        f"dumps ({'orjson' if json_codec.orjson else 'json fallback'})": json_codec.dumps,
+    }
+    for name, encode in encoders.items():
+        print(f"{f'encode, {name}':<32}{per_call_us(encode, results):>8.2f} us per result")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark for /batch-analyze vs the streaming /v2/batch-analyze
+Usage: python benchmarks/bench_stream_batch.py [--records N ...]
+
+Both endpoints' analysis paths are driven in-process: v1 analyzes the whole
+list in one call and keeps every result, v2 reads an NDJSON body chunk by
+chunk and hands each result line on as soon as its chunk is done. Peak
+Python memory comes from tracemalloc in a separate run from the timing.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import main
+from backend.config import settings
+from benchmarks.samples import make_corpus, train_sample_model
+
+BODY_CHUNK = 64 * 1024
+
+
+async def ndjson_body(corpus, count):
+    """Request body produced on the fly, as a client uploading a large file would"""
+    buffer = bytearray()
+    for index in range(count):
+        buffer += json.dumps({'id': index, 'text': corpus[index % len(corpus)]}).encode() + b'\n'
+        if len(buffer) >= BODY_CHUNK:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def run_v1(corpus, count):
+    texts = [corpus[index % len(corpus)] for index in range(count)]
+    return len(main.analyze_batch_request(texts))
+
+
+def run_v2(corpus, count):
+    async def consume():
+        lines = 0
+        async for _ in main.stream_analysis(ndjson_body(corpus, count)):
+            lines += 1
+        return lines
+    return asyncio.run(consume())
+
+
+def measure(func, corpus, count):
+    """(seconds, peak MiB)"""
+    start = time.perf_counter()
+    assert func(corpus, count) == count
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(corpus, count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--size', type=int, default=1500, help='Characters per posting')
+    parser.add_argument('--chunk-size', type=int, default=settings.STREAM_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    trainer = train_sample_model()
+    main.detector.set_model(trainer.model, trainer.vectorizer, "bench")
+    main.detector.cache = None
+    main.detector.near_duplicates = None
+    settings.STREAM_CHUNK_SIZE = args.chunk_size
+    corpus = make_corpus(500, args.size, scam_ratio=0.2, seed=5)
+    run_v2(corpus, 200)  # Warm up
+
+    print(f"postings of {args.size} chars, stream chunk {args.chunk_size}, model {main.detector.model_version}")
+    print(f"{'records':>9}{'v1 rec/s':>10}{'v1 peak MiB':>13}{'v2 rec/s':>10}{'v2 peak MiB':>13}")
+    for count in args.records:
+        v1_seconds, v1_peak = measure(run_v1, corpus, count)
+        v2_seconds, v2_peak = measure(run_v2, corpus, count)
+        print(f"{count:>9}{count / v1_seconds:>10.0f}{v1_peak:>13.1f}"
+              f"{count / v2_seconds:>10.0f}{v2_peak:>13.1f}")
+    main.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main_()
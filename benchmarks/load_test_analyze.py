@@ -0,0 +1,93 @@
+"""
+Load test for /analyze with and without micro-batching
+Usage: python benchmarks/load_test_analyze.py [--concurrency N ...] [--requests N]
+
+Requests go through the ASGI app in-process (httpx.ASGITransport), so the
+numbers include routing, validation, the worker pool and the batcher but
+not network or HTTP parsing. Each client sends distinct postings with the
+result cache off, so every request reaches the model.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import main
+from backend.config import settings
+from backend.utils.micro_batcher import MicroBatcher
+from backend.utils.worker_pool import WorkerPool
+from benchmarks.samples import make_corpus, train_sample_model
+
+
+async def run_load(corpus, concurrency, total):
+    """Send `total` requests from `concurrency` clients; returns (seconds, latencies, statuses)"""
+    latencies, statuses = [], []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        next_request = iter(range(total))
+
+        async def worker():
+            for index in next_request:
+                start = time.perf_counter()
+                response = await client.post("/analyze", json={"text": corpus[index % len(corpus)]})
+                latencies.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies, statuses
+
+
+def configure(batch_size, wait_ms, workers, queue_size):
+    main.pool.shutdown()
+    main.pool = WorkerPool('thread', workers, queue_size)
+    main.batcher = MicroBatcher(main.analyze_coalesced, batch_size, wait_ms)
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 128])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=1500, help='Characters per posting')
+    parser.add_argument('--workers', type=int, default=settings.WORKER_COUNT)
+    parser.add_argument('--queue-size', type=int, default=settings.WORKER_QUEUE_SIZE)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--wait-ms', type=float, default=settings.MICRO_BATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    trainer = train_sample_model()
+    main.detector.set_model(trainer.model, trainer.vectorizer, "load-test")
+    main.detector.cache = None
+    main.detector.near_duplicates = None
+    corpus = make_corpus(args.requests, args.size, scam_ratio=0.2, seed=11)
+
+    modes = {
+        'unbatched': (1, 0.0),
+        f'batched ({args.batch_size}, {args.wait_ms:g} ms)': (args.batch_size, args.wait_ms),
+    }
+    print(f"{args.requests} requests of {args.size} chars, {args.workers} thread workers, "
+          f"queue {args.queue_size}, model {main.detector.model_version}")
+    print(f"{'mode':>24}{'clients':>9}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'429s':>7}{'mean batch':>12}")
+    for concurrency in args.concurrency:
+        for name, (batch_size, wait_ms) in modes.items():
+            configure(batch_size, wait_ms, args.workers, args.queue_size)
+            asyncio.run(run_load(corpus, concurrency, min(50, args.requests)))  # Warm up
+            configure(batch_size, wait_ms, args.workers, args.queue_size)
+            seconds, latencies, statuses = asyncio.run(run_load(corpus, concurrency, args.requests))
+            ok = [latency for latency, status in zip(latencies, statuses) if status == 200]
+            p50, p99 = np.percentile(ok, [50, 99]) * 1e3 if ok else (0.0, 0.0)
+            print(f"{name:>24}{concurrency:>9}{len(ok) / seconds:>9.0f}{p50:>9.1f}{p99:>9.1f}"
+                  f"{statuses.count(429):>7}{main.batcher.stats()['mean_size']:>12.1f}")
+    main.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,77 @@
+"""
+Sample job postings for benchmarks
+"""
+import random
+
+LEGIT_PARAGRAPHS = [
+    "Senior Software Engineer at Microsoft Corporation. We are looking for an experienced "
+    "developer to join our cloud platform team.",
+    "Responsibilities include designing distributed systems, mentoring engineers, and "
+    "collaborating with product managers on the roadmap.",
+    "Requirements: 5+ years of experience with Python or Java, strong knowledge of "
+    "algorithms and data structures, BS in Computer Science.",
+    "Benefits include health insurance, 401k matching, paid time off and a yearly "
+    "learning budget. Salary $120,000 - $150,000.",
+    "Apply through our careers portal at careers.microsoft.com. Interviews are held "
+    "in three rounds with the hiring team.",
+]
+
+SCAM_PARAGRAPHS = [
+    "URGENT!!! Earn $500 per day from home! No experience needed!",
+    "Pay $99 registration fee to start this amazing opportunity. No interview required!",
+    "WhatsApp only: 555-0123. Limited slots available, act now!!!",
+    "Guaranteed income for everyone. Payments are processed via gift cards and bitcoin.",
+    "Contact our recruiter at jobs.offers@gmail.com for immediate joining.",
+]
+
+
+def make_posting(kind: str = 'legit', size: int = 5000, seed: int = 0) -> str:
+    """Build a posting of roughly `size` characters from sample paragraphs"""
+    rng = random.Random(seed)
+    if kind == 'scam':
+        # Scam postings mix scam paragraphs into otherwise normal-looking text
+        pool = SCAM_PARAGRAPHS + LEGIT_PARAGRAPHS
+    else:
+        pool = LEGIT_PARAGRAPHS
+
+    paragraphs = []
+    length = 0
+    while length < size:
+        paragraph = rng.choice(pool)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 1
+    return "\n".join(paragraphs)[:size]
+
+
+def make_corpus(count: int, size: int = 2000, scam_ratio: float = 0.05, seed: int = 0) -> list:
+    """Build a list of postings with roughly `scam_ratio` scams"""
+    rng = random.Random(seed)
+    return [
+        make_posting('scam' if rng.random() < scam_ratio else 'legit', size, seed + i)
+        for i in range(count)
+    ]
+
+
+def make_labelled_corpus(count: int, size: int = 2000, scam_ratio: float = 0.3,
+                         seed: int = 0) -> tuple:
+    """Build (postings, labels) with label 1 for scams"""
+    rng = random.Random(seed)
+    labels = [int(rng.random() < scam_ratio) for _ in range(count)]
+    texts = [
+        make_posting('scam' if label else 'legit', size, seed + i)
+        for i, label in enumerate(labels)
+    ]
+    return texts, labels
+
+
+def train_sample_model(count: int = 400, size: int = 1000, model_type: str = 'ensemble',
+                       seed: int = 0):
+    """Train a model with the train_model.py pipeline on sample postings"""
+    import pandas as pd
+    from train_model import ScamDetectorTrainer
+
+    texts, labels = make_labelled_corpus(count, size, seed=seed)
+    trainer = ScamDetectorTrainer()
+    trainer.prepare_data(pd.DataFrame({'text': texts, 'label': labels}))
+    trainer.train_model(model_type=model_type)
+    return trainer
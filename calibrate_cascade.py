@@ -0,0 +1,232 @@
+"""
+Cascade Calibration Tool
+Finds the rule-score band outside which the detector can skip the ML model,
+and reports how often each tier is skipped, the ML time saved and how much
+the predictions change on a labeled dataset
+Usage: python calibrate_cascade.py [data.csv] [--min-agreement 0.99] [--train]
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.models.detector import JobScamDetector
+from backend.utils.text_processor import TextProcessor
+from train_model import ScamDetectorTrainer
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Rule weights only add up, so "no band edge" is just outside [0, 1]
+NO_LOW = -1.0
+NO_HIGH = 2.0
+
+# Band edges tried per side; with more distinct rule scores, quantiles of them are used
+MAX_EDGES = 64
+
+
+def score_postings(detector: JobScamDetector, texts: List[str]) -> Tuple[np.ndarray, ...]:
+    """
+    Rule and ML scores per posting, with the time each stage took
+
+    ML scores are taken one posting at a time, as /analyze would.
+
+    Returns:
+        (rule_scores, ml_scores, rule_seconds, ml_seconds) arrays
+    """
+    processor = TextProcessor()
+    pack = detector.rule_pack
+    rule_scores, ml_scores, rule_seconds, ml_seconds = [], [], [], []
+    for text in texts:
+        text = processor.clean_text(text)
+
+        start = time.perf_counter()
+        context = pack.context(text)
+        features = pack.feature_extractor.extract(text, context=context)
+        rule_scores.append(pack.rule_engine.evaluate(text, features, context)['score'])
+        rule_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ml_scores.append(detector._ml_scores([text])[0])
+        ml_seconds.append(time.perf_counter() - start)
+
+    return tuple(np.array(values) for values in (rule_scores, ml_scores, rule_seconds, ml_seconds))
+
+
+def full_pipeline(detector: JobScamDetector, rule_scores: np.ndarray, ml_scores: np.ndarray,
+                  labels: np.ndarray) -> Dict:
+    """
+    Band-independent scores and labels, computed once for all bands
+
+    Returns:
+        Dict with the full pipeline's scores and accuracy, and per posting
+        whether its prediction label is unchanged when scored by rules alone
+    """
+    full = np.array([detector._combine_scores(ml, rule) for ml, rule in zip(ml_scores, rule_scores)])
+    same_label = np.array([
+        detector._get_prediction_label(score) == detector._get_prediction_label(rule)
+        for score, rule in zip(full, rule_scores)
+    ], dtype=bool)
+    # Suspicious or worse counts as flagging a scam
+    threshold = settings.SCAM_THRESHOLD_MEDIUM
+    return {
+        'scores': full,
+        'same_label': same_label,
+        'correct_full': (full >= threshold) == labels,
+        'correct_rules': (rule_scores >= threshold) == labels,
+    }
+
+
+def evaluate_band(detector: JobScamDetector, rule_scores: np.ndarray, ml_scores: np.ndarray,
+                  labels: np.ndarray, ml_seconds: np.ndarray, low: float, high: float,
+                  full: Dict = None) -> Dict:
+    """
+    Effect of skipping ML outside (low, high) compared to always running it
+
+    Args:
+        detector: Detector whose score combination and labels are used
+        rule_scores, ml_scores, ml_seconds: From score_postings
+        labels: 1 for scam, 0 for legitimate
+        low, high: Cascade band; NO_LOW / NO_HIGH disable an edge
+        full: full_pipeline() for these postings (computed if not given)
+
+    Returns:
+        Dict with the skip rate per tier, the agreement of prediction labels
+        with the full pipeline, accuracy of both, and ML time saved
+    """
+    if full is None:
+        full = full_pipeline(detector, rule_scores, ml_scores, labels)
+    skip_low = rule_scores <= low
+    skip_high = rule_scores >= high
+    skipped = skip_low | skip_high
+
+    return {
+        'low': low,
+        'high': high,
+        'skipped_low': float(skip_low.mean()),
+        'skipped_high': float(skip_high.mean()),
+        'agreement': float(np.mean(~skipped | full['same_label'])),
+        'accuracy_full': float(full['correct_full'].mean()),
+        'accuracy_cascade': float(np.where(skipped, full['correct_rules'], full['correct_full']).mean()),
+        'ml_time_saved': float(ml_seconds[skipped].sum() / ml_seconds.sum()) if ml_seconds.sum() else 0.0,
+        'ms_saved_per_posting': float(ml_seconds[skipped].sum() / len(ml_seconds) * 1e3),
+    }
+
+
+def candidate_bands(rule_scores: np.ndarray, max_edges: int = MAX_EDGES) -> List[Tuple[float, float]]:
+    """
+    Bands whose edges are observed rule scores (or open)
+
+    Every distinct score is an edge when there are at most `max_edges` of
+    them; otherwise evenly spaced quantiles of the scores are, so the number
+    of bands stays below (max_edges + 1) ** 2.
+    """
+    values = np.unique(np.round(rule_scores, 6))
+    if len(values) > max_edges:
+        values = np.unique(np.quantile(values, np.linspace(0, 1, max_edges), method='nearest'))
+    values = values.tolist()
+    lows = [NO_LOW] + values
+    highs = values + [NO_HIGH]
+    return [(low, high) for low in lows for high in highs if low < high]
+
+
+def calibrate(detector: JobScamDetector, texts: List[str], labels: np.ndarray,
+              min_agreement: float = 0.99, max_accuracy_drop: float = 0.0) -> Tuple[Dict, List[Dict]]:
+    """
+    Evaluate all candidate bands and pick the one that skips ML most often
+
+    A band qualifies when its predictions agree with the full pipeline on at
+    least `min_agreement` of postings and its accuracy is at most
+    `max_accuracy_drop` below the full pipeline's.
+
+    Returns:
+        (best qualifying band or None, all evaluated bands)
+    """
+    rule_scores, ml_scores, _, ml_seconds = score_postings(detector, texts)
+    full = full_pipeline(detector, rule_scores, ml_scores, labels)
+    reports = [
+        evaluate_band(detector, rule_scores, ml_scores, labels, ml_seconds, low, high, full)
+        for low, high in candidate_bands(rule_scores)
+    ]
+    qualifying = [
+        report for report in reports
+        if report['agreement'] >= min_agreement
+        and report['accuracy_cascade'] >= report['accuracy_full'] - max_accuracy_drop
+    ]
+    best = max(
+        qualifying, key=lambda report: (report['ml_time_saved'], report['high'] - report['low']),
+        default=None
+    )
+    return best, reports
+
+
+def format_edge(value: float) -> str:
+    return "off" if value in (NO_LOW, NO_HIGH) else f"{value:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('data', nargs='?', default='data/raw/fake_job_postings.csv',
+                        help='CSV with text/label (or fake_job_postings.csv) columns')
+    parser.add_argument('--min-agreement', type=float, default=0.99,
+                        help='Min share of postings whose prediction label must not change')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.0)
+    parser.add_argument('--train', action='store_true',
+                        help='Train a model on the data instead of loading MODEL_PATH '
+                             '(bands are then calibrated on its held-out test split)')
+    parser.add_argument('--top', type=int, default=10, help='Bands to list')
+    args = parser.parse_args()
+
+    trainer = ScamDetectorTrainer(data_path=args.data)
+    df = trainer.load_data()
+    texts = df['text'].fillna('').astype(str).tolist()
+    labels = df['label'].to_numpy()
+
+    detector = JobScamDetector()
+    detector.cache = None
+    detector.near_duplicates = None
+    if args.train:
+        trainer.prepare_data(df)
+        trainer.train_model(model_type=settings.MODEL_TYPE)
+        detector.set_model(trainer.model, trainer.vectorizer, "calibration")
+        detector.near_duplicates = None
+        # ML scores on the training rows are in-sample and would make every band look safe
+        texts = trainer.X_test.fillna('').astype(str).tolist()
+        labels = trainer.y_test.to_numpy()
+    if not detector.is_loaded():
+        print("No model loaded; train one first (python train_model.py) or pass --train")
+        sys.exit(1)
+
+    best, reports = calibrate(detector, texts, labels, args.min_agreement, args.max_accuracy_drop)
+
+    print("\n" + "="*86)
+    print(f"CASCADE CALIBRATION ({len(texts)} postings, model {detector.model_version})")
+    print("="*86)
+    print(f"{'low':>7}{'high':>7}{'skip low':>10}{'skip high':>11}{'agreement':>11}"
+          f"{'acc full':>10}{'acc casc':>10}{'ML saved':>10}{'ms/post':>10}")
+    ranked = sorted(reports, key=lambda report: -report['ml_time_saved'])
+    shown = [report for report in ranked if report['agreement'] >= args.min_agreement][:args.top]
+    for report in shown or ranked[:args.top]:
+        print(f"{format_edge(report['low']):>7}{format_edge(report['high']):>7}"
+              f"{report['skipped_low']:>10.1%}{report['skipped_high']:>11.1%}"
+              f"{report['agreement']:>11.2%}{report['accuracy_full']:>10.2%}"
+              f"{report['accuracy_cascade']:>10.2%}{report['ml_time_saved']:>10.1%}"
+              f"{report['ms_saved_per_posting']:>10.2f}")
+    print("="*86 + "\n")
+
+    if best is None or best['ml_time_saved'] == 0:
+        print("No band skips ML without changing predictions; keep CASCADE_ENABLED=False")
+        return
+
+    print("Recommended settings:")
+    print("CASCADE_ENABLED=True")
+    print(f"CASCADE_LOW={best['low'] if best['low'] != NO_LOW else -1}")
+    print(f"CASCADE_HIGH={best['high'] if best['high'] != NO_HIGH else 2}")
+
+
+if __name__ == "__main__":
+    main()
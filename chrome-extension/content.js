@@ -3,20 +3,63 @@
 
 let analysisResult = null;
 
+// Text nodes behind the last extracted page text: [{ node, start, end }]
+let pageSegments = [];
+
+const SKIPPED_TAGS = ['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE'];
+
 // Listen for messages from popup
 chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
-    if (request.action === 'highlight') {
+    if (request.action === 'extractText') {
+        sendResponse({ text: extractPageText(request.maxLength) });
+    } else if (request.action === 'highlight') {
         highlightRiskyPhrases(request.phrases);
         sendResponse({ success: true });
     }
 });
 
+function extractPageText(maxLength = 5000) {
+    // Join visible text nodes with spaces and remember where each one starts,
+    // so API offsets into this text map straight back to DOM nodes
+    const walker = document.createTreeWalker(
+        document.body,
+        NodeFilter.SHOW_TEXT,
+        {
+            acceptNode: node => {
+                const parent = node.parentElement;
+                if (!parent || SKIPPED_TAGS.includes(parent.tagName) || !node.textContent.trim()) {
+                    return NodeFilter.FILTER_REJECT;
+                }
+                return NodeFilter.FILTER_ACCEPT;
+            }
+        }
+    );
+    
+    pageSegments = [];
+    let text = '';
+    let node;
+    while ((node = walker.nextNode()) && text.length < maxLength) {
+        const start = text.length;
+        text += node.textContent;
+        pageSegments.push({ node, start, end: text.length });
+        text += ' ';
+    }
+    
+    return text.substring(0, maxLength);
+}
+
 function highlightRiskyPhrases(phrases) {
     if (!phrases || phrases.length === 0) return;
     
     // Create highlight styles
     injectHighlightStyles();
     
+    const hasOffsets = phrases.every(p => Number.isInteger(p.start) && Number.isInteger(p.end));
+    if (hasOffsets && pageSegments.length > 0) {
+        highlightByOffsets(phrases);
+        return;
+    }
+    
     // Get all text nodes
     const walker = document.createTreeWalker(
         document.body,
@@ -48,6 +91,44 @@ function highlightRiskyPhrases(phrases) {
     });
 }
 
+function highlightByOffsets(phrases) {
+    // Work from the end of the page text so splitting a node never shifts
+    // the offsets of phrases still to be highlighted
+    const ordered = [...phrases].sort((a, b) => b.start - a.start);
+    const remainingNode = new Map();  // segment -> text node left before the last split
+    
+    ordered.forEach(phrase => {
+        const segment = findSegment(phrase.start);
+        if (!segment) return;
+        
+        const textNode = remainingNode.get(segment) || segment.node;
+        const start = phrase.start - segment.start;
+        const end = Math.min(phrase.end, segment.end) - segment.start;
+        const length = Math.min(end, textNode.textContent.length) - start;
+        if (length <= 0 || !textNode.parentNode) return;
+        
+        remainingNode.set(segment, highlightText(textNode, start, length, phrase.risk_level));
+    });
+}
+
+function findSegment(offset) {
+    // Binary search for the text node containing offset
+    let low = 0;
+    let high = pageSegments.length - 1;
+    while (low <= high) {
+        const mid = (low + high) >> 1;
+        const segment = pageSegments[mid];
+        if (offset < segment.start) {
+            high = mid - 1;
+        } else if (offset >= segment.end) {
+            low = mid + 1;
+        } else {
+            return segment;
+        }
+    }
+    return null;
+}
+
 function highlightText(textNode, start, length, riskLevel) {
     const text = textNode.textContent;
     const parent = textNode.parentNode;
@@ -66,6 +147,8 @@ function highlightText(textNode, start, length, riskLevel) {
     parent.insertBefore(span, textNode);
     parent.insertBefore(after, textNode);
     parent.removeChild(textNode);
+    
+    return before;
 }
 
 function injectHighlightStyles() {
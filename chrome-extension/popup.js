@@ -23,13 +23,19 @@ async function analyzeCurrentPage() {
         // Get current tab
         const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
         
-        // Extract text from page
-        const results = await chrome.scripting.executeScript({
-            target: { tabId: tab.id },
-            function: extractPageText
-        });
-        
-        const pageText = results[0].result;
+        // Extract text from page (the content script keeps a node map for highlighting)
+        let pageText;
+        try {
+            const extracted = await chrome.tabs.sendMessage(tab.id, { action: 'extractText' });
+            pageText = extracted.text;
+        } catch (e) {
+            // Content script not injected (e.g. tab opened before install)
+            const results = await chrome.scripting.executeScript({
+                target: { tabId: tab.id },
+                function: extractPageText
+            });
+            pageText = results[0].result;
+        }
         
         if (!pageText || pageText.trim().length < 50) {
             showError('Not enough text found on this page. Try a different page or paste text manually.');
@@ -55,6 +61,12 @@ async function analyzeCurrentPage() {
         const result = await response.json();
         displayResults(result);
         
+        // Highlight phrases on the page using the offsets returned by the API
+        chrome.tabs.sendMessage(tab.id, {
+            action: 'highlight',
+            phrases: result.highlighted_phrases
+        }).catch(() => {});
+        
         // Save to storage for later
         chrome.storage.local.set({ 
             lastAnalysis: result,
@@ -1,7 +1,10 @@
 """
 Unit tests for Job Scam Detection API
 """
+import asyncio
+import json
 import pytest
+import httpx
 from fastapi.testclient import TestClient
 import sys
 import os
@@ -9,7 +12,12 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from backend.config import settings
+from backend import main
 from backend.main import app
+from backend.utils.micro_batcher import MicroBatcher
+from backend.utils.report_store import ReportStore, iter_reports
+from backend.utils.worker_pool import WorkerPool
 
 client = TestClient(app)
 
@@ -20,6 +28,28 @@ def test_health_check():
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
+    assert data["rule_pack_version"]
+
+
+def test_reload_rules():
+    """Test rule pack reload endpoint"""
+    response = client.post("/admin/reload-rules")
+    assert response.status_code == 200
+    assert response.json()["rule_pack_version"] == client.get("/health").json()["rule_pack_version"]
+
+
+def test_rule_stats():
+    """Test toggling and reading rule counters"""
+    response = client.post("/admin/rule-stats", json={"enabled": True, "reset": True})
+    assert response.status_code == 200
+    
+    client.post("/analyze", json={"text": "Pay $99 registration fee now!"})
+    data = client.get("/admin/rule-stats").json()
+    assert data["enabled"] is True
+    assert data["rules"]["Requests upfront payment"]["hits"] == 1
+    assert "requires_payment" in data["features"]
+    
+    client.post("/admin/rule-stats", json={"enabled": False, "reset": True})
 
 
 def test_analyze_legitimate_job():
@@ -57,6 +87,63 @@ def test_analyze_scam_job():
     assert len(data["flags"]) > 0  # Should have scam flags
 
 
+def test_highlight_offsets_in_submitted_text():
+    """Test that highlighted phrases point into the original request text"""
+    text = "🚨  Pay   $99  registration\n\nfee!  WhatsApp   only"
+    response = client.post("/analyze", json={"text": text})
+    assert response.status_code == 200
+    
+    phrases = {p["reason"]: p for p in response.json()["highlighted_phrases"]}
+    fee = phrases["Requests upfront payment"]
+    assert text[fee["start"]:fee["end"]] == "registration\n\nfee"
+    whatsapp = phrases["WhatsApp/Telegram-only communication"]
+    assert text[whatsapp["start"]:whatsapp["end"]] == "WhatsApp   only"
+
+
+def test_cached_result_maps_offsets_per_request():
+    """Test that a cache hit for the same cleaned text keeps offsets of the new request"""
+    first = "Pay $99 registration fee now"
+    second = "Pay   $99\tregistration    fee now"  # cleans to the same text
+    client.post("/analyze", json={"text": first})
+    response = client.post("/analyze", json={"text": second})
+    
+    fee = response.json()["highlighted_phrases"][0]
+    assert second[fee["start"]:fee["end"]] == "registration    fee"
+
+
+def test_analyze_etag_revalidation():
+    """Test ETag and If-None-Match on /analyze"""
+    payload = {"text": "URGENT! Pay $99 registration fee", "url": "https://example.com/job/1"}
+    response = client.post("/analyze", json=payload)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    
+    response = client.post("/analyze", json=payload, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not response.content
+    
+    # A different text or URL is a different result
+    payload["url"] = "https://example.com/job/2"
+    response = client.post("/analyze", json=payload, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_cache_stats():
+    """Test result cache statistics endpoint"""
+    text = "Unique posting for cache stats: Data Analyst at Example Corp"
+    client.post("/analyze", json={"text": text})
+    before = client.get("/admin/cache-stats").json()
+    client.post("/analyze", json={"text": text})
+    after = client.get("/admin/cache-stats").json()
+    
+    assert after["enabled"]
+    assert after["hits"] == before["hits"] + 1
+    assert client.post("/admin/cache-clear").status_code == 200
+    assert client.get("/admin/cache-stats").json()["entries"] == 0
+
+
 def test_analyze_with_url():
     """Test analysis with URL parameter"""
     response = client.post("/analyze", json={
@@ -73,8 +160,10 @@ def test_analyze_empty_text():
     assert response.status_code in [200, 400, 500]
 
 
-def test_report_scam():
+def test_report_scam(tmp_path, monkeypatch):
     """Test scam reporting endpoint"""
+    store = ReportStore(str(tmp_path / "reports.sqlite"))
+    monkeypatch.setattr(main, 'report_store', store)
     response = client.post("/report", json={
         "text": "Scam job posting",
         "url": "https://scam-site.com/job"
@@ -82,6 +171,15 @@ def test_report_scam():
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "success"
+    
+    client.post("/report", json={"text": "scam job  posting", "user_feedback": "asked for a fee"})
+    assert client.post("/report", json={"text": "  "}).status_code == 400
+    store.close()
+    reports = list(iter_reports(store.path))
+    assert len(reports) == 1
+    assert reports[0]["report_count"] == 2
+    assert reports[0]["url"] == "https://scam-site.com/job"
+    assert reports[0]["user_feedback"] == "asked for a fee"
 
 
 def test_batch_analyze():
@@ -99,6 +197,36 @@ def test_batch_analyze():
     assert len(data["results"]) == 2
 
 
+def test_analyze_mode_and_fields():
+    """Test score-only mode and field selection on the analysis endpoints"""
+    payload = {"text": "URGENT!!! Pay $99 registration fee. WhatsApp only"}
+    full = client.post("/analyze", json=payload).json()
+    
+    response = client.post("/analyze", params={"mode": "score"}, json=payload)
+    assert response.status_code == 200
+    assert response.json() == {key: full[key] for key in ("prediction", "score", "confidence")}
+    assert response.headers["ETag"] != client.post("/analyze", json=payload).headers["ETag"]
+    
+    response = client.post("/analyze", params={"fields": "score,flags"}, json=payload)
+    assert response.json() == {"score": full["score"], "flags": full["flags"]}
+    
+    for params in ({"fields": "score,verdict"}, {"fields": ","}, {"mode": "score", "fields": "score"}):
+        assert client.post("/analyze", params=params, json=payload).status_code == 422
+    
+    response = client.post("/batch-analyze", params={"mode": "score"}, json=[payload["text"]])
+    assert response.json()["results"] == [{key: full[key] for key in ("prediction", "score", "confidence")}]
+    
+    response = client.post(
+        "/v2/batch-analyze", params={"fields": "score"}, content=json.dumps({"id": 1, **payload}) + "\n"
+    )
+    assert json.loads(response.text) == {"id": 1, "result": {"score": full["score"]}}
+    
+    # The documented schema allows the subsets
+    schemas = client.get("/openapi.json").json()["components"]["schemas"]
+    schema = schemas["SelectedAnalysisResponse"]
+    assert set(schema["properties"]) == set(full) and not schema.get("required")
+
+
 def test_response_structure():
     """Test that response has all required fields"""
     response = client.post("/analyze", json={
@@ -126,5 +254,153 @@ def test_trust_score_range():
     assert 0.0 <= data["confidence"] <= 1.0
 
 
+
+def test_text_length_limit(monkeypatch):
+    """Test that texts over MAX_TEXT_LENGTH are rejected before analysis"""
+    monkeypatch.setattr(settings, 'MAX_TEXT_LENGTH', 100)
+    
+    response = client.post("/analyze", json={"text": "x" * 101})
+    assert response.status_code == 413
+    
+    response = client.post("/batch-analyze", json=["short", "x" * 101])
+    assert response.status_code == 413
+    
+    assert client.post("/analyze", json={"text": "x" * 100}).status_code == 200
+
+
+def test_analyze_rejected_when_pool_is_saturated(monkeypatch):
+    """Test that a full analysis queue answers 429 with Retry-After"""
+    saturated = WorkerPool('thread', workers=1, queue_size=0)
+    saturated.in_flight = 1
+    monkeypatch.setattr(main, 'pool', saturated)
+    
+    response = client.post("/analyze", json={"text": "Pay $99 registration fee"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.post("/batch-analyze", json=["text"]).status_code == 429
+    assert client.get("/admin/worker-stats").json()["rejected"] == 2
+
+
+
+def test_concurrent_analyze_is_micro_batched(monkeypatch):
+    """Test that concurrent /analyze calls share a batch and get their own results"""
+    batcher = MicroBatcher(main.analyze_coalesced, max_size=8, max_wait_ms=50)
+    monkeypatch.setattr(main, 'batcher', batcher)
+    texts = [
+        "Software Engineer at Tech Corp. 3+ years Python experience.",
+        "URGENT!!! Earn $500 per day from home! Pay $99 registration fee!!!",
+        "Data Analyst needed. SQL, Python, Tableau.",
+    ]
+    expected = [client.post("/analyze", json={"text": text}).json() for text in texts]
+    
+    async def post_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/analyze", json={"text": text}) for text in texts))
+    
+    batches_before = batcher.stats()['batches']
+    responses = asyncio.run(post_all())
+    assert [response.json()["score"] for response in responses] == [data["score"] for data in expected]
+    assert [response.json()["prediction"] for response in responses] == [data["prediction"] for data in expected]
+    # The first request finds nothing in flight and goes alone; the others share a batch
+    assert batcher.stats()['batches'] == batches_before + 2
+
+
+def test_micro_batch_failure_only_fails_the_bad_request(monkeypatch):
+    """Test that a posting that breaks its batch only fails its own /analyze request"""
+    batcher = MicroBatcher(main.analyze_coalesced, max_size=8, max_wait_ms=50)
+    monkeypatch.setattr(main, 'batcher', batcher)
+    monkeypatch.setattr(main.detector, 'cache', None)
+    texts = ["Software Engineer at Tech Corp.", "BROKEN posting", "Data Analyst needed. SQL, Python."]
+    analyze = main.detector.analyze
+    
+    def analyze_batch(batch_texts, *args, **kwargs):
+        if any("broken" in text.lower() for text in batch_texts):
+            raise ValueError("bad posting")
+        return [analyze(text) for text in batch_texts]
+    
+    def analyze_one(text, *args, **kwargs):
+        if "broken" in text.lower():
+            raise ValueError("bad posting")
+        return analyze(text, *args, **kwargs)
+    
+    monkeypatch.setattr(main.detector, 'analyze_batch', analyze_batch)
+    monkeypatch.setattr(main.detector, 'analyze', analyze_one)
+    
+    async def post_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/analyze", json={"text": text}) for text in texts))
+    
+    responses = asyncio.run(post_all())
+    assert [response.status_code for response in responses] == [200, 500, 200]
+    assert batcher.stats()['largest'] >= 2
+
+
+def test_stream_batch_analyze(monkeypatch):
+    """Test that NDJSON records stream back in order with per-item errors"""
+    monkeypatch.setattr(settings, 'STREAM_CHUNK_SIZE', 2)
+    monkeypatch.setattr(settings, 'MAX_TEXT_LENGTH', 1000)
+    scam = "URGENT!!! Earn $500 per day from home! Pay $99 registration fee!!!"
+    lines = [
+        json.dumps({"id": "a", "text": "Software Engineer at Tech Corp. Python experience.",
+                    "url": "https://techcorp.com/jobs/1"}),
+        "{not json",
+        json.dumps({"text": scam}),
+        "",
+        json.dumps({"id": 7, "url": "https://example.com"}),
+        json.dumps({"id": "long", "text": "x" * 1001}),
+    ]
+    
+    response = client.post("/v2/batch-analyze", content="\n".join(lines) + "\n")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["id"] for item in results] == ["a", 2, 3, 7, "long"]
+    assert [item.get("error", {}).get("status") for item in results] == [None, 400, None, 422, 413]
+    
+    expected = client.post("/analyze", json={"text": scam}).json()
+    assert results[2]["result"] == expected
+
+
+def test_stream_batch_waits_for_saturated_pool(monkeypatch):
+    """Test that a streamed chunk waits for a worker instead of failing when the pool is full"""
+    saturated = WorkerPool('thread', workers=1, queue_size=0)
+    saturated.in_flight = 1
+    monkeypatch.setattr(main, 'pool', saturated)
+    monkeypatch.setattr(main, 'STREAM_RETRY_DELAY', 0.01)
+    
+    async def free_worker():
+        await asyncio.sleep(0.05)
+        saturated.in_flight = 0
+    
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            _, response = await asyncio.gather(
+                free_worker(), http.post("/v2/batch-analyze", content=json.dumps({"text": "Data Analyst"}))
+            )
+            return response
+    
+    response = asyncio.run(post())
+    assert "result" in json.loads(response.text)
+    assert saturated.rejected >= 1
+
+
+def test_metrics_endpoint():
+    """Test that /metrics exposes request, stage and prediction metrics"""
+    client.post("/analyze", json={"text": "Data analyst role, apply through our careers page with your resume."})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="POST",endpoint="/analyze",status="200"}' in body
+    assert 'analysis_stage_duration_seconds_count{stage="clean_text"}' in body
+    assert 'analysis_stage_duration_seconds_count{stage="explain"}' in body
+    assert 'predictions_total{label="' in body
+    assert 'model_info{' in body
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,180 @@
+"""
+Tests for bulk analysis jobs
+"""
+import asyncio
+import io
+import json
+import sys
+import os
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.utils.bulk_jobs import BulkJobRunner, read_csv, store_upload
+from backend.utils.job_store import COMPLETED, FAILED, QUEUED, JobStore
+from backend.utils.worker_pool import WorkerPool
+
+
+def fake_analyze(seen):
+    async def analyze(items, fields):
+        seen.extend(item_id for item_id, *_ in items)
+        return [{'id': item_id, 'result': {'length': len(text)}} for item_id, text, _, _ in items]
+    return analyze
+
+
+async def run_until_done(runner, store, job_id):
+    runner.start()
+    try:
+        for _ in range(200):
+            if store.get_job(job_id)['status'] not in ('queued', 'running'):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await runner.stop()
+
+
+def test_runner_resumes_from_checkpoint(tmp_path):
+    """Test that a job interrupted after one chunk only analyzes the rest on restart"""
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    job_id = store.create_job("inventory.jsonl")
+    store_upload(store, job_id, [(f"job-{n}", "x" * n, None, None) for n in range(5)])
+    assert store.get_job(job_id)['status'] == QUEUED
+
+    # A previous run finished the first two postings before stopping
+    store.start_job(job_id)
+    store.save_results(job_id, [(0, {'id': 'job-0', 'result': {}}), (1, {'id': 'job-1', 'result': {}})])
+
+    seen = []
+    runner = BulkJobRunner(store, fake_analyze(seen), chunk_size=2)
+    asyncio.run(run_until_done(runner, store, job_id))
+
+    assert seen == ["job-2", "job-3", "job-4"]
+    job = store.get_job(job_id)
+    assert (job['status'], job['processed'], job['total']) == (COMPLETED, 5, 5)
+    assert [output['id'] for output in store.results(job_id, 0, 10)] == [f"job-{n}" for n in range(5)]
+    assert store.results(job_id, 3, 10)[0]['result'] == {'length': 3}
+    assert store.pending_items(job_id, 10) == []  # Inputs dropped once done
+
+
+def test_runner_passes_job_fields(tmp_path):
+    """Test that a job's chosen result fields reach the analyze callable"""
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    job_id = store.create_job("inventory.jsonl", ("prediction", "score", "confidence"))
+    store_upload(store, job_id, [("a", "text", None, None)])
+    assert store.get_job(job_id)['fields'] == ("prediction", "score", "confidence")
+    assert store.get_job(store.create_job("all.jsonl"))['fields'] is None
+
+    received = []
+
+    async def analyze(items, fields):
+        received.append(fields)
+        return [{'id': item_id, 'result': {}} for item_id, *_ in items]
+
+    asyncio.run(run_until_done(BulkJobRunner(store, analyze), store, job_id))
+    assert received == [("prediction", "score", "confidence")]
+
+
+def test_runner_fails_interrupted_uploads_and_failing_chunks(tmp_path):
+    """Test that cut-off uploads and chunks failing every retry mark their job failed"""
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    interrupted = store.create_job("partial.csv")
+    broken = store.create_job("broken.jsonl")
+    store_upload(store, broken, [("a", "text", None, None)])
+
+    async def analyze(items, fields):
+        raise RuntimeError("model failed")
+
+    runner = BulkJobRunner(store, analyze, retries=2, retry_delay=0)
+    asyncio.run(run_until_done(runner, store, broken))
+
+    assert store.get_job(interrupted)['status'] == FAILED
+    job = store.get_job(broken)
+    assert (job['status'], job['processed'], job['error']) == (FAILED, 0, "model failed")
+
+
+def test_runner_picks_up_jobs_queued_elsewhere(tmp_path):
+    """Test that jobs queued by another process sharing the store get processed"""
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    seen = []
+    runner = BulkJobRunner(store, fake_analyze(seen), poll_interval=0.01)
+
+    async def main_():
+        runner.start()
+        job_id = store.create_job(None)
+        store_upload(store, job_id, [("a", "text", None, None)])  # No submit() here
+        for _ in range(200):
+            if store.get_job(job_id)['status'] == COMPLETED:
+                break
+            await asyncio.sleep(0.01)
+        await runner.stop()
+
+    asyncio.run(main_())
+    assert seen == ["a"]
+
+
+def test_read_csv():
+    """Test that CSV rows map to records and a missing text column is rejected"""
+    data = "id,text,url,extra\n1,\"Line one,\nline two\",,x\n2,Second,https://example.com,y\n"
+    records = list(read_csv(io.BytesIO(data.encode('utf-8-sig')), 1000))
+    assert [record for _, record in records] == [
+        {'id': '1', 'text': "Line one,\nline two"},
+        {'id': '2', 'text': "Second", 'url': "https://example.com"},
+    ]
+
+    with pytest.raises(ValueError):
+        list(read_csv(io.BytesIO(b"title,body\na,b\n"), 1000))
+
+
+def test_bulk_job_api(tmp_path, monkeypatch):
+    """Test uploading, polling, paging and deleting a bulk job"""
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    monkeypatch.setattr(main, 'job_store', store)
+    monkeypatch.setattr(main, 'bulk_runner', BulkJobRunner(store, main.analyze_items, chunk_size=2))
+    monkeypatch.setattr(main, 'pool', WorkerPool('thread', workers=2))  # Shut down with the app
+    lines = [
+        json.dumps({"id": "a", "text": "Software Engineer at Tech Corp. Python experience."}),
+        json.dumps({"id": "b", "text": "URGENT!!! Earn $500 per day! Pay $99 registration fee!!!"}),
+        "{broken",
+        json.dumps({"text": "Data Analyst needed. SQL, Python, Tableau."}),
+    ]
+
+    with TestClient(main.app) as client:
+        response = client.post("/jobs", files={"file": ("inventory.jsonl", "\n".join(lines).encode())})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.json()["total"] == 4
+
+        for _ in range(200):
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] == "completed":
+                break
+            time.sleep(0.01)
+        assert (job["processed"], job["errors"], job["progress"]) == (4, 1, 1.0)
+
+        page = client.get(f"/jobs/{job_id}/results", params={"limit": 3}).json()
+        assert [item["id"] for item in page["results"]] == ["a", "b", 3]
+        assert page["results"][2]["error"]["status"] == 400
+        assert page["next_offset"] == 3
+        page = client.get(f"/jobs/{job_id}/results", params={"offset": 3}).json()
+        assert [item["id"] for item in page["results"]] == [4]
+        assert page["next_offset"] is None
+
+        expected = client.post("/analyze", json={"text": json.loads(lines[1])["text"]}).json()
+        first = client.get(f"/jobs/{job_id}/results", params={"offset": 1, "limit": 1}).json()
+        assert first["results"][0]["result"] == expected
+
+        assert client.post("/jobs", files={"file": ("notes.txt", b"text")}).status_code == 400
+        csv_job = client.post("/jobs", files={"file": ("jobs.csv", b"title\nno text column\n")})
+        assert csv_job.status_code == 400
+
+        assert client.delete(f"/jobs/{job_id}").status_code == 200
+        assert client.get(f"/jobs/{job_id}").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
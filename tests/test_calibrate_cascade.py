@@ -0,0 +1,61 @@
+"""
+Tests for the cascade calibration tool
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from calibrate_cascade import NO_HIGH, NO_LOW, candidate_bands, evaluate_band, full_pipeline
+from backend.models.detector import JobScamDetector
+
+
+@pytest.fixture
+def detector():
+    detector = JobScamDetector()
+    detector.model = object()  # Combine scores as if a model were loaded
+    return detector
+
+
+def test_evaluate_band(detector):
+    """Test skip rates, agreement and time saved for a band"""
+    rule_scores = np.array([0.0, 0.0, 0.3, 1.0])
+    ml_scores = np.array([0.1, 0.9, 0.2, 0.9])
+    labels = np.array([0, 1, 0, 1])
+    ml_seconds = np.array([1.0, 1.0, 1.0, 1.0])
+    
+    report = evaluate_band(detector, rule_scores, ml_scores, labels, ml_seconds, 0.0, 1.0)
+    assert report['skipped_low'] == 0.5
+    assert report['skipped_high'] == 0.25
+    assert report['ml_time_saved'] == 0.75
+    # The second posting drops from Suspicious (0.54) to Likely Legitimate (0.0)
+    assert report['agreement'] == 0.75
+    assert report['accuracy_full'] == 1.0
+    assert report['accuracy_cascade'] == 0.75
+    
+    off = evaluate_band(detector, rule_scores, ml_scores, labels, ml_seconds, NO_LOW, NO_HIGH)
+    assert off['ml_time_saved'] == 0.0
+    assert off['agreement'] == 1.0
+    
+    full = full_pipeline(detector, rule_scores, ml_scores, labels)
+    for low, high in candidate_bands(rule_scores):
+        assert evaluate_band(detector, rule_scores, ml_scores, labels, ml_seconds, low, high, full) == \
+            evaluate_band(detector, rule_scores, ml_scores, labels, ml_seconds, low, high)
+
+
+def test_candidate_bands():
+    bands = candidate_bands(np.array([0.0, 0.5, 0.5]))
+    assert (NO_LOW, NO_HIGH) in bands
+    assert (0.0, 0.5) in bands
+    assert all(low < high for low, high in bands)
+    
+    # Many distinct scores: edges are capped at quantiles that were observed
+    scores = np.random.default_rng(0).random(5000)
+    bands = candidate_bands(scores, max_edges=16)
+    assert len(bands) <= 17 ** 2
+    edges = {edge for band in bands for edge in band} - {NO_LOW, NO_HIGH}
+    assert len(edges) <= 16 and edges <= set(np.round(scores, 6).tolist())
+    assert (NO_LOW, NO_HIGH) in bands
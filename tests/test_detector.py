@@ -0,0 +1,226 @@
+"""
+Unit tests for the Job Scam Detector
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from backend.config import settings
+from backend.models.detector import JobScamDetector
+from backend.utils.near_duplicate import NearDuplicateIndex
+from backend.utils.text_processor import TextProcessor
+
+TRAINING_TEXTS = [
+    ("Software Engineer at Tech Corp. 3+ years Python experience. Competitive salary.", 0),
+    ("Marketing Manager role. Lead digital campaigns. Salary $80k-$100k.", 0),
+    ("Data Analyst needed. SQL, Python, Tableau. Contact hr@techcompany.com", 0),
+    ("URGENT!!! Earn $500 per day from home! Pay $99 registration fee!!!", 1),
+    ("Make $5000/week guaranteed! No interview required! WhatsApp only", 1),
+    ("Pay $50 training fee. Gift cards accepted. Immediate joining!", 1),
+]
+
+POSTINGS = [
+    "URGENT!!! Earn $5000 per day! Pay $99 registration fee. WhatsApp only",
+    "Software Engineer at TechCorp Inc. Apply at careers@techcorp.com",
+    "",
+    "İSTANBUL office: NO INTERVIEW, bitcoin bonus, ıntern wanted",
+    "Pay $99 training\nfee, contact whatsapp. Limited slots!!!",
+]
+
+
+@pytest.fixture
+def detector():
+    detector = JobScamDetector()
+    # Compare freshly computed results
+    detector.cache = None
+    detector.near_duplicates = None
+    return detector
+
+
+@pytest.fixture
+def trained_detector(detector):
+    texts, labels = zip(*TRAINING_TEXTS)
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    vectors = vectorizer.fit_transform(texts)
+    model = VotingClassifier(
+        estimators=[
+            ('lr', LogisticRegression(random_state=42)),
+            ('rf', RandomForestClassifier(n_estimators=10, random_state=42)),
+        ],
+        voting='soft'
+    )
+    model.fit(vectors, labels)
+    detector.set_model(model, vectorizer, "test")
+    detector.near_duplicates = None
+    return detector
+
+
+@pytest.mark.parametrize("use_model", [False, True])
+def test_analyze_batch_matches_analyze(detector, trained_detector, use_model):
+    """Test that batch analysis returns exactly the single-item results"""
+    analyzer = trained_detector if use_model else detector
+    urls = [None, "https://linkedin.com/jobs/1", None, "http://scam-site.tk", None]
+    
+    expected = [analyzer.analyze(text, url) for text, url in zip(POSTINGS, urls)]
+    assert analyzer.analyze_batch(POSTINGS, urls) == expected
+
+
+@pytest.mark.parametrize("use_model", [False, True])
+def test_score_only_matches_full(detector, trained_detector, monkeypatch, use_model):
+    """Test that score-only analysis returns the full result's prediction, score and confidence"""
+    monkeypatch.setattr(settings, 'LONG_TEXT_THRESHOLD', 500)
+    monkeypatch.setattr(settings, 'LONG_TEXT_CHUNK_SIZE', 200)
+    analyzer = trained_detector if use_model else detector
+    texts = POSTINGS + ["Team lunch on Fridays. " * 30 + "Pay $99 registration fee. URGENT!!! WhatsApp only"]
+    urls = [None, "https://linkedin.com/jobs/1", None, "http://scam-site.tk", None, None]
+    
+    expected = [
+        {key: result[key] for key in ("prediction", "score", "confidence")}
+        for result in (analyzer.analyze(text, url) for text, url in zip(texts, urls))
+    ]
+    assert [analyzer.analyze(text, url, score_only=True) for text, url in zip(texts, urls)] == expected
+    assert analyzer.analyze_batch(texts, urls, score_only=True) == expected
+
+
+def test_analyze_batch_offsets(detector):
+    """Test that batch analysis maps highlights back through offset maps"""
+    processor = TextProcessor()
+    raw = ["Pay  $99 registration   fee!!!", "Contact us on WhatsApp   only"]
+    cleaned = [processor.clean_text_with_offsets(text) for text in raw]
+    
+    results = detector.analyze_batch(
+        [text for text, _ in cleaned], offset_maps=[offset_map for _, offset_map in cleaned]
+    )
+    
+    for text, result in zip(raw, results):
+        for phrase in result['highlighted_phrases']:
+            assert text[phrase['start']:phrase['end']].lower().split() == phrase['text'].split()
+
+
+def test_ml_failure_falls_back_to_neutral(trained_detector):
+    """Test that a failing model gives the neutral ML score instead of an error"""
+    class BrokenVectorizer:
+        def transform(self, texts):
+            raise ValueError("vocabulary mismatch")
+    
+    trained_detector.vectorizer = BrokenVectorizer()
+    assert trained_detector._ml_scores(["a", "b"]) == [0.5, 0.5]
+
+
+
+class CountingVectorizer:
+    """Vectorizer wrapper that counts transformed texts"""
+    
+    def __init__(self, vectorizer):
+        self.vectorizer = vectorizer
+        self.transformed = 0
+    
+    def transform(self, texts):
+        self.transformed += len(texts)
+        return self.vectorizer.transform(texts)
+
+
+@pytest.mark.parametrize("mode", ["reuse", "blend"])
+def test_near_duplicate_reuses_ml_score(trained_detector, monkeypatch, mode):
+    """Test that a lightly edited repost uses the stored ML score"""
+    monkeypatch.setattr(settings, 'NEAR_DUPLICATE_MODE', mode)
+    trained_detector.near_duplicates = NearDuplicateIndex(100, 3)
+    counting = CountingVectorizer(trained_detector.vectorizer)
+    trained_detector.vectorizer = counting
+    
+    original = " ".join([
+        "Work from home opportunity with a guaranteed weekly income for every applicant.",
+        "No interview required and no experience needed, we train you on the job.",
+        "You will process customer payments, reship parcels and answer client messages",
+        "from your own computer for a few hours every day at your own pace.",
+        "Contact our hiring manager on WhatsApp today and pay a small registration fee",
+        "to reserve your training slot before the limited places are gone.",
+    ])
+    repost = original + " Call 555-0199"
+    
+    first, = trained_detector._ml_scores([original])
+    second, = trained_detector._ml_scores([repost])
+    
+    assert counting.transformed == (1 if mode == "reuse" else 2)
+    assert len(trained_detector.near_duplicates) == counting.transformed
+    if mode == "reuse":
+        assert second == first
+    else:
+        fresh = trained_detector.model.predict_proba(counting.vectorizer.transform([repost]))[0, 1]
+        assert second == pytest.approx((first + fresh) / 2)
+    
+    # Results say when a stored score was used
+    other = original.replace("WhatsApp", "email").replace("weekly", "monthly") + " Apply at careers@acme.io"
+    fresh_result, repost_result = trained_detector.analyze_batch([other + " " + other, original + " Call 555-0123"])
+    assert fresh_result['near_duplicate'] is None
+    assert 0.95 <= repost_result['near_duplicate'] <= 1.0
+
+
+def test_cascade_skips_ml_when_rules_are_decisive(trained_detector, monkeypatch):
+    """Test that ML only runs inside the cascade band and batch agrees with single calls"""
+    monkeypatch.setattr(settings, 'CASCADE_ENABLED', True)
+    monkeypatch.setattr(settings, 'CASCADE_LOW', 0.05)
+    monkeypatch.setattr(settings, 'CASCADE_HIGH', 1.0)
+    counting = CountingVectorizer(trained_detector.vectorizer)
+    trained_detector.vectorizer = counting
+    
+    clean = "Software Engineer at Contoso Ltd. Apply through our careers portal."
+    saturated = "Pay $99 registration fee! No interview! Guaranteed job! Gift cards accepted. WhatsApp only"
+    uncertain = "Work from home opportunity, contact us"
+    
+    results = [trained_detector.analyze(text) for text in (clean, saturated)]
+    assert counting.transformed == 0
+    assert results[0]['prediction'] == "Likely Legitimate"
+    assert results[1]['prediction'] == "High Risk Scam"
+    
+    trained_detector.analyze(uncertain)
+    assert counting.transformed == 1
+    
+    texts = [clean, uncertain, saturated]
+    assert trained_detector.analyze_batch(texts) == [trained_detector.analyze(text) for text in texts]
+
+
+
+def test_long_text_scored_in_chunks(trained_detector, monkeypatch):
+    """Test chunked analysis of long postings: highlights, ML calls and the scoring cap"""
+    monkeypatch.setattr(settings, 'LONG_TEXT_THRESHOLD', 500)
+    monkeypatch.setattr(settings, 'LONG_TEXT_CHUNK_SIZE', 200)
+    monkeypatch.setattr(settings, 'LONG_TEXT_MAX_CHARS', 1500)
+    counting = CountingVectorizer(trained_detector.vectorizer)
+    trained_detector.vectorizer = counting
+    
+    filler = "Our team works on data pipelines in Python. " * 10
+    text = filler + "Pay $99 registration fee today. " + filler + "Contact us on WhatsApp only."
+    result = trained_detector.analyze(text)
+    
+    chunks = list(TextProcessor().split_chunks(text, 200))
+    assert counting.transformed == len(chunks)
+    assert {"Requests upfront payment", "WhatsApp/Telegram-only communication"} <= set(result['flags'])
+    for phrase in result['highlighted_phrases']:
+        assert text[phrase['start']:phrase['end']].lower() == phrase['text']
+    assert "characters of this long posting" not in result['explanation']
+    
+    truncated = trained_detector.analyze(text + filler * 4)
+    assert "Only the first 1500 characters" in truncated['explanation']
+    
+    texts = [text, POSTINGS[0]]
+    assert trained_detector.analyze_batch(texts) == [trained_detector.analyze(text) for text in texts]
+
+
+def test_near_duplicate_index_refused_with_process_pool(monkeypatch):
+    """Test that the index stays off when forked workers would each fill their own copy"""
+    monkeypatch.setattr(settings, 'NEAR_DUPLICATE_SIZE', 100)
+    monkeypatch.setattr(settings, 'WORKER_POOL', 'process')
+    assert JobScamDetector().near_duplicates is None
+    monkeypatch.setattr(settings, 'WORKER_POOL', 'thread')
+    assert JobScamDetector().near_duplicates is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -98,5 +98,76 @@ def test_url_validation(extractor):
     assert features['url_suspicious'] == False
 
 
+
+def test_prefilter_preserves_features(extractor):
+    """Test that the literal prefilter does not change extracted features"""
+    unfiltered = FeatureExtractor()
+    unfiltered.prefilter = False
+    
+    for text in [
+        "URGENT!!! Earn $5000 per day! Pay $99 registration fee. WhatsApp only",
+        "Buy Amazon gift cards and message us on Telegram for immediate joining???",
+        "Software Engineer at TechCorp Inc. Apply at careers@techcorp.com",
+    ]:
+        assert extractor.extract(text) == unfiltered.extract(text)
+
+
+def test_shared_context_preserves_results():
+    """Test that sharing one AnalysisContext leaves features and rule results unchanged"""
+    from backend.models.rule_pack import load_rule_pack
+    
+    pack = load_rule_pack(None)
+    for text in [
+        "URGENT!!! Earn $5000 per day! Pay $99 registration fee. WhatsApp only",
+        "Buy Amazon gift cards and message us on Telegram for immediate joining???",
+        "Software Engineer at TechCorp Inc. Apply at careers@techcorp.com",
+        "İSTANBUL office: NO INTERVIEW, bitcoin bonus, ıntern wanted",
+    ]:
+        features = pack.feature_extractor.extract(text, "http://jobs.example.tk")
+        rules = pack.rule_engine.evaluate(text, features)
+        
+        context = pack.context(text, "http://jobs.example.tk")
+        shared_features = pack.feature_extractor.extract(text, "http://jobs.example.tk", context)
+        assert shared_features == features
+        assert pack.rule_engine.evaluate(text, shared_features, context) == rules
+
+
+def test_extract_batch_matches_extract(extractor):
+    """Test that batch extraction rows equal single-text extraction"""
+    texts = [
+        "URGENT!!! Earn $5000 per day! Pay $99 registration fee. WhatsApp only",
+        "Software Engineer at TechCorp Inc. Apply at careers@techcorp.com",
+        "",
+        "Pay $99 training\nfee, contact whatsapp",  # matches must not span texts
+        "only via telegram. İSTANBUL office, ıntern wanted, call 555-123-4567",
+        "Buy Amazon gift cards and message us on Telegram for immediate joining???",
+    ]
+    urls = [None, "https://linkedin.com/jobs/123", None, "http://scam-site.tk", None, None]
+    
+    matrix = extractor.extract_batch(iter(texts), urls)
+    
+    assert matrix.shape == (len(texts), len(FeatureExtractor.FEATURE_NAMES))
+    for row, text, url in zip(matrix, texts, urls):
+        features = extractor.extract(text, url)
+        assert tuple(features) == FeatureExtractor.FEATURE_NAMES
+        assert extractor.to_dict(row) == features
+
+
+def test_extract_batch_edge_cases(extractor):
+    """Test empty batches and misaligned URLs"""
+    assert extractor.extract_batch([]).shape == (0, len(FeatureExtractor.FEATURE_NAMES))
+    with pytest.raises(ValueError):
+        extractor.extract_batch(["a", "b"], ["http://example.com"])
+
+
+def test_extract_score_features(extractor):
+    """Test that score features equal the same keys of a full extraction"""
+    for text, url in [("Pay $99 fee, WhatsApp only", "http://scam-site.tk"),
+                      ("Software Engineer at TechCorp Inc.", None), ("", None)]:
+        features = extractor.extract(text, url)
+        expected = {name: features[name] for name in FeatureExtractor.SCORE_FEATURES}
+        assert extractor.extract_score_features(text, url) == expected
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+Unit tests for the flat forest evaluator
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.linear_model import LogisticRegression
+
+from backend.models import forest_evaluator
+from backend.models.forest_evaluator import CompiledForestScorer, FlatForest
+
+
+@pytest.fixture
+def data():
+    """Sparse non-negative rows like TF-IDF, with a label from a few columns"""
+    rng = np.random.RandomState(0)
+    X = sp.random(400, 300, density=0.05, format='csr', random_state=rng, dtype=np.float64)
+    y = (X[:, :10].sum(axis=1).A.ravel() + rng.rand(400) * 0.3 > 0.4).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("options", [
+    {'n_estimators': 20, 'max_depth': None},
+    {'n_estimators': 20, 'max_depth': 5, 'class_weight': 'balanced'},
+    {'n_estimators': 1, 'max_depth': 1},
+])
+def test_matches_sklearn(data, options):
+    """Test that flattened trees give bit-identical probabilities"""
+    X, y = data
+    forest = RandomForestClassifier(random_state=42, **options).fit(X, y)
+    flat = FlatForest(forest)
+    
+    queries = sp.vstack([X, sp.csr_matrix((3, X.shape[1]))]).tocsr()  # includes empty rows
+    np.testing.assert_array_equal(flat.predict_proba(queries), forest.predict_proba(queries))
+    np.testing.assert_array_equal(flat.predict_proba(X[:1]), forest.predict_proba(X[:1]))
+
+
+def test_chunking(data, monkeypatch):
+    """Test that batches larger than one chunk give the same result"""
+    X, y = data
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    expected = FlatForest(forest).predict_proba(X)
+    
+    monkeypatch.setattr(forest_evaluator, 'CHUNK_ROWS', 7)
+    monkeypatch.setattr(forest_evaluator, 'COMPACT_EVERY', 1)
+    np.testing.assert_array_equal(FlatForest(forest).predict_proba(X), expected)
+
+
+def test_smaller_than_pickled_forest(data):
+    import pickle
+    X, y = data
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    assert FlatForest(forest).nbytes < len(pickle.dumps(forest))
+
+
+class FixedVectorizer:
+    """Vectorizer stand-in that returns rows of a fixed matrix"""
+    
+    def __init__(self, X):
+        self.X = X
+    
+    def transform(self, rows):
+        return self.X[list(rows)]
+
+
+def test_voting_ensemble(data):
+    """Test that a soft-voting LR + RF ensemble matches with the forest flattened"""
+    X, y = data
+    model = VotingClassifier(
+        estimators=[
+            ('lr', LogisticRegression(random_state=42)),
+            ('rf', RandomForestClassifier(n_estimators=10, random_state=42)),
+        ],
+        voting='soft', weights=[1, 2]
+    ).fit(X, y)
+    
+    scorer = CompiledForestScorer(model, FixedVectorizer(X))
+    np.testing.assert_array_equal(scorer.predict_proba(range(X.shape[0])), model.predict_proba(X)[:, 1])
+
+
+def test_voting_ensemble_with_dropped_member(data):
+    """Test that weights of dropped members are skipped like VotingClassifier does"""
+    X, y = data
+    model = VotingClassifier(
+        estimators=[
+            ('lr', LogisticRegression(random_state=42)),
+            ('unused', 'drop'),
+            ('rf', RandomForestClassifier(n_estimators=10, random_state=42)),
+        ],
+        voting='soft', weights=[1, 5, 2]
+    ).fit(X, y)
+    
+    scorer = CompiledForestScorer(model, FixedVectorizer(X))
+    assert scorer.weights == [1, 2]
+    np.testing.assert_array_equal(scorer.predict_proba(range(X.shape[0])), model.predict_proba(X)[:, 1])
+
+
+def test_rejects_models_without_forest(data):
+    X, y = data
+    with pytest.raises(ValueError):
+        CompiledForestScorer(LogisticRegression().fit(X, y), FixedVectorizer(X))
+    with pytest.raises(ValueError):
+        FlatForest(LogisticRegression().fit(X, y))
@@ -0,0 +1,31 @@
+"""
+Tests for JSON response encoding
+"""
+import json
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils import json_codec
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_matches_json(monkeypatch, use_orjson):
+    """Test compact output for numpy values and non-ASCII text with and without orjson"""
+    if not use_orjson:
+        monkeypatch.setattr(json_codec, 'orjson', None)
+    elif json_codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    value = {"score": np.float64(0.25), "count": np.int64(3), "scores": np.array([0.5, 1.0]),
+             "text": "İSTANBUL office", "flags": ["a"], "url": None}
+
+    encoded = json_codec.dumps(value)
+    assert json.loads(encoded) == {"score": 0.25, "count": 3, "scores": [0.5, 1.0],
+                                   "text": "İSTANBUL office", "flags": ["a"], "url": None}
+    assert b" " not in encoded.replace("İSTANBUL office".encode(), b"")
+    with pytest.raises(TypeError):
+        json_codec.dumps({"value": object()})
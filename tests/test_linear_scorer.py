@@ -0,0 +1,100 @@
+"""
+Unit tests for the compiled linear scorer
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import MultinomialNB
+
+from backend.config import settings
+from backend.models.detector import JobScamDetector
+from backend.models.forest_evaluator import CompiledForestScorer
+from backend.models.linear_scorer import CompiledLinearScorer
+
+TRAINING_TEXTS = [
+    ("Software Engineer at Tech Corp. 3+ years Python experience. Competitive salary.", 0),
+    ("Marketing Manager role. Lead digital campaigns. Salary $80k-$100k.", 0),
+    ("Data Analyst needed. SQL, Python, Tableau. Contact hr@techcompany.com", 0),
+    ("URGENT!!! Earn $500 per day from home! Pay $99 registration fee!!!", 1),
+    ("Make $5000/week guaranteed! No interview required! WhatsApp only", 1),
+    ("Pay $50 training fee. Gift cards accepted. Immediate joining!", 1),
+]
+
+QUERIES = [
+    "URGENT hiring! Pay $99 registration fee, WhatsApp only. Earn $500 per day",
+    "Senior Python engineer, competitive salary, contact hr@techcompany.com",
+    "",
+    "zzz unknown words only",
+    "fee fee fee fee training training",
+]
+
+
+@pytest.mark.parametrize("vectorizer_options, model_options", [
+    ({'ngram_range': (1, 3), 'max_df': 0.9}, {}),
+    ({'ngram_range': (2, 3)}, {}),
+    ({'stop_words': 'english', 'sublinear_tf': True, 'norm': 'l1'}, {}),
+    ({'binary': True, 'use_idf': False, 'norm': None}, {}),
+    ({'analyzer': 'char_wb', 'ngram_range': (2, 4)}, {}),
+    ({'ngram_range': (1, 2)}, {'multi_class': 'multinomial'}),
+])
+def test_matches_predict_proba(vectorizer_options, model_options):
+    """Test that compiled scores equal sklearn's probabilities"""
+    texts, labels = zip(*TRAINING_TEXTS)
+    vectorizer = TfidfVectorizer(**vectorizer_options)
+    model = LogisticRegression(random_state=42, **model_options)
+    model.fit(vectorizer.fit_transform(texts), labels)
+    
+    scorer = CompiledLinearScorer(model, vectorizer)
+    expected = model.predict_proba(vectorizer.transform(QUERIES))[:, 1]
+    np.testing.assert_allclose(scorer.predict_proba(QUERIES), expected, rtol=1e-6, atol=1e-7)
+
+
+def test_model_without_multi_class():
+    """Test compiling a model from sklearn versions that no longer have multi_class"""
+    texts, labels = zip(*TRAINING_TEXTS)
+    vectorizer = TfidfVectorizer()
+    model = LogisticRegression(random_state=42).fit(vectorizer.fit_transform(texts), labels)
+    expected = 1 / (1 + np.exp(-model.decision_function(vectorizer.transform(QUERIES))))
+    del model.multi_class
+    
+    scorer = CompiledLinearScorer(model, vectorizer)
+    np.testing.assert_allclose(scorer.predict_proba(QUERIES), expected, rtol=1e-6, atol=1e-7)
+
+
+def test_rejects_non_linear_model():
+    texts, labels = zip(*TRAINING_TEXTS)
+    vectorizer = TfidfVectorizer()
+    model = RandomForestClassifier(n_estimators=2).fit(vectorizer.fit_transform(texts), labels)
+    
+    with pytest.raises(ValueError):
+        CompiledLinearScorer(model, vectorizer)
+
+
+@pytest.mark.parametrize("model, scorer_class", [
+    (LogisticRegression(random_state=42), CompiledLinearScorer),
+    (RandomForestClassifier(n_estimators=5, random_state=42), CompiledForestScorer),
+    (MultinomialNB(), type(None)),
+])
+def test_detector_compiled_engine(monkeypatch, model, scorer_class):
+    """Test that the compiled engine picks a scorer by model type and falls back to sklearn"""
+    monkeypatch.setattr(settings, 'ML_ENGINE', 'compiled')
+    texts, labels = zip(*TRAINING_TEXTS)
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    model.fit(vectorizer.fit_transform(texts), labels)
+    
+    detector = JobScamDetector()
+    detector.cache = None
+    detector.set_model(model, vectorizer, "test")
+    detector.near_duplicates = None
+    
+    assert type(detector.scorer) is scorer_class
+    expected = model.predict_proba(vectorizer.transform(QUERIES))[:, 1]
+    np.testing.assert_allclose(detector._ml_scores(QUERIES), expected, rtol=1e-6, atol=1e-7)
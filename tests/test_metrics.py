@@ -0,0 +1,62 @@
+"""
+Tests for the metrics registry
+"""
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.metrics import Counter, Histogram, Registry, StageClock, stage_seconds
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that buckets are rendered cumulatively with +Inf, sum and count"""
+    histogram = Histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, ('/a',))
+    histogram.observe(0.5, ('/a',), count=2)
+    histogram.observe(5.0, ('/a',))
+
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP latency_seconds Latency', '# TYPE latency_seconds histogram']
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/a"} 6.05' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+
+def test_counter_adds_up_thread_shards():
+    """Test that increments from several threads are all counted"""
+    counter = Counter('events_total', 'Events', ('kind',))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(('x',))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(('y',), 2)
+
+    assert counter.values() == {('x',): 4000, ('y',): 2}
+
+
+def test_label_values_are_escaped():
+    """Test that quotes, backslashes and newlines in label values are escaped"""
+    registry = Registry()
+    counter = registry.register(Counter('odd_total', 'Odd labels', ('label',)))
+    counter.inc(('say "hi"\\\n',))
+    assert 'odd_total{label="say \\"hi\\"\\\\\\n"} 1' in registry.render()
+
+
+def test_stage_clock_records_one_sample_per_posting():
+    """Test that a batch stage is recorded as per-posting samples"""
+    before_count, _ = stage_seconds.snapshot(('test_stage',))
+    clock = StageClock(postings=5)
+    clock.lap('test_stage')
+    count, total = stage_seconds.snapshot(('test_stage',))
+    assert count == before_count + 5
+    assert total >= 0
@@ -0,0 +1,104 @@
+"""
+Tests for the micro-batcher
+"""
+import asyncio
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.micro_batcher import MicroBatcher
+
+
+def recording_handler(batches):
+    async def handler(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+    return handler
+
+
+def test_concurrent_items_share_a_batch():
+    """Test that items arriving while a batch runs are batched and get their own results back"""
+    batches = []
+    batcher = MicroBatcher(recording_handler(batches), max_size=8, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 10, 20, 30, 40]
+    # The first item finds nothing in flight after serial traffic and goes alone
+    assert batches == [[0], [1, 2, 3, 4]]
+    assert batcher.stats()['mean_size'] == 2.5
+
+
+def test_lone_items_do_not_wait():
+    """Test that serial items (nothing else in flight) skip the wait window"""
+    batches = []
+    batcher = MicroBatcher(recording_handler(batches), max_size=8, max_wait_ms=10_000)
+
+    async def main():
+        return [await asyncio.wait_for(batcher.submit(i), 5) for i in range(3)]
+
+    assert asyncio.run(main()) == [0, 10, 20]
+    assert batches == [[0], [1], [2]]
+
+
+def test_full_batch_is_dispatched_without_waiting():
+    """Test that a batch reaching max_size does not wait for the timer"""
+    batches = []
+    batcher = MicroBatcher(recording_handler(batches), max_size=2, max_wait_ms=10_000)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(5))), 5)
+
+    assert asyncio.run(main()) == [0, 10, 20, 30, 40]
+    assert batches == [[0], [1, 2], [3, 4]]
+
+
+def test_handler_error_reaches_every_request():
+    """Test that a failing batch raises in every request it holds"""
+    async def handler(items):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(handler, max_size=8, max_wait_ms=5)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert len(errors) == 3
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+
+def test_item_error_reaches_only_its_request():
+    """Test that an exception returned for one item fails only that request"""
+    async def handler(items):
+        return [ValueError(item) if item == 2 else item * 10 for item in items]
+
+    for max_size in (1, 8):
+        batcher = MicroBatcher(handler, max_size=max_size, max_wait_ms=5)
+
+        async def main():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(4)), return_exceptions=True)
+
+        results = asyncio.run(main())
+        assert [results[0], results[1], results[3]] == [0, 10, 30]
+        assert isinstance(results[2], ValueError)
+
+
+def test_batch_size_one_calls_handler_per_item():
+    """Test that max_size=1 disables batching"""
+    batches = []
+    batcher = MicroBatcher(recording_handler(batches), max_size=1)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+
+    assert asyncio.run(main()) == [0, 10, 20]
+    assert batches == [[0], [1], [2]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,98 @@
+"""
+Unit tests for the memory-mapped model artifact
+"""
+import pytest
+import pickle
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from backend.config import settings
+from backend.models.detector import JobScamDetector
+from backend.utils import model_artifact
+from backend.utils.model_artifact import is_model_artifact, load_model_artifact, save_model_artifact
+
+TEXTS = [
+    "Software Engineer at Tech Corp. 3+ years Python experience. Competitive salary.",
+    "Data Analyst needed. SQL, Python, Tableau. Contact hr@techcompany.com",
+    "URGENT!!! Earn $500 per day from home! Pay $99 registration fee!!!",
+    "Make $5000/week guaranteed! No interview required! WhatsApp only",
+]
+LABELS = [0, 0, 1, 1]
+
+
+@pytest.fixture
+def model_data(monkeypatch):
+    # Externalize every numeric array, however small
+    monkeypatch.setattr(model_artifact, 'MMAP_MIN_BYTES', 0)
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    vectors = vectorizer.fit_transform(TEXTS)
+    model = VotingClassifier(
+        estimators=[
+            ('lr', LogisticRegression(random_state=42)),
+            ('rf', RandomForestClassifier(n_estimators=5, random_state=42)),
+        ],
+        voting='soft'
+    )
+    model.fit(vectors, LABELS)
+    return {'model': model, 'vectorizer': vectorizer}
+
+
+def predict(data, texts):
+    return data['model'].predict_proba(data['vectorizer'].transform(texts))
+
+
+def test_roundtrip_predictions(model_data, tmp_path):
+    """Test that a loaded artifact predicts exactly like the original model"""
+    path = str(tmp_path / "model")
+    version = save_model_artifact(model_data, path)
+    
+    assert is_model_artifact(path)
+    loaded = load_model_artifact(path)
+    assert loaded['version'] == version
+    assert isinstance(loaded['model'].estimators_[0].coef_, np.memmap)
+    np.testing.assert_array_equal(predict(loaded, TEXTS), predict(model_data, TEXTS))
+    
+    in_memory = load_model_artifact(path, mmap=False)
+    assert not isinstance(in_memory['model'].estimators_[0].coef_, np.memmap)
+
+
+def test_version_is_content_hash(model_data, tmp_path):
+    """Test that saving the same model twice gives the same version and replaces the directory"""
+    path = str(tmp_path / "model")
+    first = save_model_artifact(model_data, path)
+    second = save_model_artifact(model_data, path)
+    
+    assert first == second
+    assert sorted(os.listdir(tmp_path)) == ["model"]
+
+
+def test_load_rejects_non_artifact(tmp_path):
+    assert not is_model_artifact(str(tmp_path))
+    with pytest.raises(ValueError):
+        load_model_artifact(str(tmp_path))
+
+
+def test_detector_prefers_artifact(model_data, tmp_path, monkeypatch):
+    """Test that the detector loads the artifact and falls back to the pickle"""
+    artifact_path = str(tmp_path / "model")
+    pickle_path = str(tmp_path / "model.pkl")
+    version = save_model_artifact(model_data, artifact_path)
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(dict(model_data, version="pickled"), f)
+    monkeypatch.setattr(settings, 'MODEL_ARTIFACT_PATH', artifact_path)
+    monkeypatch.setattr(settings, 'MODEL_PATH', pickle_path)
+    
+    assert JobScamDetector().model_version == version
+    
+    os.remove(os.path.join(artifact_path, model_artifact.SKELETON_FILE))
+    fallback = JobScamDetector()
+    assert fallback.model_version == "pickled"
+    assert fallback.is_loaded()
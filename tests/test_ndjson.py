@@ -0,0 +1,60 @@
+"""
+Tests for NDJSON stream reading
+"""
+import asyncio
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.ndjson import NDJSONLineError, batched, read_ndjson
+
+
+async def chunks_of(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def read_all(data: bytes, size: int, max_line_bytes: int = 1000):
+    async def main():
+        return [item async for item in read_ndjson(chunks_of(data, size), max_line_bytes)]
+    return asyncio.run(main())
+
+
+def test_lines_split_across_chunks():
+    """Test that records are parsed whatever the chunk boundaries, including mid-character"""
+    data = '{"id": 1, "text": "café"}\n\n{"id": 2, "text": "naïve"}'.encode('utf-8')
+    for size in (1, 3, 7, len(data)):
+        assert read_all(data, size) == [
+            (1, {"id": 1, "text": "café"}),
+            (3, {"id": 2, "text": "naïve"}),  # Blank line 2 skipped, last line has no newline
+        ]
+
+
+def test_bad_lines_are_reported_and_skipped():
+    """Test that invalid JSON and oversized lines become errors without stopping the stream"""
+    data = b'not json\n{"text": "' + b'x' * 200 + b'"}\n{"text": "ok"}\n' + b'y' * 200
+    items = read_all(data, 16, max_line_bytes=100)
+
+    assert [line for line, _ in items] == [1, 2, 3, 4]
+    assert isinstance(items[0][1], NDJSONLineError)
+    assert "longer than 100 bytes" in str(items[1][1])
+    assert items[2][1] == {"text": "ok"}
+    assert "longer than 100 bytes" in str(items[3][1])
+
+
+def test_batched_groups_items():
+    """Test that batched() yields full groups then the remainder"""
+    async def main():
+        async def numbers():
+            for n in range(5):
+                yield n
+        return [batch async for batch in batched(numbers(), 2)]
+
+    assert asyncio.run(main()) == [[0, 1], [2, 3], [4]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,132 @@
+"""
+Unit tests for the near-duplicate index
+"""
+import pytest
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.config import Settings
+from backend.utils.near_duplicate import HEAD_BITS, NearDuplicateIndex, max_distance_for, similarity, simhash
+
+POSTING = (
+    "Earn five hundred dollars per day from home with no experience needed. "
+    "Our international logistics company is hiring remote assistants to process "
+    "customer orders, reship packages and handle payments on behalf of our clients. "
+    "You will receive parcels at your address, inspect the contents, print the new "
+    "shipping labels we send you and drop the packages at the nearest post office. "
+    "Payments are processed through gift cards and bitcoin so that you get paid "
+    "instantly every evening. Pay the registration fee to start this amazing "
+    "opportunity today, the fee covers your training kit and background check. "
+    "Contact our recruiter on WhatsApp at 555-0123 for immediate joining, limited slots!"
+)
+
+OTHER_POSTING = (
+    "Senior Software Engineer at Contoso. You will design distributed systems, mentor "
+    "engineers and work with product managers. Requirements: five years of Python or Java "
+    "experience. Apply through our careers portal."
+)
+
+
+def test_simhash_similarity():
+    """Test that small edits keep fingerprints close and different postings apart"""
+    repost = POSTING.replace("555-0123", "555-0987").replace("today", "now") + "!!!"
+    
+    assert similarity(simhash(POSTING), simhash(POSTING.upper())) == 1.0
+    assert similarity(simhash(POSTING), simhash(repost)) >= 0.9
+    assert similarity(simhash(POSTING), simhash(OTHER_POSTING)) < 0.85
+
+
+def test_simhash_short_text():
+    """Test that texts too short for a stable fingerprint are skipped"""
+    assert simhash("") is None
+    assert simhash("Pay $99 registration fee now") is None
+
+
+def test_max_distance_for():
+    assert max_distance_for(0.95) == 3
+    assert max_distance_for(1.0) == 0
+
+
+def test_lookup_matches_brute_force():
+    """Test that block lookup finds the closest fingerprint within max_distance"""
+    rng = random.Random(0)
+    index = NearDuplicateIndex(capacity=1000, max_distance=3)
+    stored = [rng.getrandbits(64) for _ in range(1000)]
+    for value, fingerprint in enumerate(stored):
+        index.add(fingerprint, value)
+    
+    for value in range(0, 1000, 37):
+        query = stored[value]
+        for bit in rng.sample(range(64), rng.randint(0, 3)):
+            query ^= 1 << bit
+        found = index.lookup(query)
+        assert found is not None
+        assert found[1] == value
+        assert found[0] == similarity(query, stored[value])
+    
+    assert index.lookup(stored[0] ^ 0b1111) is None
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2])
+def test_wide_blocks_are_hashed(max_distance):
+    """Test that strict thresholds (few, wide blocks) keep a small bucket table and exact lookups"""
+    rng = random.Random(max_distance)
+    index = NearDuplicateIndex(capacity=5000, max_distance=max_distance)
+    assert index._heads.shape[1] <= 1 << HEAD_BITS
+    stored = [rng.getrandbits(64) for _ in range(5000)]
+    for value, fingerprint in enumerate(stored):
+        index.add(fingerprint, value)
+    
+    for value in range(0, 5000, 97):
+        query = stored[value]
+        for bit in rng.sample(range(64), max_distance):
+            query ^= 1 << bit
+        assert index.lookup(query) == (similarity(query, stored[value]), value)
+        assert index.lookup(stored[value] ^ ((1 << (max_distance + 1)) - 1)) is None
+
+
+def test_capacity_evicts_oldest():
+    """Test that the index stays bounded and forgets the oldest postings"""
+    index = NearDuplicateIndex(capacity=3, max_distance=2)
+    fingerprints = [random.Random(value).getrandbits(64) for value in range(5)]
+    for value, fingerprint in enumerate(fingerprints):
+        index.add(fingerprint, value)
+    
+    assert len(index) == 3
+    assert index.lookup(fingerprints[0]) is None
+    assert index.lookup(fingerprints[1]) is None
+    assert index.lookup(fingerprints[2]) == (1.0, 2)
+    assert index.lookup(fingerprints[4]) == (1.0, 4)
+
+
+def test_save_and_load(tmp_path):
+    """Test that a saved index answers lookups the same after loading"""
+    index = NearDuplicateIndex(capacity=10, max_distance=3, version="model-1")
+    for value in range(15):
+        index.add(value * 0x1234567, value / 10)
+    
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = NearDuplicateIndex.load(path)
+    
+    assert loaded.version == "model-1"
+    assert loaded.stats() == index.stats()
+    for value in range(15):
+        assert loaded.lookup(value * 0x1234567) == index.lookup(value * 0x1234567)
+    
+    loaded.add(99, 0.9)
+    assert loaded.lookup(99) == (1.0, 0.9)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(capacity=0)
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(max_distance=20)
+    for threshold in (0.75, 1.01):
+        with pytest.raises(ValueError):
+            Settings(NEAR_DUPLICATE_THRESHOLD=threshold)
+    assert max_distance_for(Settings(NEAR_DUPLICATE_THRESHOLD=1.0).NEAR_DUPLICATE_THRESHOLD) == 0
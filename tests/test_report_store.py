@@ -0,0 +1,66 @@
+"""
+Tests for the scam report store
+"""
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.report_store import ReportStore, iter_reports, report_key
+
+SCAM = "URGENT!!! Earn $500 per day from home! Pay $99 registration fee!!!"
+
+
+def test_reports_are_written_and_deduplicated(tmp_path):
+    """Test that repeats of a posting are stored once with a count, in one burst and across restarts"""
+    path = str(tmp_path / "reports.sqlite")
+    store = ReportStore(path)
+    assert store.submit(SCAM)
+    assert store.submit("  urgent!!! earn $500 per day   from home! Pay $99 registration fee!!!\n",
+                        url="https://scam.example/job")
+    assert store.submit("Package forwarding job, pay $100 admin fee", user_feedback="asked for a fee")
+    store.close()
+
+    store = ReportStore(path)
+    store.submit(SCAM)
+    store.close()
+
+    reports = list(iter_reports(path))
+    assert [report['text'] for report in reports] == [SCAM, "Package forwarding job, pay $100 admin fee"]
+    assert reports[0]['report_count'] == 3
+    assert reports[0]['url'] == "https://scam.example/job"
+    assert reports[1]['user_feedback'] == "asked for a fee"
+    assert [report['text'] for report in iter_reports(path, min_reports=2)] == [SCAM]
+
+    stats = store.stats()
+    assert stats['written'] == 1 and stats['duplicates'] == 1
+    assert stats['stored_postings'] == 2 and stats['stored_reports'] == 4
+
+
+def test_report_key_ignores_whitespace_and_case():
+    assert report_key("Pay  the FEE\n") == report_key("pay the fee")
+    assert report_key("Pay the fee") != report_key("Pay a fee")
+
+
+def test_full_queue_refuses_reports(tmp_path):
+    """Test that submit() never blocks and refuses reports while the buffer is full"""
+    store = ReportStore(str(tmp_path / "reports.sqlite"), queue_size=1)
+    writing, release = threading.Event(), threading.Event()
+    store_batch = store._store
+
+    def slow_store(connection, items):
+        writing.set()
+        release.wait(5)
+        store_batch(connection, items)
+
+    store._store = slow_store
+    assert store.submit("first")
+    assert writing.wait(5)
+    assert store.submit("second")
+    assert not store.submit("third")
+
+    release.set()
+    store.close()
+    assert [report['text'] for report in iter_reports(store.path)] == ["first", "second"]
+    assert store.stats()['refused'] == 1
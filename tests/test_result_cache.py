@@ -0,0 +1,59 @@
+"""
+Unit tests for the result cache
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils import result_cache
+from backend.utils.result_cache import ResultCache, content_key
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = ResultCache(max_entries=2, ttl=0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    """Test that entries expire after the TTL"""
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = ResultCache(max_entries=10, ttl=60)
+    cache.put("a", 1)
+    
+    now[0] += 59
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_content_key_is_unambiguous():
+    """Test that part boundaries and None are part of the key"""
+    assert content_key("ab", "c") != content_key("a", "bc")
+    assert content_key("a", None) == content_key("a", "")
+    assert content_key("a", "b") == content_key("a", "b")
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ResultCache(max_entries=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
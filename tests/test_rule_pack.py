@@ -0,0 +1,141 @@
+"""
+Tests for rule pack loading and hot reload
+"""
+import json
+import pytest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.config import settings
+from backend.models.detector import JobScamDetector
+from backend.models.rule_pack import (
+    RulePackError, builtin_rule_pack_data, compile_rule_pack, load_rule_pack
+)
+
+
+SCAM_TEXT = "URGENT!!! Pay $99 registration fee. No interview, WhatsApp only"
+
+
+@pytest.fixture
+def pack_file(tmp_path):
+    data = builtin_rule_pack_data()
+    data['version'] = "2.0.0"
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_exported_pack_matches_builtin(pack_file):
+    """Test that a pack exported from the built-in rules behaves identically"""
+    builtin = load_rule_pack(None)
+    pack = load_rule_pack(str(pack_file))
+    
+    assert pack.version == "2.0.0"
+    features = pack.feature_extractor.extract(SCAM_TEXT)
+    assert features == builtin.feature_extractor.extract(SCAM_TEXT)
+    assert pack.rule_engine.evaluate(SCAM_TEXT, features) == \
+        builtin.rule_engine.evaluate(SCAM_TEXT, features)
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda d: d.pop('version'),
+    lambda d: d['rules'][0].update(weight=2),
+    lambda d: d['rules'][0].update(risk_level='critical'),
+    lambda d: d['rules'][0].update(pattern='(unclosed'),
+    lambda d: d['keywords'].update(unknown_table=['x']),
+])
+def test_invalid_pack_rejected(mutate):
+    """Test validation of malformed rule packs"""
+    data = builtin_rule_pack_data()
+    mutate(data)
+    with pytest.raises(RulePackError):
+        compile_rule_pack(data)
+
+
+def test_yaml_pack(tmp_path):
+    """Test loading a YAML rule pack"""
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "rules.yaml"
+    path.write_text(yaml.safe_dump({
+        'version': "yaml-1",
+        'rules': [{'pattern': r'wire\s+transfer', 'risk_level': 'high',
+                   'reason': 'Wire transfer request', 'weight': 0.4}],
+    }))
+    
+    pack = load_rule_pack(str(path))
+    result = pack.rule_engine.evaluate("Send a wire transfer today", {})
+    assert result['flags'] == ['Wire transfer request']
+
+
+def test_detector_reload_swaps_pack(pack_file):
+    """Test atomic swap of a new rule pack into a running detector"""
+    detector = JobScamDetector()
+    previous = detector.rule_pack
+    
+    data = json.loads(pack_file.read_text())
+    data['rules'] = [{'pattern': r'wire\s+transfer', 'risk_level': 'high',
+                      'reason': 'Wire transfer request', 'weight': 0.4}]
+    pack_file.write_text(json.dumps(data))
+    
+    pack = detector.reload_rule_pack(str(pack_file))
+    assert detector.rule_pack is pack and pack is not previous
+    assert 'Wire transfer request' in detector.analyze("Send a wire transfer today")['flags']
+
+
+def test_failed_reload_keeps_previous_pack(tmp_path):
+    """Test that a broken pack never replaces the active one"""
+    detector = JobScamDetector()
+    previous = detector.rule_pack
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json")
+    
+    with pytest.raises(RulePackError):
+        detector.reload_rule_pack(str(broken))
+    assert detector.rule_pack is previous
+
+
+def test_watcher_reload_calls_on_reload(pack_file, monkeypatch):
+    """Test that a watched reload notifies the caller (e.g. to recycle process workers)"""
+    monkeypatch.setattr(settings, 'RULE_PACK_PATH', str(pack_file))
+    detector = JobScamDetector()
+    reloaded = threading.Event()
+    detector.watch_rule_pack(interval=0.05, on_reload=reloaded.set)
+    try:
+        data = json.loads(pack_file.read_text())
+        data['version'] = "3.0.0"
+        pack_file.write_text(json.dumps(data))
+        os.utime(pack_file, (0, 1))
+        assert reloaded.wait(5)
+        assert detector.rule_pack.version == "3.0.0"
+    finally:
+        detector.stop_watching_rule_pack()
+
+
+def test_watcher_skips_on_reload_for_broken_pack(pack_file, monkeypatch):
+    """Test that a failed watched reload keeps the pack and does not notify"""
+    monkeypatch.setattr(settings, 'RULE_PACK_PATH', str(pack_file))
+    detector = JobScamDetector()
+    previous = detector.rule_pack
+    calls = []
+    detector.watch_rule_pack(interval=0.05, on_reload=lambda: calls.append(1))
+    try:
+        pack_file.write_text("{not json")
+        os.utime(pack_file, (0, 1))
+        watcher = detector._rule_pack_watcher
+        for _ in range(100):
+            if watcher._mtime == 1:
+                break
+            time.sleep(0.05)
+        time.sleep(0.2)
+        assert watcher._mtime == 1
+        assert calls == [] and detector.rule_pack is previous
+    finally:
+        detector.stop_watching_rule_pack()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
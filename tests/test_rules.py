@@ -2,6 +2,7 @@
 Tests for the Rule Engine
 """
 import pytest
+import re
 import sys
 import os
 
@@ -9,6 +10,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from backend.models.rules import ScamRuleEngine
 from backend.models.feature_extractor import FeatureExtractor
+from backend.utils import literal_index, patterns
+from backend.utils.analysis_context import AnalysisContext
+from backend.utils.literal_index import LiteralIndex, required_literals
+from backend.utils.match_stats import MatchStats
+from backend.utils.patterns import bound_wildcards
 
 
 @pytest.fixture
@@ -67,5 +73,202 @@ def test_pattern_matching(rule_engine, feature_extractor):
                for match in matched_texts)
 
 
+
+@pytest.mark.parametrize("text", [
+    "Pay $99 registration fee! No interview! Guaranteed job!",
+    "URGENT HIRING!!! Earn $5000 per day. Contact HR@GMAIL.COM, Bitcoin accepted",
+    "Make $900 every week, Work From Home for $450. WhatsApp only",
+    "Senior engineer role at Contoso Ltd. Apply through our careers portal.",
+    "Proceſsing fee required, NO EXPERİENCE NEEDED, lımıted slots",
+])
+def test_compiled_rules_match_reference(rule_engine, text):
+    """Precompiled rules must find the same first match as a plain re.search"""
+    result = rule_engine.evaluate(text, {})
+    
+    expected = []
+    for rule in rule_engine.rules:
+        match = re.search(rule['pattern'], text.lower(), re.IGNORECASE)
+        if match:
+            expected.append((rule['reason'], match.group()))
+    
+    assert [(p['reason'], p['match']) for p in result['matched_patterns']] == expected
+
+
+
+def test_match_offsets(rule_engine):
+    """Test that matched patterns carry offsets into the evaluated text"""
+    text = "İİ URGENT: Pay $99 Registration Fee"
+    result = rule_engine.evaluate(text, {})
+    
+    for pattern in result['matched_patterns']:
+        assert text[pattern['start']:pattern['end']].lower() == pattern['match']
+
+
+def test_required_literals():
+    """Test extraction of prefilter anchors from rule patterns"""
+    assert required_literals(r'(?:no|without)\s+interview') == {'interview'}
+    assert required_literals(r'(?:whatsapp|telegram)\s+only') == {'whatsapp', 'telegram'}
+    assert required_literals(r'(?:bitcoin|crypto|NFT)') == {'bitcoin', 'crypto', 'nft'}
+    assert required_literals(r'!!!+') == {'!!!'}
+    assert required_literals(r'\b[A-Z]{6,}\b') is None
+
+
+@pytest.mark.parametrize("use_automaton", [True, False])
+def test_literal_index(monkeypatch, use_automaton):
+    """Test literal lookup with and without the optional Aho-Corasick backend"""
+    if not use_automaton:
+        monkeypatch.setattr(literal_index, 'ahocorasick', None)
+    
+    index = LiteralIndex(['pay', 'payment', 'app', 'whatsapp'])
+    assert index.find("payment via whatsapp") == {'pay', 'payment', 'app', 'whatsapp'}
+    assert index.find("senior engineer") == set()
+
+
+def test_prefilter_preserves_results(rule_engine):
+    """Test that skipping rules via the prefilter does not change the result"""
+    unfiltered = ScamRuleEngine()
+    unfiltered.prefilter = False
+    
+    for text in [
+        "Pay $99 registration fee! No interview! Guaranteed job!",
+        "Crypto trading job! Earn $1000 daily! Limited slots!",
+        "Senior engineer role at Contoso Ltd. Apply through our careers portal.",
+    ]:
+        assert rule_engine.evaluate(text, {}) == unfiltered.evaluate(text, {})
+
+
+
+def test_bound_wildcards():
+    """Test that unbounded wildcard spans are capped"""
+    assert bound_wildcards(r'pay.*\$\d+', 50) == r'pay.{0,50}\$\d+'
+    assert bound_wildcards(r'a.+?b', 50) == r'a.{1,50}?b'
+    assert bound_wildcards(r'[.*]\.*x', 50) == r'[.*]\.*x'
+    assert bound_wildcards(r'pay.*\$\d+', 0) == r'pay.*\$\d+'
+
+
+def test_match_window_limits_span():
+    """Test that bounded mode only matches nearby rule parts"""
+    bounded = ScamRuleEngine(match_window=20)
+    near = "Work from home and get $500"
+    far = "Work from home. " + "Great team culture. " * 5 + "Budget $500"
+    
+    assert 'Work-from-home with high pay' in bounded.evaluate(near, {})['flags']
+    assert 'Work-from-home with high pay' not in bounded.evaluate(far, {})['flags']
+    assert 'Work-from-home with high pay' in ScamRuleEngine(match_window=0).evaluate(far, {})['flags']
+
+
+def test_time_budget_skips_remaining_rules():
+    """Test that an exhausted time budget stops rule evaluation"""
+    engine = ScamRuleEngine(time_budget_ms=1e-9)
+    result = engine.evaluate("Pay $99 registration fee! No interview!", {})
+    assert len(result['flags']) <= 1
+
+
+@pytest.mark.skipif(patterns.re2 is None, reason="google-re2 not installed")
+def test_re2_engine_matches_re(rule_engine):
+    """Test that the linear-time engine gives the same rule results"""
+    re2_engine = ScamRuleEngine(regex_engine='re2')
+    for text in [
+        "Pay $99 registration fee! No interview! Guaranteed job!",
+        "Earn $5000 per day. Contact hr@gmail.com, Bitcoin accepted",
+        "Make $900 every week, Work From Home for $450. WhatsApp only",
+    ]:
+        assert re2_engine.evaluate(text, {}) == rule_engine.evaluate(text, {})
+
+
+
+def test_match_stats(feature_extractor):
+    """Test per-rule and per-feature counters"""
+    rule_counters = MatchStats(enabled=True)
+    feature_counters = MatchStats(enabled=True)
+    engine = ScamRuleEngine(stats=rule_counters)
+    extractor = FeatureExtractor(stats=feature_counters)
+    
+    for text in ["Pay $99 registration fee!", "Senior engineer at Contoso"]:
+        engine.evaluate(text, extractor.extract(text))
+    
+    rules = rule_counters.snapshot()
+    fee = rules['Requests upfront payment']
+    assert fee['evaluations'] + fee['skipped'] == 2
+    assert fee['hits'] == 1
+    assert fee['max_ns'] > 0
+    
+    features = feature_counters.snapshot()
+    assert features['requires_payment']['hits'] == 1
+    assert features['requires_payment']['evaluations'] == 2
+
+
+def test_match_stats_disabled():
+    """Test that disabled counters record nothing"""
+    counters = MatchStats(enabled=False)
+    ScamRuleEngine(stats=counters).evaluate("Pay $99 registration fee!", {})
+    assert counters.snapshot() == {}
+
+
+def test_evaluate_batch_matches_evaluate(rule_engine):
+    """Test that batch rule evaluation equals one evaluate() call per text"""
+    texts = [
+        "URGENT!!! Pay $99 registration fee. Earn $5000 per day. WhatsApp only",
+        "",
+        "Software Engineer at TechCorp Inc. Apply at careers@techcorp.com",
+        "work from home\n$500 bonus, gift\ncard payments",  # no match across lines
+        "İSTANBUL office, guaranteed job, CONTACT yahoo.com",
+    ]
+    features = [{'missing_company_name': i % 2 == 0, 'url_suspicious': i == 1} for i in range(len(texts))]
+    
+    expected = [rule_engine.evaluate(text, text_features) for text, text_features in zip(texts, features)]
+    assert rule_engine.evaluate_batch(texts, features) == expected
+
+
+
+def test_evaluate_chunks_matches_evaluate(rule_engine):
+    """Test that chunked evaluation equals evaluate() when no match crosses a chunk"""
+    text = (
+        "İSTANBUL office. Software role. " * 3
+        + "Pay the registration fee first. " + "Team lunch on Fridays. " * 5
+        + "Gift card payments only!!! Pay the processing fee again. URGENT hiring."
+    )
+    features = {'missing_company_name': True, 'url_suspicious': False}
+    context = AnalysisContext(text)
+    
+    chunks, offset = [], 0
+    for size in (40, 56, 90, len(text)):
+        chunks.append((offset, AnalysisContext(text[offset:offset + size])))
+        offset += size
+    
+    expected = rule_engine.evaluate(text, features, context)
+    assert rule_engine.evaluate_chunks(chunks, features) == expected
+    for pattern in expected['matched_patterns']:
+        assert text[pattern['start']:pattern['end']].lower() == pattern['match']
+
+
+def test_early_stop_keeps_score(rule_engine):
+    """Test that stopping at a saturated score leaves the score unchanged"""
+    text = (
+        "URGENT!!! Pay $99 registration fee. Earn $5000 per day. WhatsApp only. "
+        "No interview required. Buy gift cards. Send bitcoin. Limited slots!!!"
+    )
+    texts = [text, "Software Engineer at TechCorp Inc.", "Pay $99 registration fee"]
+    features = [{'missing_company_name': True, 'url_suspicious': True}] + [
+        {'missing_company_name': False, 'url_suspicious': False}
+    ] * 2
+    
+    full = [rule_engine.evaluate(t, f) for t, f in zip(texts, features)]
+    stopped = [rule_engine.evaluate(t, f, early_stop=True) for t, f in zip(texts, features)]
+    assert [r['score'] for r in stopped] == [r['score'] for r in full]
+    assert full[0]['score'] == 1.0
+    assert len(stopped[0]['matched_patterns']) < len(full[0]['matched_patterns'])
+    assert stopped[1:] == full[1:]
+    
+    batch = rule_engine.evaluate_batch(texts, features, early_stop=True)
+    assert [r['score'] for r in batch] == [r['score'] for r in full]
+    
+    chunks, offset = [], 0
+    for size in (40, 60, len(text)):
+        chunks.append((offset, AnalysisContext(text[offset:offset + size])))
+        offset += size
+    assert rule_engine.evaluate_chunks(chunks, features[0], early_stop=True)['score'] == 1.0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,164 @@
+"""
+Tests for shadow model scoring
+"""
+import pickle
+import sqlite3
+import sys
+import os
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from backend.config import settings
+from backend.models.detector import JobScamDetector
+from backend.models.shadow import ShadowScorer
+
+TRAINING_TEXTS = [
+    ("Software Engineer at Tech Corp. 3+ years Python experience.", 0),
+    ("Data Analyst needed. SQL, Python, Tableau.", 0),
+    ("URGENT!!! Earn $500 per day from home! Pay $99 registration fee!!!", 1),
+    ("Make $5000/week guaranteed! No interview required! WhatsApp only", 1),
+]
+
+
+@pytest.fixture
+def trained():
+    texts, labels = zip(*TRAINING_TEXTS)
+    vectorizer = TfidfVectorizer()
+    model = LogisticRegression().fit(vectorizer.fit_transform(texts), labels)
+    return model, vectorizer
+
+
+def make_shadow(model, vectorizer, path, queue_size=10):
+    return ShadowScorer(
+        model, vectorizer, "candidate", str(path), queue_size,
+        blend=JobScamDetector._blend_scores,
+        label=lambda score: "scam" if score >= 0.5 else "legit"
+    )
+
+
+def read_rows(path):
+    connection = sqlite3.connect(str(path))
+    connection.row_factory = sqlite3.Row
+    try:
+        return connection.execute("SELECT * FROM shadow_scores ORDER BY created").fetchall()
+    finally:
+        connection.close()
+
+
+def test_shadow_logs_comparisons(trained, tmp_path):
+    """Test that queued postings are scored and logged with deltas and disagreements"""
+    model, vectorizer = trained
+    path = tmp_path / "shadow.sqlite"
+    shadow = make_shadow(model, vectorizer, path)
+
+    text = TRAINING_TEXTS[2][0]
+    assert shadow.submit("key-1", [text], 0.5, 0.1, 0.26, "serving")
+    assert shadow.submit("key-2", ["Python role", text], 0.0, None, 0.0, "serving")
+    shadow.close()
+
+    rows = read_rows(path)
+    assert [row['text_key'] for row in rows] == ["key-1", "key-2"]
+    probabilities = model.predict_proba(vectorizer.transform(["Python role", text]))[:, 1]
+    assert rows[0]['shadow_ml'] == pytest.approx(probabilities[1])
+    assert rows[1]['shadow_ml'] == pytest.approx(probabilities.max())  # Highest chunk
+    assert rows[0]['shadow_score'] == pytest.approx(0.6 * rows[0]['shadow_ml'] + 0.4 * 0.5)
+    for row in rows:
+        assert row['delta'] == pytest.approx(row['shadow_score'] - row['primary_score'])
+        assert row['disagree'] == int(row['primary_label'] != row['shadow_label'])
+        assert row['shadow_ms'] >= 0
+    # ML skipped by the cascade: the candidate is scored rule-only like the serving model
+    assert rows[1]['primary_ml'] is None
+    assert (rows[1]['shadow_score'], rows[1]['delta'], rows[1]['disagree']) == (0.0, 0.0, 0)
+
+    stats = shadow.stats()
+    assert (stats['submitted'], stats['scored'], stats['dropped'], stats['logged']) == (2, 2, 0, 2)
+
+
+def test_shadow_drops_when_queue_is_full(trained, tmp_path):
+    """Test that submit() never waits: postings beyond the queue size are dropped"""
+    model, vectorizer = trained
+    started, release = threading.Event(), threading.Event()
+
+    class SlowModel:
+        def predict_proba(self, X):
+            started.set()
+            release.wait(5)
+            return model.predict_proba(X)
+
+    shadow = make_shadow(SlowModel(), vectorizer, tmp_path / "shadow.sqlite", queue_size=1)
+    assert shadow.submit("busy", ["text"], 0.0, 0.5, 0.3, "serving")
+    assert started.wait(5)
+
+    assert shadow.submit("queued", ["text"], 0.0, 0.5, 0.3, "serving")
+    assert not shadow.submit("dropped", ["text"], 0.0, 0.5, 0.3, "serving")
+
+    release.set()
+    shadow.close()
+    assert shadow.stats()['dropped'] == 1
+    assert [row['text_key'] for row in read_rows(tmp_path / "shadow.sqlite")] == ["busy", "queued"]
+
+
+def test_detector_submits_to_shadow(trained, tmp_path, monkeypatch):
+    """Test that the detector loads the shadow model and queues fresh analyses"""
+    model, vectorizer = trained
+    model_path = tmp_path / "candidate.pkl"
+    with open(model_path, 'wb') as f:
+        pickle.dump({'model': model, 'vectorizer': vectorizer}, f)
+    monkeypatch.setattr(settings, 'SHADOW_MODEL_PATH', str(model_path))
+    monkeypatch.setattr(settings, 'SHADOW_LOG_PATH', str(tmp_path / "shadow.sqlite"))
+
+    detector = JobScamDetector()
+    detector.near_duplicates = None
+    detector.set_model(model, vectorizer, "serving")
+
+    texts = [TRAINING_TEXTS[0][0], TRAINING_TEXTS[3][0]]
+    detector.analyze(texts[0])
+    detector.analyze(texts[0])  # Cache hit, not queued again
+    detector.analyze_batch(texts)
+    detector.stop_shadow()
+
+    rows = read_rows(tmp_path / "shadow.sqlite")
+    assert len(rows) == 2
+    assert {row['primary_version'] for row in rows} == {"serving"}
+    assert {row['shadow_version'] for row in rows} == {detector.shadow.version}
+    # Same model on both sides: no disagreement
+    assert all(row['delta'] == pytest.approx(0) and not row['disagree'] for row in rows)
+
+
+def test_cascade_skipped_postings_do_not_disagree(trained, tmp_path, monkeypatch):
+    """Test that postings decided by rules alone log no delta against an opposite shadow model"""
+    model, vectorizer = trained
+    texts, labels = zip(*TRAINING_TEXTS)
+    opposite = LogisticRegression().fit(vectorizer.transform(texts), [1 - label for label in labels])
+    model_path = tmp_path / "candidate.pkl"
+    with open(model_path, 'wb') as f:
+        pickle.dump({'model': opposite, 'vectorizer': vectorizer}, f)
+    monkeypatch.setattr(settings, 'SHADOW_MODEL_PATH', str(model_path))
+    monkeypatch.setattr(settings, 'SHADOW_LOG_PATH', str(tmp_path / "shadow.sqlite"))
+    monkeypatch.setattr(settings, 'CASCADE_ENABLED', True)
+    monkeypatch.setattr(settings, 'CASCADE_HIGH', 0.3)
+
+    detector = JobScamDetector()
+    detector.cache = None
+    detector.near_duplicates = None
+    detector.set_model(model, vectorizer, "serving")
+
+    scam = "URGENT!!! Pay $99 registration fee. Earn $5000 per day. WhatsApp only. No interview"
+    result = detector.analyze(scam)
+    detector.stop_shadow()
+
+    [row] = read_rows(tmp_path / "shadow.sqlite")
+    assert row['primary_ml'] is None and row['rule_score'] >= 0.3
+    assert row['shadow_ml'] < 0.5  # The opposite model would call it legitimate
+    assert (row['delta'], row['disagree']) == (0.0, 0)
+    assert row['primary_label'] == result['prediction']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,66 @@
+"""
+Tests for Text Processor
+"""
+import random
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.text_processor import TextProcessor
+
+
+@pytest.fixture
+def processor():
+    return TextProcessor()
+
+
+def test_clean_text(processor):
+    """Test whitespace collapsing, symbol removal and currency expansion"""
+    assert processor.clean_text("  Earn  $500\n\t•daily ") == "Earn USD 500 daily"
+    assert processor.clean_text("") == ""
+
+
+def test_offsets_match_clean_text(processor):
+    """Test that the offset-tracking cleaner produces identical text"""
+    rng = random.Random(7)
+    alphabet = list("ab Z9_$₹@.,!?-()[]\t\n•é😀İ#") + [' '] * 4
+    for _ in range(2000):
+        raw = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        cleaned, offset_map = processor.clean_text_with_offsets(raw)
+        assert cleaned == processor.clean_text(raw)
+        assert len(offset_map.offsets) == len(cleaned)
+
+
+def test_offsets_map_back_to_raw_text(processor):
+    """Test mapping spans in cleaned text back to the raw text"""
+    raw = "  🚨 Pay   $99 •• fee\n\nnow"
+    cleaned, offset_map = processor.clean_text_with_offsets(raw)
+    assert cleaned == "Pay USD 99  fee now"  # Removed symbols leave their spaces
+    
+    start = cleaned.index("Pay")
+    end = cleaned.index("fee") + len("fee")
+    raw_start, raw_end = offset_map.to_original(start, end)
+    assert raw[raw_start:raw_end] == "Pay   $99 •• fee"
+
+
+
+def test_split_chunks(processor):
+    """Test that chunks cover the text, respect the size and end at sentence breaks"""
+    text = "Apply today. " * 40 + "x" * 120 + " tail words here"
+    chunks = list(processor.split_chunks(text, 100))
+    
+    assert ''.join(chunk for _, chunk in chunks) == text
+    assert [offset for offset, _ in chunks] == [
+        sum(len(chunk) for _, chunk in chunks[:i]) for i in range(len(chunks))
+    ]
+    assert all(len(chunk) <= 100 for _, chunk in chunks)
+    assert chunks[0][1].endswith("today. ")
+    assert list(processor.split_chunks("", 10)) == []
+    with pytest.raises(ValueError):
+        list(processor.split_chunks(text, 0))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,76 @@
+"""
+Tests for the training pipeline
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sklearn.linear_model import LogisticRegression
+
+from backend.utils.report_store import ReportStore
+from train_model import ScamDetectorTrainer
+
+
+@pytest.fixture
+def trainer():
+    trainer = ScamDetectorTrainer()
+    trainer.prepare_data(trainer._create_sample_data(), test_size=0.3)
+    trainer.train_model(model_type='ensemble')
+    return trainer
+
+
+def test_distill_follows_teacher(trainer):
+    """Test that the student is a logistic model tracking the ensemble's probabilities"""
+    student = trainer.distill(extra_texts=["Pay a small fee to start", "Senior analyst role"], folds=0)
+    
+    assert isinstance(student, LogisticRegression)
+    X = trainer.vectorizer.transform(trainer.X_train)
+    teacher = trainer.model.predict_proba(X)[:, 1]
+    distilled = student.predict_proba(X)[:, 1]
+    assert np.abs(teacher - distilled).max() < 0.1
+    assert np.corrcoef(teacher, distilled)[0, 1] > 0.95
+
+
+def test_distill_uses_out_of_fold_labels_for_real_rows(trainer):
+    """Test that each real training row is labelled by a teacher that never saw it"""
+    X = trainer.vectorizer.transform(trainer.X_train)
+    in_sample = trainer.model.predict_proba(X)[:, 1]
+    out_of_fold = trainer._out_of_fold_proba(X, trainer.y_train_original, folds=5)
+    assert len(out_of_fold) == len(trainer.X_train)
+    assert not np.allclose(out_of_fold, in_sample)
+    
+    distilled = trainer.distill().predict_proba(X)[:, 1]
+    assert np.abs(distilled - out_of_fold).mean() < np.abs(distilled - in_sample).mean()
+
+
+def test_distillation_report(trainer, capsys):
+    trainer.distill()
+    rows = trainer.distillation_report(latency_samples=3)
+    
+    assert [row['model'] for row in rows] == ['teacher', 'student', 'compiled']
+    assert rows[0]['fidelity'] == 1.0
+    assert rows[1]['size_mb'] < rows[0]['size_mb']
+    assert "DISTILLATION REPORT" in capsys.readouterr().out
+
+
+def test_add_reports(tmp_path):
+    """Test that reported postings are added as scams without overriding dataset labels"""
+    path = str(tmp_path / "reports.sqlite")
+    store = ReportStore(path)
+    store.submit("Reshipping job! Pay $80 to receive your first package")
+    store.submit("Software Engineer position at Tech Corp. Requirements: 3+ years Python experience, "
+                 "BS in CS. Competitive salary and benefits.")
+    store.close()
+    
+    trainer = ScamDetectorTrainer()
+    df = trainer._create_sample_data()
+    combined = trainer.add_reports(df, path)
+    
+    assert len(combined) == len(df) + 1
+    assert combined.iloc[-1]['text'].startswith("Reshipping job!")
+    assert combined.iloc[-1]['label'] == 1
+    assert trainer.add_reports(df, path, min_reports=2).equals(df[['text', 'label']])
@@ -0,0 +1,91 @@
+"""
+Tests for the analysis worker pool
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.worker_pool import PoolSaturated, PoolUnavailable, WorkerPool
+
+_initialized = False
+
+
+def mark_initialized():
+    global _initialized
+    _initialized = True
+
+
+def worker_state():
+    return os.getpid(), _initialized
+
+
+def test_thread_pool_runs_off_the_event_loop():
+    """Test that calls run on pool threads and are timed"""
+    pool = WorkerPool('thread', workers=2, queue_size=2)
+    
+    async def main():
+        return await asyncio.gather(*(pool.run(threading.current_thread) for _ in range(3)))
+    
+    threads = asyncio.run(main())
+    assert all(thread is not threading.main_thread() for thread in threads)
+    
+    stats = pool.stats()
+    assert (stats['completed'], stats['rejected'], stats['running'], stats['queued']) == (3, 0, 0, 0)
+    assert stats['run']['max_ms'] >= stats['run']['p50_ms'] >= 0
+    pool.shutdown()
+
+
+def test_saturated_pool_rejects_with_retry_after():
+    """Test that calls beyond workers + queue fail fast and others still complete"""
+    pool = WorkerPool('thread', workers=1, queue_size=1)
+    release = threading.Event()
+    
+    async def main():
+        running = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()['queued'] == 1
+        with pytest.raises(PoolSaturated) as error:
+            await pool.run(release.wait, 5)
+        release.set()
+        await asyncio.gather(*running)
+        return error.value
+    
+    error = asyncio.run(main())
+    assert error.retry_after >= 1
+    stats = pool.stats()
+    assert (stats['completed'], stats['rejected']) == (2, 1)
+    
+    pool.shutdown()
+    with pytest.raises(PoolUnavailable):
+        asyncio.run(pool.run(len, "text"))
+
+
+def test_process_pool_forks_initialized_workers():
+    """Test that process workers run the initializer and report back to the parent"""
+    pool = WorkerPool('process', workers=2, queue_size=2, initializer=mark_initialized)
+    pool.start()
+    try:
+        pid, initialized = asyncio.run(pool.run(worker_state))
+    finally:
+        pool.shutdown()
+    assert pid != os.getpid()
+    assert initialized and not _initialized
+
+
+def test_inline_pool_and_validation():
+    """Test that "none" runs calls directly and bad settings are refused"""
+    pool = WorkerPool('none')
+    assert asyncio.run(pool.run(worker_state)) == (os.getpid(), False)
+    with pytest.raises(ValueError):
+        WorkerPool('fibers')
+    with pytest.raises(ValueError):
+        WorkerPool('thread', workers=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -4,15 +4,23 @@ Trains ML models on job posting dataset
 """
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 from imblearn.over_sampling import SMOTE
+import scipy.sparse as sp
+import argparse
 import pickle
+import time
 import os
 import logging
+from backend.models.feature_extractor import FeatureExtractor
+from backend.models.linear_scorer import CompiledLinearScorer
+from backend.utils.model_artifact import save_model_artifact
+from backend.utils.report_store import iter_reports
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,9 +33,11 @@ class ScamDetectorTrainer:
         self.data_path = data_path
         self.vectorizer = None
         self.model = None
+        self.student = None
         self.X_train = None
         self.X_test = None
         self.y_train = None
+        self.y_train_original = None
         self.y_test = None
     
     def load_data(self):
@@ -90,6 +100,49 @@ class ScamDetectorTrainer:
         logger.info(f"Created sample dataset with {len(df)} examples")
         return df
     
+    def add_reports(self, df, reports_path, min_reports=1):
+        """
+        Append postings reported through /report as scams (label 1)
+        
+        Reports are streamed from the database rather than loaded at once.
+        Reported texts that are already in the dataset keep their dataset label.
+        
+        Args:
+            df: Dataset with 'text' and 'label' columns
+            reports_path: Report database (REPORT_DB_PATH)
+            min_reports: Skip postings reported fewer times than this
+        """
+        if not os.path.exists(reports_path):
+            logger.warning(f"No report database at {reports_path}. Training without reports.")
+            return df
+        
+        reports = pd.DataFrame.from_records(
+            ({'text': report['text'], 'label': 1} for report in iter_reports(reports_path, min_reports)),
+            columns=['text', 'label']
+        ).astype({'label': df['label'].dtype})
+        known = set(df['text'])
+        reports = reports[~reports['text'].isin(known)]
+        logger.info(f"Added {len(reports)} reported postings (reported at least {min_reports}x)")
+        return pd.concat([df[['text', 'label']], reports], ignore_index=True)
+    
+    def feature_report(self, df):
+        """Print how often each rule feature fires on legitimate vs scam postings"""
+        extractor = FeatureExtractor()
+        features = extractor.extract_batch(df['text'].fillna('').astype(str))
+        labels = df['label'].to_numpy()
+        
+        print("\n" + "="*50)
+        print("RULE FEATURES (mean per class)")
+        print("="*50)
+        print(f"{'feature':<22}{'legitimate':>12}{'scam':>12}")
+        for column, name in enumerate(extractor.FEATURE_NAMES):
+            legit = features[labels == 0, column].mean() if (labels == 0).any() else 0.0
+            scam = features[labels == 1, column].mean() if (labels == 1).any() else 0.0
+            print(f"{name:<22}{legit:>12.3f}{scam:>12.3f}")
+        print("="*50 + "\n")
+        
+        return features
+    
     def prepare_data(self, df, test_size=0.2):
         """Split and vectorize data"""
         logger.info("Preparing data...")
@@ -116,16 +169,21 @@ class ScamDetectorTrainer:
         logger.info(f"Train size: {len(self.X_train)}, Test size: {len(self.X_test)}")
         logger.info(f"Feature count: {self.X_train_vec.shape[1]}")
         
-        # Handle class imbalance with SMOTE
-        if len(np.unique(self.y_train)) > 1:
-            try:
-                smote = SMOTE(random_state=42)
-                self.X_train_vec, self.y_train = smote.fit_resample(
-                    self.X_train_vec, self.y_train
-                )
-                logger.info(f"Applied SMOTE. New train size: {len(self.y_train)}")
-            except ValueError as e:
-                logger.warning(f"SMOTE failed: {e}. Proceeding without resampling.")
+        # Labels of the real training postings, before SMOTE adds synthetic rows
+        self.y_train_original = np.asarray(self.y_train)
+        self.X_train_vec, self.y_train = self._oversample(self.X_train_vec, self.y_train)
+    
+    @staticmethod
+    def _oversample(X, y):
+        """Balance classes with SMOTE, or return the rows unchanged if it cannot run"""
+        if len(np.unique(y)) < 2:
+            return X, y
+        try:
+            X, y = SMOTE(random_state=42).fit_resample(X, y)
+            logger.info(f"Applied SMOTE. New train size: {len(y)}")
+        except ValueError as e:
+            logger.warning(f"SMOTE failed: {e}. Proceeding without resampling.")
+        return X, y
     
     def train_model(self, model_type='ensemble'):
         """
@@ -195,8 +253,134 @@ class ScamDetectorTrainer:
         
         print("="*50 + "\n")
     
-    def save_model(self, output_path='models/saved_models/scam_detector.pkl'):
-        """Save trained model and vectorizer"""
+    def _out_of_fold_proba(self, X, y, folds):
+        """
+        Teacher probabilities for rows it was not trained on
+        
+        Each fold is scored by a copy of the teacher fitted, with the same
+        oversampling, on the other folds. Falls back to the fitted teacher when
+        a class has fewer than two rows.
+        """
+        folds = min(folds, int(np.bincount(y).min()) if len(np.unique(y)) > 1 else 0)
+        if folds < 2:
+            logger.warning("Too few rows per class for out-of-fold labels; using the fitted teacher")
+            return self.model.predict_proba(X)[:, 1]
+        
+        soft = np.empty(X.shape[0])
+        splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+        for train_rows, held_out in splitter.split(X, y):
+            teacher = clone(self.model).fit(*self._oversample(X[train_rows], y[train_rows]))
+            soft[held_out] = teacher.predict_proba(X[held_out])[:, 1]
+        return soft
+    
+    def distill(self, C=10.0, extra_texts=None, folds=5):
+        """
+        Train a logistic regression student on the ensemble's soft probabilities
+        
+        Each training row is used twice, as a scam with weight p and as
+        legitimate with weight 1 - p, so the weighted log loss is the cross
+        entropy against the teacher's probability p. Only real training
+        postings are labelled, never SMOTE rows, and with out-of-fold teachers,
+        since the teacher is overconfident on rows it was fitted on.
+        
+        Args:
+            C: Inverse regularization strength of the student
+            extra_texts: Unlabeled postings the teacher labels as extra training rows
+            folds: Folds for out-of-fold soft labels (below 2 uses the fitted teacher)
+        
+        Returns:
+            The fitted student (also kept as self.student)
+        """
+        logger.info("Distilling ensemble into a logistic regression student...")
+        
+        X = self.vectorizer.transform(self.X_train)
+        soft = self._out_of_fold_proba(X, self.y_train_original, folds)
+        if extra_texts is not None and len(extra_texts):
+            extra = self.vectorizer.transform(extra_texts)
+            X = sp.vstack([X, extra]).tocsr()
+            soft = np.r_[soft, self.model.predict_proba(extra)[:, 1]]
+        
+        rows = X.shape[0]
+        self.student = LogisticRegression(C=C, max_iter=2000, random_state=42)
+        self.student.fit(
+            sp.vstack([X, X]).tocsr(),
+            np.r_[np.ones(rows), np.zeros(rows)],
+            sample_weight=np.r_[soft, 1 - soft]
+        )
+        logger.info(f"Student trained on {rows} soft-labelled rows")
+        return self.student
+    
+    @staticmethod
+    def _latencies(predict, texts):
+        """Seconds per single-posting predict([text]) call"""
+        timings = []
+        for text in texts:
+            start = time.perf_counter()
+            predict([text])
+            timings.append(time.perf_counter() - start)
+        return np.array(timings)
+    
+    def distillation_report(self, latency_samples=200):
+        """
+        Print fidelity to the teacher, AUC, p50/p99 latency and artifact size
+        
+        The student is timed through sklearn and through the compiled scorer
+        the API uses with ML_ENGINE=compiled.
+        """
+        texts = list(self.X_test)[:latency_samples]
+        teacher_proba = self.model.predict_proba(self.X_test_vec)[:, 1]
+        student_proba = self.student.predict_proba(self.X_test_vec)[:, 1]
+        scorer = CompiledLinearScorer(self.student, self.vectorizer)
+        
+        def sklearn_predict(model):
+            return lambda batch: model.predict_proba(self.vectorizer.transform(batch))
+        
+        def artifact_size(model):
+            return len(pickle.dumps({'model': model, 'vectorizer': self.vectorizer}))
+        
+        rows = []
+        for name, proba, predict, size in [
+            ('teacher', teacher_proba, sklearn_predict(self.model), artifact_size(self.model)),
+            ('student', student_proba, sklearn_predict(self.student), artifact_size(self.student)),
+            ('compiled', student_proba, scorer.predict_proba, artifact_size(self.student)),
+        ]:
+            times = self._latencies(predict, texts)
+            try:
+                auc = roc_auc_score(self.y_test, proba)
+            except ValueError:
+                auc = float('nan')
+            rows.append({
+                'model': name,
+                'fidelity': float(np.mean((proba >= 0.5) == (teacher_proba >= 0.5))),
+                'mean_abs_diff': float(np.abs(proba - teacher_proba).mean()),
+                'auc': auc,
+                'p50_ms': float(np.percentile(times, 50) * 1e3),
+                'p99_ms': float(np.percentile(times, 99) * 1e3),
+                'size_mb': size / 1e6,
+            })
+        
+        print("\n" + "="*78)
+        print("DISTILLATION REPORT (test set)")
+        print("="*78)
+        print(f"{'model':<10}{'fidelity':>10}{'|p - p_t|':>11}{'AUC':>9}"
+              f"{'p50 ms':>10}{'p99 ms':>10}{'size MB':>10}")
+        for row in rows:
+            print(f"{row['model']:<10}{row['fidelity']:>10.2%}{row['mean_abs_diff']:>11.4f}"
+                  f"{row['auc']:>9.4f}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                  f"{row['size_mb']:>10.2f}")
+        print("="*78 + "\n")
+        
+        return rows
+    
+    def save_model(self, output_path='models/saved_models/scam_detector.pkl',
+                   artifact_path='models/saved_models/scam_detector'):
+        """
+        Save trained model and vectorizer
+        
+        Args:
+            output_path: Pickle file (fallback for older deployments)
+            artifact_path: Artifact directory with memory-mappable arrays (None to skip)
+        """
         # Create directory if needed
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
@@ -206,6 +390,11 @@ class ScamDetectorTrainer:
             'vectorizer': self.vectorizer
         }
         
+        if artifact_path:
+            # Both formats carry the same version, so caches keyed on it agree
+            model_data['version'] = save_model_artifact(model_data, artifact_path)
+            logger.info(f"Model artifact saved to {artifact_path}")
+        
         with open(output_path, 'wb') as f:
             pickle.dump(model_data, f)
         
@@ -240,32 +429,59 @@ class ScamDetectorTrainer:
 
 def main():
     """Main training pipeline"""
+    parser = argparse.ArgumentParser(description="Train the job scam detection model")
+    parser.add_argument('--data', default='data/raw/fake_job_postings.csv')
+    parser.add_argument('--model-type', default='ensemble',
+                        choices=['logistic', 'random_forest', 'ensemble'])
+    parser.add_argument('--distill', action='store_true',
+                        help='Also train a logistic student on the model and compare them')
+    parser.add_argument('--save-student', action='store_true',
+                        help='Save the distilled student as the production model')
+    parser.add_argument('--reports', metavar='PATH',
+                        help='Also train on scams reported through /report (e.g. data/reports.sqlite)')
+    parser.add_argument('--min-reports', type=int, default=1,
+                        help='Only use reported postings reported at least this many times')
+    args = parser.parse_args()
+    
     print("="*60)
     print("JOB SCAM DETECTION - MODEL TRAINING")
     print("="*60 + "\n")
     
     # Initialize trainer
-    trainer = ScamDetectorTrainer(data_path='data/raw/fake_job_postings.csv')
+    trainer = ScamDetectorTrainer(data_path=args.data)
     
     # Load data
     df = trainer.load_data()
+    if args.reports:
+        df = trainer.add_reports(df, args.reports, args.min_reports)
+    
+    # Show which rule features separate the classes
+    trainer.feature_report(df)
     
     # Prepare data
     trainer.prepare_data(df)
     
     # Train model
-    trainer.train_model(model_type='ensemble')
+    trainer.train_model(model_type=args.model_type)
     
     # Evaluate
     trainer.evaluate()
     
+    # Distill into a single fast model
+    if args.distill or args.save_student:
+        trainer.distill()
+        trainer.distillation_report()
+        if args.save_student:
+            trainer.model = trainer.student
+            print("Saving the distilled student as the production model")
+    
     # Test predictions
     trainer.test_predictions()
     
     # Save model
     trainer.save_model()
     
-    print("\n✅ Training complete! Model saved to models/saved_models/scam_detector.pkl")
+    print("\n✅ Training complete! Model saved to models/saved_models/scam_detector/ (and .pkl)")
     print("   You can now run the API server with: python backend/main.py")
 
 